@@ -365,6 +365,11 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 ############################ Modulestore Configuration ################################
 MODULESTORE_BRANCH = 'draft-preferred'
 
+# Maximum total size, in bytes of pickled data, of the split modulestore course
+# structures each process keeps in memory in front of the course_structure_cache.
+# Set to 0 to disable the process-local cache.
+COURSE_STRUCTURE_LOCAL_CACHE_SIZE = 64 * 1024 * 1024
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -173,6 +173,9 @@ CACHES = {
     },
 }
 
+# Keep query counts of split modulestore tests independent of earlier tests.
+COURSE_STRUCTURE_LOCAL_CACHE_SIZE = 0
+
 # hide ratelimit warnings while running tests
 filterwarnings('ignore', message='No request passed to the backend, unable to rate-limit')
 
@@ -0,0 +1,50 @@
+"""
+Reconcile Enrollment Counts Management Command
+"""
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from student.models import CourseEnrollment, CourseEnrollmentCount
+
+
+class Command(BaseCommand):
+    """Management Command for correcting the maintained counts of the enrollments in courses."""
+    help = """
+    Sets the maintained counts of the active enrollments in courses, by mode,
+    to the numbers of their enrollments, and reports the courses whose counts
+    were wrong.  Reconciles all the courses if none are given.
+
+    example:
+        manage.py ... reconcile_enrollment_counts edX/Open_DemoX/edx_demo_course
+    """
+    args = "[<course_id> ...]"
+
+    def handle(self, *args, **options):
+        if args:
+            try:
+                course_keys = [CourseKey.from_string(course_id) for course_id in args]
+            except InvalidKeyError:
+                raise CommandError("Invalid course_id")
+        else:
+            # Course ids are read as strings by values_list.
+            course_ids = set()
+            for model in (CourseEnrollment, CourseEnrollmentCount):
+                course_ids.update(unicode(course_id) for course_id in model.objects.order_by().values_list(
+                    'course_id', flat=True
+                ).distinct())
+            course_keys = [CourseKey.from_string(course_id) for course_id in sorted(course_ids)]
+
+        reconciled = 0
+        for course_key in course_keys:
+            previous = {
+                count.mode: count.count
+                for count in CourseEnrollmentCount.objects.filter(course_id=course_key)
+                if count.count
+            }
+            counts = CourseEnrollmentCount.reconcile(course_key)
+            if previous != counts:
+                self.stdout.write(u"Reconciled {}: {} -> {}\n".format(course_key, previous, counts))
+                reconciled += 1
+
+        self.stdout.write(u"Reconciled the counts of {} of {} courses\n".format(reconciled, len(course_keys)))
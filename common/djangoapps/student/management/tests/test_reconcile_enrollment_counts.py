@@ -0,0 +1,46 @@
+"""
+Tests the reconcile_enrollment_counts management command
+"""
+from StringIO import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from opaque_keys.edx.locations import SlashSeparatedCourseKey
+
+from student.models import CourseEnrollment, CourseEnrollmentCount
+from student.tests.factories import UserFactory
+
+
+class TestReconcileEnrollmentCounts(TestCase):
+    """Tests for reconciling the counts of the enrollments in courses."""
+
+    def setUp(self):
+        super(TestReconcileEnrollmentCounts, self).setUp()
+        self.course_ids = [SlashSeparatedCourseKey("edX", "Test101", run) for run in ("2013", "2014")]
+        for course_id in self.course_ids:
+            for mode in ("honor", "verified"):
+                CourseEnrollment.enroll(UserFactory.create(), course_id, mode)
+
+    def test_reconcile(self):
+        # Bulk updates aren't counted.
+        CourseEnrollment.objects.filter(mode="honor").update(mode="verified")
+        out = StringIO()
+        call_command('reconcile_enrollment_counts', stdout=out)
+
+        self.assertIn("Reconciled the counts of 2 of 2 courses", out.getvalue())
+        for course_id in self.course_ids:
+            self.assertEqual(CourseEnrollmentCount.counts_for_course(course_id), {"honor": 0, "verified": 2})
+
+    def test_reconcile_course(self):
+        CourseEnrollment.objects.filter(mode="honor").update(is_active=False)
+        out = StringIO()
+        call_command('reconcile_enrollment_counts', unicode(self.course_ids[0]), stdout=out)
+
+        self.assertIn("Reconciled the counts of 1 of 1 courses", out.getvalue())
+        self.assertEqual(CourseEnrollmentCount.counts_for_course(self.course_ids[0]), {"honor": 0, "verified": 1})
+        self.assertEqual(CourseEnrollmentCount.counts_for_course(self.course_ids[1]), {"honor": 1, "verified": 1})
+
+    def test_invalid_course_id(self):
+        with self.assertRaises(CommandError):
+            call_command('reconcile_enrollment_counts', 'not a course id')
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+from django.db.models import Count
+from opaque_keys.edx.keys import CourseKey
+
+
+def forwards(apps, schema_editor):
+    """Initialize the counts of the active enrollments in courses"""
+    CourseEnrollment = apps.get_model("student", "CourseEnrollment")
+    CourseEnrollmentCount = apps.get_model("student", "CourseEnrollmentCount")
+    db_alias = schema_editor.connection.alias
+
+    CourseEnrollmentCount.objects.using(db_alias).bulk_create([
+        CourseEnrollmentCount(
+            # Course ids are read as strings by values.
+            course_id=CourseKey.from_string(unicode(item['course_id'])),
+            mode=item['mode'],
+            count=item['mode__count'],
+        )
+        for item in CourseEnrollment.objects.using(db_alias).filter(is_active=True).values(
+            'course_id', 'mode').order_by().annotate(Count('mode'))
+    ])
+
+
+def backwards(apps, schema_editor):
+    """Remove the counts of the active enrollments in courses"""
+    CourseEnrollmentCount = apps.get_model("student", "CourseEnrollmentCount")
+    CourseEnrollmentCount.objects.using(schema_editor.connection.alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0003_courseenrollmentcount'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards)
+    ]
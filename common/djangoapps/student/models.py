@@ -30,7 +30,7 @@ from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.db import models, IntegrityError, transaction
-from django.db.models import Count
+from django.db.models import Count, F
 from django.db.models.signals import pre_save, post_save
 from django.dispatch import receiver, Signal
 from django.core.exceptions import ObjectDoesNotExist
@@ -41,6 +41,7 @@ import dogstats_wrapper as dog_stats_api
 from eventtracking import tracker
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
+import request_cache
 from simple_history.models import HistoricalRecords
 from track import contexts
 from xmodule_django.models import CourseKeyField, NoneToEmptyManager
@@ -52,7 +53,6 @@ import lms.lib.comment_client as cc
 from openedx.core.djangoapps.commerce.utils import ecommerce_api_client, ECOMMERCE_DATE_FORMAT
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from util.model_utils import emit_field_changed_events, get_changed_fields_dict
-from util.query import use_read_replica_if_available
 from util.milestones_helpers import is_entrance_exams_enabled
 
 
@@ -824,12 +824,7 @@ class CourseEnrollmentManager(models.Manager):
         'course_id' is the course_id to return enrollments
         """
 
-        enrollment_number = super(CourseEnrollmentManager, self).get_queryset().filter(
-            course_id=course_id,
-            is_active=1
-        ).count()
-
-        return enrollment_number
+        return sum(CourseEnrollmentCount.counts_for_course(course_id).values())
 
     def is_course_full(self, course):
         """
@@ -853,15 +848,12 @@ class CourseEnrollmentManager(models.Manager):
         Returns a dictionary that stores the total enrollment count for a course, as well as the
         enrollment count for each individual mode.
         """
-        # Unfortunately, Django's "group by"-style queries look super-awkward
-        query = use_read_replica_if_available(
-            super(CourseEnrollmentManager, self).get_queryset().filter(course_id=course_id, is_active=True).values(
-                'mode').order_by().annotate(Count('mode')))
         total = 0
         enroll_dict = defaultdict(int)
-        for item in query:
-            enroll_dict[item['mode']] = item['mode__count']
-            total += item['mode__count']
+        for mode, count in CourseEnrollmentCount.counts_for_course(course_id).iteritems():
+            if count:
+                enroll_dict[mode] = count
+                total += count
         enroll_dict['total'] = total
         return enroll_dict
 
@@ -906,6 +898,9 @@ class CourseEnrollment(models.Model):
     # cache key format e.g enrollment.<username>.<course_key>.mode = 'honor'
     COURSE_ENROLLMENT_CACHE_KEY = u"enrollment.{}.{}.mode"
 
+    # Name of the request cache of the modes and states of users' enrollments
+    MODES_REQUEST_CACHE_NAME = u"student.enrollment_modes"
+
     class Meta(object):
         unique_together = (('user', 'course_id'),)
         ordering = ('user', 'course_id')
@@ -922,6 +917,30 @@ class CourseEnrollment(models.Model):
             "[CourseEnrollment] {}: {} ({}); active: ({})"
         ).format(self.user, self.course_id, self.created, self.is_active)
 
+    def save(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        """
+        Saves the enrollment, and updates the enrollment counts of its course
+        in the same transaction.
+        """
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = CourseEnrollment.objects.select_for_update().only(
+                    'course_id', 'mode', 'is_active'
+                ).filter(pk=self.pk).first()
+
+            super(CourseEnrollment, self).save(*args, **kwargs)
+
+            if previous is not None:
+                if (previous.course_id, previous.mode, previous.is_active) == (
+                        self.course_id, self.mode, self.is_active
+                ):
+                    return
+                if previous.is_active:
+                    CourseEnrollmentCount.increment(previous.course_id, previous.mode, -1)
+            if self.is_active:
+                CourseEnrollmentCount.increment(self.course_id, self.mode, 1)
+
     @classmethod
     @transaction.atomic
     def get_or_create_enrollment(cls, user, course_key):
@@ -1266,11 +1285,8 @@ class CourseEnrollment(models.Model):
         if not user.is_authenticated():
             return False
 
-        try:
-            record = CourseEnrollment.objects.get(user=user, course_id=course_key)
-            return record.is_active
-        except cls.DoesNotExist:
-            return False
+        __, is_active = cls.enrollment_mode_for_user(user, course_key)
+        return bool(is_active)
 
     @classmethod
     def is_enrolled_by_partial(cls, user, course_id_partial):
@@ -1311,22 +1327,71 @@ class CourseEnrollment(models.Model):
         Returns (mode, is_active) where mode is the enrollment mode of the student
             and is_active is whether the enrollment is active.
         Returns (None, None) if the courseenrollment record does not exist.
+
+        During a request, the modes of all the user's enrollments are loaded
+        in a single query the first time they're needed.
         """
+        enrollment_modes = cls._enrollment_modes_for_user(user)
+        if enrollment_modes is not None and isinstance(course_id, CourseKey):
+            if hasattr(course_id, 'for_branch'):
+                # Like queries, ignore the branch and version of the course.
+                course_id = course_id.for_branch(None).version_agnostic()
+            return enrollment_modes.get(course_id, (None, None))
+
         try:
             record = CourseEnrollment.objects.get(user=user, course_id=course_id)
             return (record.mode, record.is_active)
         except cls.DoesNotExist:
             return (None, None)
 
+    @classmethod
+    def _enrollment_modes_for_user(cls, user):
+        """
+        Returns a dict mapping the course IDs of all the user's enrollments to
+        their (mode, is_active), cached for the current request, or None if
+        there is no current request.
+        """
+        if user.id is None or request_cache.get_request() is None:
+            return None
+
+        modes_cache = request_cache.get_cache(cls.MODES_REQUEST_CACHE_NAME)
+        if user.id not in modes_cache:
+            modes_cache[user.id] = {
+                enrollment.course_id: (enrollment.mode, enrollment.is_active)
+                for enrollment in CourseEnrollment.objects.filter(user_id=user.id).only(
+                    'course_id', 'mode', 'is_active'
+                )
+            }
+        return modes_cache[user.id]
+
     @classmethod
     def enrollments_for_user(cls, user):
         return CourseEnrollment.objects.filter(user=user, is_active=1)
 
-    def is_paid_course(self):
+    @classmethod
+    def enrollments_for_user_with_overviews_preload(cls, user):  # pylint: disable=invalid-name
+        """
+        Returns the list of the user's active CourseEnrollments, with the
+        CourseOverviews of their courses loaded in a single query when they
+        exist.  The `course_overview` of the other enrollments is loaded when
+        needed, as usual.
+        """
+        enrollments = list(cls.enrollments_for_user(user))
+        course_overviews = CourseOverview.get_from_ids_if_exists(
+            [enrollment.course_id for enrollment in enrollments]
+        )
+        for enrollment in enrollments:
+            enrollment._course_overview = course_overviews.get(enrollment.course_id)  # pylint: disable=protected-access
+        return enrollments
+
+    def is_paid_course(self, modes_dict=None):
         """
         Returns True, if course is paid
+
+        `modes_dict` are the course's modes, as returned by
+        `CourseMode.modes_for_course_dict`, to avoid loading them.
         """
-        paid_course = CourseMode.is_white_label(self.course_id)
+        paid_course = CourseMode.is_white_label(self.course_id, modes_dict=modes_dict)
         if paid_course or CourseMode.is_professional_slug(self.mode):
             return True
 
@@ -1346,10 +1411,14 @@ class CourseEnrollment(models.Model):
         """Changes this `CourseEnrollment` record's mode to `mode`.  Saves immediately."""
         self.update_enrollment(mode=mode)
 
-    def refundable(self):
+    def refundable(self, user_already_has_certs_for=None, modes=None):
         """
         For paid/verified certificates, students may receive a refund if they have
         a verified certificate and the deadline for refunds has not yet passed.
+
+        `user_already_has_certs_for` is a collection of the IDs of the
+        courses the user has certificates for, and `modes` are the unexpired
+        modes of the course, to avoid loading them.
         """
         # In order to support manual refunds past the deadline, set can_refund on this object.
         # On unenrolling, the "UNENROLL_DONE" signal calls CertificateItem.refund_cert_callback(),
@@ -1360,7 +1429,16 @@ class CourseEnrollment(models.Model):
             return True
 
         # If the student has already been given a certificate they should not be refunded
-        if GeneratedCertificate.certificate_for_student(self.user, self.course_id) is not None:
+        if user_already_has_certs_for is not None:
+            if self.course_id in user_already_has_certs_for:
+                return False
+        elif GeneratedCertificate.certificate_for_student(self.user, self.course_id) is not None:
+            return False
+
+        # Only verified enrollments are refunded.  This is checked before the
+        # cutoff date, which may need a request to the ecommerce service.
+        course_mode = CourseMode.mode_for_course(self.course_id, 'verified', modes=modes)
+        if course_mode is None:
             return False
 
         # If it is after the refundable cutoff date they should not be refunded.
@@ -1368,11 +1446,7 @@ class CourseEnrollment(models.Model):
         if refund_cutoff_date and datetime.now(UTC) > refund_cutoff_date:
             return False
 
-        course_mode = CourseMode.mode_for_course(self.course_id, 'verified')
-        if course_mode is None:
-            return False
-        else:
-            return True
+        return True
 
     def refund_cutoff_date(self):
         """ Calculate and return the refund window end date. """
@@ -1472,6 +1546,81 @@ def invalidate_enrollment_mode_cache(sender, instance, **kwargs):  # pylint: dis
     )
     cache.delete(cache_key)
 
+    request_cache.get_cache(CourseEnrollment.MODES_REQUEST_CACHE_NAME).pop(instance.user_id, None)
+
+
+@receiver(models.signals.post_delete, sender=CourseEnrollment)
+def decrement_enrollment_count(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Remove a deleted enrollment from the enrollment counts of its course. """
+    if instance.is_active:
+        CourseEnrollmentCount.increment(instance.course_id, instance.mode, -1)
+
+
+class CourseEnrollmentCount(models.Model):
+    """
+    The number of active enrollments in a course with a mode, maintained as
+    enrollments are saved, so that counting the enrollments of a course
+    doesn't scan them.
+
+    The counts are initialized from the enrollments by a data migration.
+    Changes bypassing CourseEnrollment.save, such as bulk updates, aren't
+    counted; the reconcile_enrollment_counts command corrects the counts.
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    mode = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    class Meta(object):
+        unique_together = (('course_id', 'mode'),)
+
+    def __unicode__(self):
+        return u"[CourseEnrollmentCount] {}: {} {}".format(self.course_id, self.count, self.mode)
+
+    @classmethod
+    def counts_for_course(cls, course_id):
+        """
+        Returns a dict mapping modes to the numbers of active enrollments in
+        the course with them.
+        """
+        return dict(cls.objects.filter(course_id=course_id).values_list('mode', 'count'))
+
+    @classmethod
+    def increment(cls, course_id, mode, delta):
+        """
+        Adds `delta` to the count of the course's enrollments with the mode.
+        """
+        counts = cls.objects.filter(course_id=course_id, mode=mode)
+        if counts.update(count=F('count') + delta):
+            return
+
+        # This is the course's first enrollment with the mode.
+        try:
+            with transaction.atomic():
+                cls.objects.create(course_id=course_id, mode=mode, count=delta)
+        except IntegrityError:
+            # Another enrollment with the mode was counted concurrently.
+            counts.update(count=F('count') + delta)
+
+    @classmethod
+    def reconcile(cls, course_id):
+        """
+        Sets the counts of the course to the numbers of its active enrollments,
+        and returns them as a dict mapping modes to counts.
+        """
+        with transaction.atomic():
+            # Lock the counts of the course before counting the enrollments, so
+            # enrollments saved meanwhile are counted after they're overwritten.
+            list(cls.objects.select_for_update().filter(course_id=course_id))
+            counts = {
+                item['mode']: item['mode__count']
+                for item in CourseEnrollment.objects.filter(course_id=course_id, is_active=True).values(
+                    'mode').order_by().annotate(Count('mode'))
+            }
+            for mode, count in counts.iteritems():
+                cls.objects.update_or_create(course_id=course_id, mode=mode, defaults={'count': count})
+            cls.objects.filter(course_id=course_id).exclude(mode__in=counts.keys()).update(count=0)
+        return counts
+
 
 class ManualEnrollmentAudit(models.Model):
     """
@@ -6,14 +6,20 @@ adding users, removing users, and listing members
 from abc import ABCMeta, abstractmethod
 
 from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 import logging
 
+import request_cache
 from student.models import CourseAccessRole
 from xmodule_django.models import CourseKeyField
 
 
 log = logging.getLogger(__name__)
 
+# Name of the request cache of the RoleCaches of users
+ROLE_CACHE_NAME = u"student.roles"
+
 # A list of registered access roles.
 REGISTERED_ACCESS_ROLES = {}
 
@@ -55,6 +61,34 @@ class RoleCache(object):
         )
 
 
+def get_role_cache(user):
+    """
+    Return the RoleCache of the user. During a request, it is shared by all the objects of the user, so that
+    their roles are loaded once per request rather than once per object.
+    """
+    if user.id is not None and request_cache.get_request() is not None:
+        role_caches = request_cache.get_cache(ROLE_CACHE_NAME)
+        if user.id not in role_caches:
+            role_caches[user.id] = RoleCache(user)
+        return role_caches[user.id]
+
+    # pylint: disable=protected-access
+    if not hasattr(user, '_roles'):
+        # Cache a list of tuples identifying the particular roles that a user has
+        # Stored as tuples, rather than django models, to make it cheaper to construct objects for comparison
+        user._roles = RoleCache(user)
+    return user._roles
+
+
+@receiver(post_save, sender=CourseAccessRole)
+@receiver(post_delete, sender=CourseAccessRole)
+def invalidate_role_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the request cache of the roles of the user whose role changed.
+    """
+    request_cache.get_cache(ROLE_CACHE_NAME).pop(instance.user_id, None)
+
+
 class AccessRole(object):
     """
     Object representing a role with particular access to a resource
@@ -137,13 +171,7 @@ class RoleBase(AccessRole):
         if not (user.is_authenticated() and user.is_active):
             return False
 
-        # pylint: disable=protected-access
-        if not hasattr(user, '_roles'):
-            # Cache a list of tuples identifying the particular roles that a user has
-            # Stored as tuples, rather than django models, to make it cheaper to construct objects for comparison
-            user._roles = RoleCache(user)
-
-        return user._roles.has_role(self._role_name, self.course_key, self.org)
+        return get_role_cache(user).has_role(self._role_name, self.course_key, self.org)
 
     def add_users(self, *users):
         """
@@ -339,11 +367,7 @@ class UserBasedRole(object):
         if not (self.user.is_authenticated() and self.user.is_active):
             return False
 
-        # pylint: disable=protected-access
-        if not hasattr(self.user, '_roles'):
-            self.user._roles = RoleCache(self.user)
-
-        return self.user._roles.has_role(self.role, course_key, course_key.org)
+        return get_role_cache(self.user).has_role(self.role, course_key, course_key.org)
 
     def add_course(self, *course_keys):
         """
@@ -2,9 +2,12 @@
 Tests of student.roles
 """
 import ddt
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.test.client import RequestFactory
 
 from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
+from request_cache.middleware import RequestCache
 from student.tests.factories import AnonymousUserFactory
 
 from student.roles import (
@@ -156,6 +159,24 @@ class RolesTestCase(TestCase):
         role.remove_users(self.student)
         self.assertFalse(role.has_user(self.student))
 
+    def test_roles_cached_per_request(self):
+        RequestCache().process_request(RequestFactory().get('/'))
+        self.addCleanup(RequestCache.clear_request_cache)
+        role = CourseStaffRole(self.course_key)
+        self.assertTrue(role.has_user(self.course_staff))
+
+        # Other objects of the user share its roles during the request.
+        course_staff = User.objects.get(id=self.course_staff.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(role.has_user(course_staff))
+            self.assertFalse(CourseInstructorRole(self.course_key).has_user(course_staff))
+
+        # Changes to the roles during the request are seen by all the objects of the user.
+        role.remove_users(self.course_staff)
+        self.assertFalse(role.has_user(course_staff))
+        CourseInstructorRole(self.course_key).add_users(self.course_staff)
+        self.assertTrue(CourseInstructorRole(self.course_key).has_user(course_staff))
+
 
 @ddt.ddt
 class RoleCacheTestCase(TestCase):
@@ -16,12 +16,15 @@ from pyquery import PyQuery as pq
 from django.conf import settings
 from django.contrib.auth.models import User, AnonymousUser
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test import TestCase
-from django.test.client import Client
+from django.test.client import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
 
 from course_modes.models import CourseMode
+from request_cache.middleware import RequestCache
 from student.models import (
-    anonymous_id_for_user, user_by_anonymous_id, CourseEnrollment,
+    anonymous_id_for_user, user_by_anonymous_id, CourseEnrollment, CourseEnrollmentCount,
     unique_id_for_user, LinkedInAddToProfileConfiguration
 )
 from student.views import (
@@ -490,6 +493,42 @@ class DashboardTest(ModuleStoreTestCase):
             response_2 = self.client.get(reverse('dashboard'))
             self.assertEquals(response_2.status_code, 200)
 
+    @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+    def test_dashboard_queries(self):
+        """
+        Check that the number of queries of the student dashboard doesn't
+        depend on the number of courses the student is enrolled in.
+        """
+        self.client.login(username="jack", password="test")
+
+        def enroll(course):
+            """
+            Enroll the user in the course as verified, with a certificate.
+            """
+            CourseModeFactory.create(course_id=course.id, mode_slug='verified')
+            CourseEnrollment.enroll(self.user, course.id, mode='verified')
+            GeneratedCertificateFactory.create(
+                user=self.user, course_id=course.id, status=CertificateStatuses.downloadable, mode='verified'
+            )
+
+        def dashboard_queries():
+            """
+            Return the number of queries of the dashboard.
+            """
+            # Load the dashboard once first, so that the CourseOverviews are created.
+            self.client.get(reverse('dashboard'))
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('dashboard'))
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        enroll(self.course)
+        queries_for_one_course = dashboard_queries()
+
+        for __ in range(3):
+            enroll(CourseFactory.create())
+        self.assertEqual(dashboard_queries(), queries_for_one_course)
+
     @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
     @patch.dict(settings.FEATURES, {"IS_EDX_DOMAIN": True})
     def test_dashboard_header_nav_has_find_courses(self):
@@ -778,6 +817,80 @@ class EnrollInCourseTest(EnrollmentEventTestMixin, TestCase):
         CourseEnrollment.enroll(user, course_id, "audit")
         self.assert_enrollment_mode_change_event_was_emitted(user, course_id, "audit")
 
+    def test_enrollments_cached_per_request(self):
+        user = UserFactory.create()
+        course_ids = [SlashSeparatedCourseKey("edX", "Test101", run) for run in ("2013", "2014", "2015")]
+        CourseEnrollment.enroll(user, course_ids[0], "verified")
+        CourseEnrollment.enroll(user, course_ids[1])
+        CourseEnrollment.unenroll(user, course_ids[1])
+
+        RequestCache().process_request(RequestFactory().get('/'))
+        self.addCleanup(RequestCache.clear_request_cache)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                [CourseEnrollment.is_enrolled(user, course_id) for course_id in course_ids],
+                [True, False, False]
+            )
+            self.assertEqual(CourseEnrollment.enrollment_mode_for_user(user, course_ids[0]), ("verified", True))
+            self.assertEqual(CourseEnrollment.enrollment_mode_for_user(user, course_ids[2]), (None, None))
+
+        # Changes to the enrollments during the request are seen.
+        CourseEnrollment.enroll(user, course_ids[2])
+        self.assertTrue(CourseEnrollment.is_enrolled(user, course_ids[2]))
+
+
+class CourseEnrollmentCountTest(TestCase):
+    """Tests the maintained counts of the enrollments in courses."""
+
+    def setUp(self):
+        super(CourseEnrollmentCountTest, self).setUp()
+        self.course_id = SlashSeparatedCourseKey("edX", "Test101", "2013")
+        self.users = [UserFactory.create() for __ in range(3)]
+
+    def assert_counts(self, expected):
+        """Assert the counts are as expected, and match the enrollments."""
+        self.assertEqual(CourseEnrollmentCount.counts_for_course(self.course_id), expected)
+        self.assertEqual(
+            {mode: count for mode, count in CourseEnrollmentCount.reconcile(self.course_id).iteritems() if count},
+            {mode: count for mode, count in expected.iteritems() if count}
+        )
+
+    def test_counts_maintained(self):
+        CourseEnrollment.enroll(self.users[0], self.course_id, "honor")
+        self.assert_counts({"honor": 1})
+
+        CourseEnrollment.enroll(self.users[1], self.course_id, "verified")
+        CourseEnrollment.enroll(self.users[2], self.course_id, "honor")
+        self.assert_counts({"honor": 2, "verified": 1})
+
+        CourseEnrollment.enroll(self.users[2], self.course_id, "verified")
+        CourseEnrollment.unenroll(self.users[0], self.course_id)
+        self.assert_counts({"honor": 0, "verified": 2})
+
+        CourseEnrollment.objects.get(user=self.users[1], course_id=self.course_id).delete()
+        self.assert_counts({"honor": 0, "verified": 1})
+
+    def test_counts_reconciled(self):
+        for user in self.users:
+            CourseEnrollment.enroll(user, self.course_id, "honor")
+        CourseEnrollmentCount.objects.all().delete()
+        CourseEnrollment.enroll(self.users[0], self.course_id, "verified")
+        self.assertEqual(CourseEnrollmentCount.counts_for_course(self.course_id), {"honor": -1, "verified": 1})
+
+        self.assertEqual(CourseEnrollmentCount.reconcile(self.course_id), {"honor": 2, "verified": 1})
+        self.assertEqual(
+            CourseEnrollment.objects.enrollment_counts(self.course_id),
+            {"honor": 2, "verified": 1, "total": 3}
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(CourseEnrollment.objects.num_enrolled_in(self.course_id), 3)
+
+    def test_saving_unchanged_enrollment(self):
+        enrollment = CourseEnrollment.enroll(self.users[0], self.course_id, "honor")
+        self.assert_counts({"honor": 1})
+        enrollment.save()
+        self.assert_counts({"honor": 1})
+
 
 @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
 class ChangeEnrollmentViewTest(ModuleStoreTestCase):
@@ -57,7 +57,9 @@ from student.models import (
 from student.forms import AccountCreationForm, PasswordResetFormNoActive
 
 from lms.djangoapps.verify_student.models import SoftwareSecurePhotoVerification
-from certificates.models import CertificateStatuses, certificate_status_for_student
+from certificates.models import (
+    CertificateStatuses, GeneratedCertificate, certificate_status, certificate_status_for_student
+)
 from certificates.api import (  # pylint: disable=import-error
     get_certificate_url,
     has_html_certificates_enabled,
@@ -182,7 +184,7 @@ def process_survey_link(survey_link, user):
     return survey_link.format(UNIQUE_ID=unique_id_for_user(user))
 
 
-def cert_info(user, course_overview, course_mode):
+def cert_info(user, course_overview, course_mode, cert_status=None):
     """
     Get the certificate info needed to render the dashboard section for the given
     student and course.
@@ -191,6 +193,8 @@ def cert_info(user, course_overview, course_mode):
         user (User): A user.
         course_overview (CourseOverview): A course.
         course_mode (str): The enrollment mode (honor, verified, audit, etc.)
+        cert_status (dict): The student's certificate status for the course,
+            as returned by certificate_status_for_student, if already loaded.
 
     Returns:
         dict: Empty dict if certificates are disabled or hidden, or a dictionary with keys:
@@ -205,12 +209,9 @@ def cert_info(user, course_overview, course_mode):
     """
     if not course_overview.may_certify():
         return {}
-    return _cert_info(
-        user,
-        course_overview,
-        certificate_status_for_student(user, course_overview.id),
-        course_mode
-    )
+    if cert_status is None:
+        cert_status = certificate_status_for_student(user, course_overview.id)
+    return _cert_info(user, course_overview, cert_status, course_mode)
 
 
 def reverification_info(statuses):
@@ -251,7 +252,7 @@ def get_course_enrollments(user, org_to_include, orgs_to_exclude):
         generator[CourseEnrollment]: a sequence of enrollments to be displayed
         on the user's dashboard.
     """
-    for enrollment in CourseEnrollment.enrollments_for_user(user):
+    for enrollment in CourseEnrollment.enrollments_for_user_with_overviews_preload(user):
 
         # If the course is missing or broken, log an error and skip it.
         course_overview = enrollment.course_overview
@@ -517,6 +518,77 @@ def is_course_blocked(request, redeemed_registration_codes, course_key):
     return blocked
 
 
+class DashboardCourseData(object):
+    """
+    The data of the courses of a user's enrollments which the dashboard
+    needs, loaded for all the courses in a fixed number of queries rather
+    than in a few queries for each course.
+    """
+    def __init__(self, user, course_enrollments):
+        course_ids = [enrollment.course_id for enrollment in course_enrollments]
+
+        __, unexpired_course_modes = CourseMode.all_and_unexpired_modes_for_courses(course_ids)
+        self.course_modes_by_course = {
+            course_id: {
+                mode.slug: mode
+                for mode in modes
+            }
+            for course_id, modes in unexpired_course_modes.iteritems()
+        }
+        # The modes of each course as returned by CourseMode.modes_for_course.
+        self.selectable_course_modes = {
+            course_id: [mode for mode in modes if mode.slug not in CourseMode.CREDIT_MODES] or [CourseMode.DEFAULT_MODE]
+            for course_id, modes in unexpired_course_modes.iteritems()
+        }
+
+        self.certificates = {
+            certificate.course_id: certificate
+            for certificate in GeneratedCertificate.objects.filter(user=user, course_id__in=course_ids)
+        }
+
+        self.redeemed_registration_codes = defaultdict(list)
+        redeemed_registration_codes = CourseRegistrationCode.objects.filter(
+            course_id__in=course_ids,
+            registrationcoderedemption__redeemed_by=user
+        ).select_related('invoice_item__invoice')
+        for registration_code in redeemed_registration_codes:
+            self.redeemed_registration_codes[registration_code.course_id].append(registration_code)
+
+        if settings.FEATURES['REQUIRE_COURSE_EMAIL_AUTH']:
+            self.email_enabled_course_ids = set(
+                authorization.course_id
+                for authorization in CourseAuthorization.objects.filter(course_id__in=course_ids, email_enabled=True)
+            )
+        else:
+            self.email_enabled_course_ids = set(course_ids)
+
+    def cert_status(self, course_id):
+        """
+        Returns the user's certificate status for the course, as returned by
+        certificate_status_for_student.
+        """
+        return certificate_status(self.certificates.get(course_id), self.selectable_course_modes[course_id])
+
+    def is_paid_course(self, enrollment):
+        """
+        Returns whether the course of the enrollment is paid.
+        """
+        return enrollment.is_paid_course(
+            modes_dict=CourseMode.modes_for_course_dict(
+                enrollment.course_id, modes=self.selectable_course_modes[enrollment.course_id]
+            )
+        )
+
+    def refundable(self, enrollment):
+        """
+        Returns whether the enrollment is refundable.
+        """
+        return enrollment.refundable(
+            user_already_has_certs_for=self.certificates,
+            modes=self.selectable_course_modes[enrollment.course_id]
+        )
+
+
 @login_required
 @ensure_csrf_cookie
 def dashboard(request):
@@ -544,16 +616,9 @@ def dashboard(request):
     # sort the enrollment pairs by the enrollment date
     course_enrollments.sort(key=lambda x: x.created, reverse=True)
 
-    # Retrieve the course modes for each course
-    enrolled_course_ids = [enrollment.course_id for enrollment in course_enrollments]
-    __, unexpired_course_modes = CourseMode.all_and_unexpired_modes_for_courses(enrolled_course_ids)
-    course_modes_by_course = {
-        course_id: {
-            mode.slug: mode
-            for mode in modes
-        }
-        for course_id, modes in unexpired_course_modes.iteritems()
-    }
+    # Retrieve the course modes, certificates, etc. for all the courses at once
+    course_data = DashboardCourseData(user, course_enrollments)
+    course_modes_by_course = course_data.course_modes_by_course
 
     # Check to see if the student has recently enrolled in a course.
     # If so, display a notification message confirming the enrollment.
@@ -616,7 +681,10 @@ def dashboard(request):
     # there is no verification messaging to display.
     verify_status_by_course = check_verify_status_by_course(user, course_enrollments)
     cert_statuses = {
-        enrollment.course_id: cert_info(request.user, enrollment.course_overview, enrollment.mode)
+        enrollment.course_id: cert_info(
+            request.user, enrollment.course_overview, enrollment.mode,
+            cert_status=course_data.cert_status(enrollment.course_id)
+        )
         for enrollment in course_enrollments
     }
 
@@ -624,8 +692,8 @@ def dashboard(request):
     show_email_settings_for = frozenset(
         enrollment.course_id for enrollment in course_enrollments if (
             settings.FEATURES['ENABLE_INSTRUCTOR_EMAIL'] and
-            modulestore().get_modulestore_type(enrollment.course_id) != ModuleStoreEnum.Type.xml and
-            CourseAuthorization.instructor_email_enabled(enrollment.course_id)
+            enrollment.course_id in course_data.email_enabled_course_ids and
+            modulestore().get_modulestore_type(enrollment.course_id) != ModuleStoreEnum.Type.xml
         )
     )
 
@@ -639,24 +707,21 @@ def dashboard(request):
 
     show_refund_option_for = frozenset(
         enrollment.course_id for enrollment in course_enrollments
-        if enrollment.refundable()
+        if course_data.refundable(enrollment)
     )
 
     block_courses = frozenset(
         enrollment.course_id for enrollment in course_enrollments
         if is_course_blocked(
             request,
-            CourseRegistrationCode.objects.filter(
-                course_id=enrollment.course_id,
-                registrationcoderedemption__redeemed_by=request.user
-            ),
+            course_data.redeemed_registration_codes[enrollment.course_id],
             enrollment.course_id
         )
     )
 
     enrolled_courses_either_paid = frozenset(
         enrollment.course_id for enrollment in course_enrollments
-        if enrollment.is_paid_course()
+        if course_data.is_paid_course(enrollment)
     )
 
     # If there are *any* denied reverifications that have not been toggled off,
@@ -1,9 +1,15 @@
 import re
 from django.conf import settings
+from django.core.cache import caches
+
+from capa.safe_exec.result_cache import SafeExecCache, SqliteResultCache
 
 # We'll make assets named this be importable by Python code in the sandbox.
 PYTHON_LIB_ZIP = "python_lib.zip"
 
+# The SafeExecCache configured by settings.SAFE_EXEC_CACHE, once created.
+_SAFE_EXEC_CACHE = {}
+
 
 def can_execute_unsafe_code(course_id):
     """
@@ -38,3 +44,19 @@ def get_python_lib_zip(contentstore, course_id):
         return zip_lib.data
     else:
         return None
+
+
+def get_safe_exec_cache():
+    """
+    Return the cache of the results of executing code in the sandbox, as
+    configured by settings.SAFE_EXEC_CACHE.
+    """
+    if 'cache' not in _SAFE_EXEC_CACHE:
+        config = getattr(settings, 'SAFE_EXEC_CACHE', {})
+        local_path = config.get('local_path')
+        shared_cache = config.get('shared_cache', 'default')
+        _SAFE_EXEC_CACHE['cache'] = SafeExecCache(
+            local_cache=SqliteResultCache(local_path, config.get('local_max_entries', 100000)) if local_path else None,
+            shared_cache=caches[shared_cache] if shared_cache else None,
+        )
+    return _SAFE_EXEC_CACHE['cache']
@@ -2,8 +2,16 @@
 Tests for sandboxing.py in util app
 """
 
+import os.path
+import shutil
+from tempfile import mkdtemp
+
 from django.test import TestCase
+from mock import patch
 from opaque_keys.edx.locator import LibraryLocator
+
+from capa.safe_exec.result_cache import SqliteResultCache
+from util import sandboxing
 from util.sandboxing import can_execute_unsafe_code
 from django.test.utils import override_settings
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
@@ -37,3 +45,30 @@ class SandboxingTest(TestCase):
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2012_Fall')))
         self.assertFalse(can_execute_unsafe_code(SlashSeparatedCourseKey('edX', 'full', '2013_Spring')))
         self.assertFalse(can_execute_unsafe_code(LibraryLocator('edX', 'test_bank')))
+
+
+class SafeExecCacheTest(TestCase):
+    """
+    Test the configuration of the safe_exec cache
+    """
+    def setUp(self):
+        super(SafeExecCacheTest, self).setUp()
+        patcher = patch.dict(sandboxing._SAFE_EXEC_CACHE, clear=True)  # pylint: disable=protected-access
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_default(self):
+        cache = sandboxing.get_safe_exec_cache()
+        self.assertIsNone(cache.local_cache)
+        self.assertIsNotNone(cache.shared_cache)
+        self.assertIs(sandboxing.get_safe_exec_cache(), cache)
+
+    def test_local_only(self):
+        directory = mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'safe_exec.db')
+        with override_settings(SAFE_EXEC_CACHE={'local_path': path, 'local_max_entries': 10, 'shared_cache': None}):
+            cache = sandboxing.get_safe_exec_cache()
+        self.assertIsInstance(cache.local_cache, SqliteResultCache)
+        self.assertEqual(cache.local_cache.path, path)
+        self.assertIsNone(cache.shared_cache)
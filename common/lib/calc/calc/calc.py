@@ -10,6 +10,7 @@ import numbers
 import numpy
 import scipy.constants
 import functions
+from lru_cache import LRUCache
 
 from pyparsing import (
     Word, Literal, CaselessLiteral, ZeroOrMore, MatchFirst, Optional, Forward,
@@ -72,6 +73,9 @@ SUFFIXES = {
     'c': 1e-2, 'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12
 }
 
+# Maximum number of parsed expressions to keep, keyed by their text.
+PARSE_CACHE_SIZE = 1024
+
 
 class UndefinedVariable(Exception):
     """
@@ -258,6 +262,248 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     return math_interpreter.reduce_tree(evaluate_actions)
 
 
+# Functions of the default function table which apply elementwise to arrays.
+# Any other function is called once per element of its argument.
+VECTORIZED_FUNCTIONS = frozenset([
+    functions.sec, functions.csc, functions.cot,
+    functions.arcsec, functions.arccsc,
+    functions.sech, functions.csch, functions.coth,
+    functions.arcsech, functions.arccsch, functions.arccoth,
+])
+
+
+def is_operator(token, operators):
+    """
+    Return whether the token is one of the given operator strings.
+
+    Needed because comparing a NumPy array to a string is elementwise.
+    """
+    return isinstance(token, basestring) and token in operators
+
+
+def vector_apply(function, arg):
+    """
+    Apply a unary function to an array of arguments.
+    """
+    if isinstance(function, numpy.ufunc) or function in VECTORIZED_FUNCTIONS or numpy.ndim(arg) == 0:
+        return function(arg)
+    return numpy.array([function(value) for value in arg])
+
+
+def vector_power(parse_result):
+    """
+    Like `eval_power`, over arrays.
+    """
+    parse_result = reversed([k for k in parse_result if not is_operator(k, ('^',))])
+    return reduce(lambda a, b: numpy.power(b, a), parse_result)
+
+
+def vector_parallel(parse_result):
+    """
+    Like `eval_parallel`, over arrays.
+
+    The result is NaN for the samples with a zero among the inputs.
+    """
+    if len(parse_result) == 1:
+        return parse_result[0]
+    inputs = [e for e in parse_result if not is_operator(e, ('||',))]
+    has_zero = reduce(numpy.logical_or, [numpy.equal(e, 0) for e in inputs])
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        result = numpy.true_divide(1., sum(numpy.true_divide(1., e) for e in inputs))
+    return numpy.where(has_zero, float('nan'), result)
+
+
+def vector_sum(parse_result):
+    """
+    Like `eval_sum`, over arrays.
+    """
+    total = 0.0
+    current_op = operator.add
+    for token in parse_result:
+        if is_operator(token, ('+',)):
+            current_op = operator.add
+        elif is_operator(token, ('-',)):
+            current_op = operator.sub
+        else:
+            total = current_op(total, token)
+    return total
+
+
+def vector_product(parse_result):
+    """
+    Like `eval_product`, over arrays.
+    """
+    prod = 1.0
+    current_op = operator.mul
+    for token in parse_result:
+        if is_operator(token, ('*',)):
+            current_op = operator.mul
+        elif is_operator(token, ('/',)):
+            current_op = operator.truediv
+        else:
+            prod = current_op(prod, token)
+    return prod
+
+
+def vectorized_evaluator(variables, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression for many samples of its variables at once.
+
+    -Variables are passed as a dictionary from string to value. Their values
+     may be NumPy arrays of the same length, one element per sample, real or
+     complex.
+    -Unary functions are passed as a dictionary from string to function.
+
+    Return an array of the results of each sample, or a single number if the
+    expression doesn't depend on any of the arrays.
+
+    Unlike `evaluator`, division by zero, overflow and invalid operations on
+    the arrays don't raise, but give infinite or NaN results for the samples
+    concerned (with NumPy's usual warnings, unless suppressed with
+    `numpy.errstate`).
+    The results of other samples are the same as `evaluator`'s, up to
+    floating point rounding.
+    """
+    # No need to go further.
+    if math_expr.strip() == "":
+        return float('nan')
+
+    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+    math_interpreter.parse_algebra()
+
+    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+    math_interpreter.check_variables(all_variables, all_functions)
+
+    if case_sensitive:
+        casify = lambda x: x
+    else:
+        casify = lambda x: x.lower()  # Lowercase for case insens.
+
+    evaluate_actions = {
+        'number': eval_number,
+        'variable': lambda x: all_variables[casify(x[0])],
+        'function': lambda x: vector_apply(all_functions[casify(x[0])], x[1]),
+        'atom': lambda x: next(k for k in x if not is_operator(k, ('(', ')'))),
+        'power': vector_power,
+        'parallel': vector_parallel,
+        'product': vector_product,
+        'sum': vector_sum
+    }
+
+    return math_interpreter.reduce_tree(evaluate_actions)
+
+
+def build_grammar():
+    """
+    Build the pyparsing grammar of algebraic expressions.
+
+    Parsing a string with it results in a `pyparsing.ParseResult` with proper
+    groupings to reflect parenthesis and order of operations. All operators
+    are left in the tree and no strings of numbers are parsed into their float
+    versions.
+    """
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with letters/underscores
+    # and may contain numbers afterward.
+    inner_varname = Word(alphas + "_", alphanums + "_")
+    varname = Group(inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=pointless-statement
+    return expr + stringEnd
+
+
+class ParseCache(LRUCache):
+    """
+    A thread-safe, least-recently-used cache of parsed expressions.
+
+    The grammar is built once, on first use, and shared by all parses. Parse
+    trees are never modified once built, so they are shared by all the
+    `ParseAugmenter`s of the same expression.
+    """
+    def __init__(self, max_size):
+        super(ParseCache, self).__init__(max_size)
+        self._grammar = None
+
+    def parse(self, math_expr):
+        """
+        Return a tuple of the parse tree of `math_expr` and the frozensets of
+        the names of the variables and of the functions used in it.
+
+        Raise a `pyparsing.ParseException` if it can't be parsed.
+        """
+        entry = self.get(math_expr)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            if self._grammar is None:
+                self._grammar = build_grammar()
+            grammar = self._grammar
+
+        tree = grammar.parseString(math_expr)[0]
+        entry = (tree, frozenset(find_names(tree, 'variable')), frozenset(find_names(tree, 'function')))
+        self.set(math_expr, entry)
+        return entry
+
+
+PARSE_CACHE = ParseCache(PARSE_CACHE_SIZE)
+
+
+def find_names(tree, node_name):
+    """
+    Yield the names of the variables or functions (depending on `node_name`)
+    used in the parse tree.
+    """
+    if not isinstance(tree, ParseResults):
+        return
+    if tree.getName() == node_name:
+        yield tree[0]
+    for node in tree:
+        for name in find_names(node, node_name):
+            yield name
+
+
 class ParseAugmenter(object):
     """
     Holds the data for a particular parse.
@@ -278,23 +524,6 @@ class ParseAugmenter(object):
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
-
     def parse_algebra(self):
         """
         Parse an algebraic expression into a tree.
@@ -303,61 +532,16 @@ class ParseAugmenter(object):
         reflect parenthesis and order of operations. Leave all operators in the
         tree and do not parse any strings of numbers into their float versions.
 
+        The tree is shared with any other parse of the same expression, and
+        must not be modified.
+
         Adding the groups and result names makes the `repr()` of the result
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
-        )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with letters/underscores
-        # and may contain numbers afterward.
-        inner_varname = Word(alphas + "_", alphanums + "_")
-        varname = Group(inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
-
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
-
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
-
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
-
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        self.tree, variables_used, functions_used = PARSE_CACHE.parse(self.math_expr)
+        self.variables_used = set(variables_used)
+        self.functions_used = set(functions_used)
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
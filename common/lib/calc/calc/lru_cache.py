@@ -0,0 +1,106 @@
+"""
+A thread-safe, least-recently-used cache, for the process-local caches of
+the platform.  It lives in calc since calc is installed everywhere the
+platform's code runs, including the sandbox.
+"""
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache(object):
+    """
+    A thread-safe, least-recently-used cache.  Cached values are shared by
+    all callers, so they must not be modified once cached.
+
+    The cache is bounded by the total size of its entries, as given by its
+    callers in the units of max_size.  Entries have a size of 1 by default,
+    in which case max_size bounds the number of entries.
+
+    An entry may be cached for a version of its key's data, in which case it
+    is only returned for that version.
+    """
+    def __init__(self, max_size):
+        """
+        Arguments:
+            max_size (int): The maximum total size of the entries in the
+                cache.  A max_size of 0 disables the cache.
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        # Map of key to (size, version, value), in order of least to most
+        # recently used.
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, version=None):
+        """
+        Return the value cached for the given key and version, or None if
+        it isn't cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] != version:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Re-insert the entry to mark it as the most recently used.
+            del self._entries[key]
+            self._entries[key] = entry
+            return entry[2]
+
+    def set(self, key, value, size=1, version=None):
+        """
+        Cache the given value for the given key and version, replacing any
+        value cached for the key, and evict the least recently used entries
+        as needed to stay within the cache's max_size.
+
+        Arguments:
+            key: The key of the entry.
+            value: The value to cache, which must not be modified once
+                cached.
+            size (int): The size of the entry, in the units of max_size.
+            version: The version of the key's data the value is for.
+        """
+        if size > self.max_size:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (size, version, value)
+            self.size += size
+            while self.size > self.max_size:
+                __, (evicted_size, __, __) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def delete(self, key):
+        """
+        Remove any value cached for the given key.
+        """
+        with self._lock:
+            self._remove(key)
+
+    def stats(self):
+        """
+        Return a dict of the cache's hit and miss counts, and its current
+        number of entries and total size.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'size': self.size,
+                'max_size': self.max_size,
+            }
+
+    def _remove(self, key):
+        """
+        Remove the entry for the given key, if any.  Must be called while
+        holding the lock.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[0]
@@ -559,3 +559,119 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class ParseCacheTest(unittest.TestCase):
+    """
+    Run tests for calc.ParseCache
+    """
+
+    def test_shared_parse(self):
+        """
+        Parses of the same expression share the same tree and names
+        """
+        parse_cache = calc.ParseCache(max_size=2)
+        tree, variables, functions = parse_cache.parse('x + sin(y^2)')
+        self.assertEqual(variables, {'x', 'y'})
+        self.assertEqual(functions, {'sin'})
+        self.assertIs(parse_cache.parse('x + sin(y^2)')[0], tree)
+        self.assertEqual((parse_cache.hits, parse_cache.misses), (1, 1))
+
+    def test_eviction(self):
+        """
+        The least recently used expressions are parsed again
+        """
+        parse_cache = calc.ParseCache(max_size=2)
+        first_tree = parse_cache.parse('1')[0]
+        parse_cache.parse('2')
+        parse_cache.parse('1')
+        parse_cache.parse('3')
+        self.assertIs(parse_cache.parse('1')[0], first_tree)
+        parse_cache.parse('2')
+        self.assertEqual(parse_cache.misses, 4)
+
+    def test_parse_errors_not_cached(self):
+        """
+        Expressions which can't be parsed raise every time
+        """
+        parse_cache = calc.ParseCache(max_size=2)
+        for __ in range(2):
+            with self.assertRaises(ParseException):
+                parse_cache.parse('1 +')
+        self.assertEqual(parse_cache.misses, 2)
+
+    def test_evaluator_after_cached_parse(self):
+        """
+        Evaluations of a cached expression use their own variables
+        """
+        self.assertEqual(calc.evaluator({'x': 1.0}, {}, 'x * 2'), 2.0)
+        self.assertEqual(calc.evaluator({'x': 3.0}, {}, 'x * 2'), 6.0)
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'x'):
+            calc.evaluator({}, {}, 'x * 2')
+
+
+class VectorizedEvaluatorTest(unittest.TestCase):
+    """
+    Run tests for calc.vectorized_evaluator, comparing its results to those
+    of calc.evaluator for each sample
+    """
+    SAMPLES = [0.5, 1.0, 2.5, 3.0]
+
+    def assert_matches_evaluator(self, math_expr, samples=None, functions=None, case_sensitive=False):
+        """
+        Assert that evaluating `math_expr` over an array of samples of x
+        gives the same results as evaluating it for each sample
+        """
+        samples = self.SAMPLES if samples is None else samples
+        functions = functions or {}
+        results = calc.vectorized_evaluator(
+            {'x': numpy.array(samples), 'y': numpy.array(samples) * 2},
+            functions, math_expr, case_sensitive
+        ) + numpy.zeros(len(samples))
+        expected = [
+            calc.evaluator({'x': sample, 'y': sample * 2}, functions, math_expr, case_sensitive)
+            for sample in samples
+        ]
+        self.assertEqual(len(results), len(expected))
+        for result, expected_result in zip(results, expected):
+            self.assertAlmostEqual(result, expected_result)
+
+    def test_operators(self):
+        for math_expr in ('x + y', '-x - 2', 'x * y / 3', 'x^2^y', 'x^-3', '(x + 1) * (y - 1)', '2', '3k * x'):
+            self.assert_matches_evaluator(math_expr)
+
+    def test_functions(self):
+        for math_expr in ('sin(x) + cos(y)', 'sec(x) * arctan(y)', 'abs(x) + exp(-x)', 'arccot(x)', 'sinh(x)'):
+            self.assert_matches_evaluator(math_expr)
+        self.assert_matches_evaluator('fact(x) + factorial(y)', samples=[1.0, 2.0, 3.0])
+        self.assert_matches_evaluator('abs(x) * arccot(x)', samples=[-1.5, 2.0])
+
+    def test_custom_functions(self):
+        self.assert_matches_evaluator('f(x) * F(y)', functions={'f': lambda v: v + 1, 'F': lambda v: v * 3})
+        self.assert_matches_evaluator('f(x) * F(y)', functions={'f': lambda v: v + 1, 'F': lambda v: v * 3},
+                                      case_sensitive=True)
+
+    def test_complex(self):
+        self.assert_matches_evaluator('x * i + y^(1/2) * j')
+        results = calc.vectorized_evaluator({'z': numpy.array([1 + 2j, 3j])}, {}, 'z^2 + 1')
+        self.assertTrue(numpy.allclose(results, [(1 + 2j) ** 2 + 1, (3j) ** 2 + 1]))
+
+    def test_parallel(self):
+        self.assert_matches_evaluator('x || y || 4')
+        results = calc.vectorized_evaluator({'x': numpy.array([1.0, 0.0])}, {}, 'x || 1')
+        self.assertEqual(results[0], 0.5)
+        self.assertTrue(numpy.isnan(results[1]))
+
+    def test_errors_per_sample(self):
+        """
+        Samples which can't be evaluated give non-finite results, rather than raising
+        """
+        results = calc.vectorized_evaluator({'x': numpy.array([2.0, 0.0, -1.0])}, {}, '1/x + x^0.5')
+        self.assertEqual(results[0], 0.5 + 2 ** 0.5)
+        self.assertTrue(numpy.isinf(results[1]))
+        self.assertTrue(numpy.isnan(results[2]))
+
+    def test_empty_and_undefined(self):
+        self.assertTrue(numpy.isnan(calc.vectorized_evaluator({}, {}, ' ')))
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.vectorized_evaluator({'x': numpy.array(self.SAMPLES)}, {}, 'x + z')
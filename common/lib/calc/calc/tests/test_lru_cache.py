@@ -0,0 +1,77 @@
+"""
+Unit tests for lru_cache.py
+"""
+
+import unittest
+from calc.lru_cache import LRUCache
+
+
+class LRUCacheTest(unittest.TestCase):
+    """
+    Run tests for LRUCache
+    """
+    def assert_stats(self, cache, **expected_stats):
+        """
+        Assert the given values of the cache's stats.
+        """
+        stats = cache.stats()
+        self.assertEqual({name: stats[name] for name in expected_stats}, expected_stats)
+
+    def test_get(self):
+        cache = LRUCache(max_size=2)
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 'value')
+        self.assertEqual(cache.get('a'), 'value')
+        self.assert_stats(cache, hits=1, misses=1, entries=1, size=1)
+
+    def test_eviction_by_count(self):
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        # use a so that b is evicted first
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_eviction_by_size(self):
+        cache = LRUCache(max_size=10)
+        cache.set('a', 1, size=6)
+        cache.set('b', 2, size=3)
+        cache.set('a', 3, size=4)
+        self.assert_stats(cache, entries=2, size=7)
+        cache.set('c', 4, size=5)
+        self.assertIsNone(cache.get('b'))
+        self.assert_stats(cache, entries=2, size=9)
+
+    def test_versions(self):
+        cache = LRUCache(max_size=10)
+        cache.set('a', 'value', version='v1')
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNone(cache.get('a', 'v2'))
+        self.assertEqual(cache.get('a', 'v1'), 'value')
+        cache.set('a', 'new value', version='v2')
+        self.assertEqual(cache.get('a', 'v2'), 'new value')
+        self.assert_stats(cache, hits=2, misses=2, entries=1)
+
+    def test_too_large(self):
+        cache = LRUCache(max_size=10)
+        cache.set('a', 'value', size=11)
+        self.assertIsNone(cache.get('a'))
+        self.assert_stats(cache, entries=0, size=0)
+
+    def test_disabled(self):
+        cache = LRUCache(max_size=0)
+        cache.set('a', 'value')
+        self.assertIsNone(cache.get('a'))
+
+    def test_delete(self):
+        cache = LRUCache(max_size=10)
+        cache.set('a', 'value', size=4)
+        cache.delete('a')
+        cache.delete('b')
+        self.assertIsNone(cache.get('a'))
+        self.assert_stats(cache, entries=0, size=0)
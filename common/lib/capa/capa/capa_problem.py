@@ -15,10 +15,12 @@ This is used by capa_module.
 
 from copy import deepcopy
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
 
+from calc.lru_cache import LRUCache
 from lxml import etree
 from pytz import UTC
 from xml.sax.saxutils import unescape
@@ -56,8 +58,65 @@ html_problem_semantics = [
     "openendedrubric",
 ]
 
+# Maximum number of problem templates to keep in the process-wide cache.
+PROBLEM_TEMPLATE_CACHE_SIZE = 1000
+
 log = logging.getLogger(__name__)
 
+
+class ProblemTemplateCache(LRUCache):
+    """
+    A thread-safe, least-recently-used cache of problem templates: the
+    parsed XML tree of a problem, and the context of its script code, as
+    they are before the tree is preprocessed for a LoncapaProblem.
+
+    Templates are keyed by the problem's id, the digest of its text, its
+    seed, the digest of the course's python_lib.zip, and, if its text refers
+    to it, the anonymous student id, which are the inputs the script code
+    can depend on.  The python_lib.zip itself isn't cached in the context.
+
+    LoncapaProblems modify their tree and context, so each gets its own
+    deep copies of the cached (tree, context) template.
+    """
+    def __init__(self, max_size):
+        super(ProblemTemplateCache, self).__init__(max_size)
+        # Number of hits for templates with script code, each of which
+        # avoided running the code in the sandbox.
+        self.sandbox_calls_avoided = 0
+
+    def get(self, key, version=None):
+        """
+        Return copies of the (tree, context) cached for the key, or None if
+        not found.
+        """
+        template = super(ProblemTemplateCache, self).get(key, version)
+        if template is None:
+            return None
+        if template[1]['script_code']:
+            with self._lock:
+                self.sandbox_calls_avoided += 1
+        return deepcopy(template)
+
+    def set(self, key, value, size=1, version=None):
+        """
+        Cache copies of the (tree, context) template for the key.
+        """
+        if size <= self.max_size:
+            super(ProblemTemplateCache, self).set(key, deepcopy(value), size, version)
+
+    def stats(self):
+        """
+        Return a dict of the cache's counters, current number of entries and
+        total size.
+        """
+        stats = super(ProblemTemplateCache, self).stats()
+        with self._lock:
+            stats['sandbox_calls_avoided'] = self.sandbox_calls_avoided
+        return stats
+
+
+PROBLEM_TEMPLATE_CACHE = ProblemTemplateCache(PROBLEM_TEMPLATE_CACHE_SIZE)
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -161,16 +220,27 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
+        template_key = self._get_template_key()
+        template = PROBLEM_TEMPLATE_CACHE.get(template_key) if template_key else None
+        if template is not None:
+            self.tree, self.context = template
+            self.context['anonymous_student_id'] = self.capa_system.anonymous_student_id
+            if self.context['script_code']:
+                self.context['extra_files'] = self._get_extra_files() or None
+        else:
+            # parse problem XML file into an element tree
+            self.tree = etree.XML(problem_text)
+
+            self.make_xml_compatible(self.tree)
 
-        self.make_xml_compatible(self.tree)
+            # handle any <include file="foo"> tags
+            self._process_includes()
 
-        # handle any <include file="foo"> tags
-        self._process_includes()
+            # construct script processor context (eg for customresponse problems)
+            self.context = self._extract_context(self.tree)
 
-        # construct script processor context (eg for customresponse problems)
-        self.context = self._extract_context(self.tree)
+            if template_key:
+                PROBLEM_TEMPLATE_CACHE.set(template_key, (self.tree, dict(self.context, extra_files=None)))
 
         # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
         # transformations.  This also creates the dict (self.responders) of Response
@@ -576,6 +646,46 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
+    def _get_template_key(self):
+        """
+        Return the key of the problem's template in PROBLEM_TEMPLATE_CACHE,
+        or None if its template can't be cached.
+
+        Problems with <include> tags aren't cached, since the included files
+        may change without the problem's text changing.
+        """
+        if '<include' in self.problem_text:
+            return None
+        text = self.problem_text
+        if isinstance(text, unicode):
+            text = text.encode('utf-8')
+        # Script code can import the course's python_lib.zip.
+        zip_lib = self._get_python_lib_zip() if '<script' in self.problem_text else None
+        zip_digest = hashlib.md5(zip_lib).hexdigest() if zip_lib is not None else None
+        key = (self.problem_id, hashlib.md5(text).hexdigest(), self.seed, zip_digest)
+        if 'anonymous_student_id' in self.problem_text:
+            key += (self.capa_system.anonymous_student_id,)
+        return key
+
+    def _get_extra_files(self):
+        """
+        Return the (filename, contents) pairs of the files the problem's script
+        code runs with.  An asset named python_lib.zip can be imported by it.
+        """
+        zip_lib = self._get_python_lib_zip()
+        if zip_lib is None:
+            return []
+        return [("python_lib.zip", zip_lib)]
+
+    def _get_python_lib_zip(self):  # pylint: disable=attribute-defined-outside-init
+        """
+        Return the bytes of the course's python_lib.zip, or None if it has
+        none, loading them once per problem.
+        """
+        if not hasattr(self, '_python_lib_zip'):
+            self._python_lib_zip = self.capa_system.get_python_lib_zip()
+        return self._python_lib_zip
+
     def _process_includes(self):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
@@ -695,10 +805,8 @@ class LoncapaProblem(object):
 
         extra_files = []
         if all_code:
-            # An asset named python_lib.zip can be imported by Python code.
-            zip_lib = self.capa_system.get_python_lib_zip()
-            if zip_lib is not None:
-                extra_files.append(("python_lib.zip", zip_lib))
+            extra_files = self._get_extra_files()
+            if extra_files:
                 python_path.append("python_lib.zip")
 
             try:
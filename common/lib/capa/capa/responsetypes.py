@@ -37,7 +37,7 @@ from shapely.geometry import Point, MultiPoint
 import dogstats_wrapper as dog_stats_api
 
 # specific library imports
-from calc import evaluator, UndefinedVariable
+from calc import evaluator, vectorized_evaluator, UndefinedVariable
 from . import correctmap
 from .registry import TagRegistry
 from datetime import datetime
@@ -3200,6 +3200,10 @@ class FormulaResponse(LoncapaResponse):
         """
         _ = self.capa_system.i18n.ugettext
 
+        out = self.evaluate_samples(answer, var_dict_list)
+        if out is not None:
+            return out
+
         out = []
         for var_dict in var_dict_list:
             try:
@@ -3251,6 +3255,37 @@ class FormulaResponse(LoncapaResponse):
                 )
         return out
 
+    def evaluate_samples(self, answer, var_dict_list):
+        """
+        Evaluates the answer for all the test cases at once, over arrays of
+        the values of each variable.
+
+        Returns the list of results, or None if any test case fails to
+        evaluate to a finite number, in which case the test cases must be
+        evaluated one by one, to report the error as tupleize_answers does.
+        """
+        if not var_dict_list or any(set(var_dict) != set(var_dict_list[0]) for var_dict in var_dict_list):
+            return None
+        variables = {
+            name: numpy.array([var_dict[name] for var_dict in var_dict_list])
+            for name in var_dict_list[0]
+        }
+        try:
+            with numpy.errstate(all='ignore'):
+                results = vectorized_evaluator(
+                    variables,
+                    dict(),
+                    answer,
+                    case_sensitive=self.case_sensitive,
+                ) + numpy.zeros(len(var_dict_list))
+            if not numpy.all(numpy.isfinite(results)):
+                return None
+        except Exception:  # pylint: disable=broad-except
+            return None
+        if numpy.iscomplexobj(results):
+            return [complex(result) for result in results]
+        return [float(result) for result in results]
+
     def randomize_variables(self, samples):
         """
         Returns a list of dictionaries mapping variables to random values in range,
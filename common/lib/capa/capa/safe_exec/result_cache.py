@@ -0,0 +1,223 @@
+"""
+Caches of safe_exec results, for use as the `cache` of `safe_exec`.
+
+The results of executing code are stored in a local, size-bounded SQLite
+database, so that they survive restarts and are shared by all the processes
+of a server, and optionally in a shared cache, such as a Django cache, so
+that they are shared by all the servers.
+"""
+from collections import OrderedDict
+import cPickle as pickle
+import logging
+import os.path
+import sqlite3
+import threading
+import time
+
+from dogapi import dog_stats_api
+
+log = logging.getLogger(__name__)
+
+SAFE_EXEC_CACHE_METRIC_NAME = 'capa.safe_exec.cache'
+
+
+class SqliteResultCache(object):
+    """
+    A cache of safe_exec results in a local SQLite database, which may be
+    used concurrently by several processes.
+
+    The least recently used results are evicted to keep at most
+    `max_entries` results.  Uses are ordered by a counter, rather than by
+    time, so that the order doesn't depend on the processes' clocks.  Hits
+    are recorded in batches, so that reading results doesn't take the
+    database's write lock every time.
+    """
+    # How long to wait for other processes to release their lock on the
+    # database, in seconds.
+    TIMEOUT = 5
+
+    # How many hits, or after how many seconds, to record them.
+    ACCESS_BATCH_SIZE = 100
+    ACCESS_BATCH_INTERVAL = 60
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        # The keys hit since hits were last recorded, least recent first.
+        self._accessed = OrderedDict()
+        self._accessed_lock = threading.Lock()
+        self._last_recorded = time.time()
+
+    def _connection(self):
+        """
+        Return this thread's connection to the database, creating the
+        database if needed.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            connection = sqlite3.connect(self.path, timeout=self.TIMEOUT, isolation_level=None)
+            connection.text_factory = str
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS results '
+                '(key TEXT PRIMARY KEY, value BLOB NOT NULL, accessed INTEGER NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        """
+        Return the result cached for the key, or None if not found.
+        """
+        connection = self._connection()
+        row = connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        with self._accessed_lock:
+            self._accessed.pop(key, None)
+            self._accessed[key] = True
+            record = (
+                len(self._accessed) >= self.ACCESS_BATCH_SIZE or
+                time.time() - self._last_recorded >= self.ACCESS_BATCH_INTERVAL
+            )
+        if record:
+            self._record_accesses()
+        return pickle.loads(str(row[0]))
+
+    def set(self, key, value):
+        """
+        Cache the result for the key, evicting the least recently used
+        results if there are more than max_entries.
+        """
+        connection = self._connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO results (key, value, accessed) '
+            'VALUES (?, ?, (SELECT COALESCE(MAX(accessed), 0) + 1 FROM results))',
+            (key, sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+        )
+        excess = connection.execute('SELECT COUNT(*) FROM results').fetchone()[0] - self.max_entries
+        if excess > 0:
+            # Don't evict results that were hit since hits were last recorded.
+            self._record_accesses()
+            connection.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)',
+                (excess,)
+            )
+
+    def _record_accesses(self):
+        """
+        Mark the results hit since hits were last recorded as the most
+        recently used, in the order they were hit.
+        """
+        with self._accessed_lock:
+            keys = self._accessed.keys()
+            self._accessed.clear()
+            self._last_recorded = time.time()
+        if not keys:
+            return
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            last_accessed = connection.execute('SELECT COALESCE(MAX(accessed), 0) FROM results').fetchone()[0]
+            connection.executemany(
+                'UPDATE results SET accessed = ? WHERE key = ?',
+                [(last_accessed + index, key) for index, key in enumerate(keys, 1)]
+            )
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def count(self):
+        """
+        Return the number of cached results.
+        """
+        return self._connection().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+
+class SafeExecCache(object):
+    """
+    A two-tier cache of safe_exec results: a local cache, usually a
+    `SqliteResultCache`, in front of a shared cache.  Either tier may be
+    None.  Both tiers are objects with .get(key) and .set(key, value)
+    methods.
+
+    Errors of either tier are logged and treated as misses, so that a
+    failing cache doesn't prevent executing code.  Hits and misses are
+    counted, and reported to Datadog.
+    """
+    def __init__(self, local_cache=None, shared_cache=None):
+        self.local_cache = local_cache
+        self.shared_cache = shared_cache
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Return the result cached for the key in either tier, or None if not
+        found.  Results found in the shared tier are also cached in the
+        local tier.
+        """
+        value = self._call(self.local_cache, 'get', key)
+        if value is not None:
+            self._count('local_hit')
+            return value
+
+        value = self._call(self.shared_cache, 'get', key)
+        if value is not None:
+            self._count('shared_hit')
+            self._call(self.local_cache, 'set', key, value)
+            return value
+
+        self._count('miss')
+        return None
+
+    def set(self, key, value):
+        """
+        Cache the result for the key in both tiers.
+        """
+        self._call(self.local_cache, 'set', key, value)
+        self._call(self.shared_cache, 'set', key, value)
+
+    def stats(self):
+        """
+        Return a dict of the numbers of hits in each tier and of misses, and
+        the hit rate.
+        """
+        lookups = self.local_hits + self.shared_hits + self.misses
+        return {
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_rate': float(self.local_hits + self.shared_hits) / lookups if lookups else 0.0,
+        }
+
+    def _count(self, result):
+        """
+        Count a lookup with the given result.
+        """
+        if result == 'local_hit':
+            self.local_hits += 1
+        elif result == 'shared_hit':
+            self.shared_hits += 1
+        else:
+            self.misses += 1
+        dog_stats_api.increment(SAFE_EXEC_CACHE_METRIC_NAME, tags=[u'result:{}'.format(result)])
+
+    @staticmethod
+    def _call(cache, method, *args):
+        """
+        Call the method of the cache tier, if any, returning None if it fails.
+        """
+        if cache is None:
+            return None
+        try:
+            return getattr(cache, method)(*args)
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Error in safe_exec cache %r', cache)
+            return None
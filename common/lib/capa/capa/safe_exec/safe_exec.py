@@ -70,6 +70,20 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+def _named_globals(code, globals_dict):
+    """
+    Return the globals whose names appear in the code.
+    """
+    return {name: value for name, value in globals_dict.iteritems() if name in code}
+
+
+def _unnamed_globals(code, globals_dict):
+    """
+    Return the names of the globals which don't appear in the code.
+    """
+    return set(name for name in globals_dict if name not in code)
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -99,7 +113,12 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    the random seed, the python path and the contents of the extra files.  Globals
+    whose names don't appear in the code can't affect its execution, so they're
+    left out of the key, which lets
+    executions that only differ in e.g. the anonymous student id share their
+    cached result.  For the same reason, such globals given to the code are
+    left out of the cached result, so that they keep their values on a hit.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -109,10 +128,14 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
+        unnamed_inputs = _unnamed_globals(code, globals_dict)
+        safe_globals = _named_globals(code, json_safe(globals_dict))
         md5er = hashlib.md5()
         md5er.update(repr(code))
         update_hash(md5er, safe_globals)
+        # The code may import the extra files, such as a course's python_lib.zip.
+        update_hash(md5er, python_path)
+        update_hash(md5er, [(filename, hashlib.md5(contents).hexdigest()) for filename, contents in extra_files or ()])
         key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
         cached = cache.get(key)
         if cached is not None:
@@ -147,7 +170,11 @@ def safe_exec(
     # Put the result back in the cache.  This is complicated by the fact that
     # the globals dict might not be entirely serializable.
     if cache:
-        cleaned_results = json_safe(globals_dict)
+        # Globals the code defines are kept even if their names don't appear
+        # in it, e.g. when defined by `from lib import *`.
+        cleaned_results = {
+            name: value for name, value in json_safe(globals_dict).iteritems() if name not in unnamed_inputs
+        }
         cache.set(key, (emsg, cleaned_results))
 
     # If an exception happened, raise it now.
@@ -0,0 +1,122 @@
+"""Test result_cache.py"""
+
+import os.path
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from mock import Mock, patch
+
+from capa.safe_exec.result_cache import SafeExecCache, SqliteResultCache
+
+
+class TestSqliteResultCache(unittest.TestCase):
+    """Test the local SQLite cache of safe_exec results."""
+
+    def setUp(self):
+        super(TestSqliteResultCache, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'cache', 'safe_exec.db')
+        self.cache = SqliteResultCache(self.path, max_entries=2)
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.set('key', (None, {'a': 17}))
+        self.assertEqual(self.cache.get('key'), (None, {'a': 17}))
+
+    def test_persistent(self):
+        self.cache.set('key', ("Error!", {}))
+        self.assertEqual(SqliteResultCache(self.path, max_entries=2).get('key'), ("Error!", {}))
+
+    def test_eviction(self):
+        self.cache.set('key1', (None, {'a': 1}))
+        self.cache.set('key2', (None, {'a': 2}))
+        # Use key1 so that key2 is the least recently used.
+        self.cache.get('key1')
+        self.cache.set('key3', (None, {'a': 3}))
+
+        self.assertEqual(self.cache.count(), 2)
+        self.assertIsNotNone(self.cache.get('key1'))
+        self.assertIsNone(self.cache.get('key2'))
+        self.assertIsNotNone(self.cache.get('key3'))
+
+    def test_hits_recorded_in_batches(self):
+        self.cache.ACCESS_BATCH_SIZE = 2
+        self.cache.set('key1', (None, {'a': 1}))
+        self.cache.set('key2', (None, {'a': 2}))
+
+        def accessed():
+            """Return the keys of the results as recorded, least recently used first."""
+            rows = sqlite3.connect(self.path).execute('SELECT key FROM results ORDER BY accessed')
+            return [row[0] for row in rows]
+
+        self.cache.get('key1')
+        self.assertEqual(accessed(), ['key1', 'key2'])
+        self.cache.get('key1')
+        self.cache.get('key2')
+        self.assertEqual(accessed(), ['key1', 'key2'])
+        self.cache.get('key2')
+        self.cache.get('key1')
+        self.assertEqual(accessed(), ['key2', 'key1'])
+
+    def test_hits_recorded_after_interval(self):
+        self.cache.set('key1', (None, {'a': 1}))
+        self.cache.set('key2', (None, {'a': 2}))
+        with patch('capa.safe_exec.result_cache.time.time', return_value=time.time() + 3600):
+            self.cache.get('key1')
+        rows = sqlite3.connect(self.path).execute('SELECT key FROM results ORDER BY accessed')
+        self.assertEqual([row[0] for row in rows], ['key2', 'key1'])
+
+
+class TestSafeExecCache(unittest.TestCase):
+    """Test the two-tier cache of safe_exec results."""
+
+    def setUp(self):
+        super(TestSafeExecCache, self).setUp()
+        self.local_cache = DictCache()
+        self.shared_cache = DictCache()
+        self.cache = SafeExecCache(self.local_cache, self.shared_cache)
+
+    def test_tiers(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.set('key', (None, {'a': 17}))
+        self.assertEqual(self.shared_cache.get('key'), (None, {'a': 17}))
+        self.assertEqual(self.cache.get('key'), (None, {'a': 17}))
+
+        # Results found in the shared tier are cached in the local tier.
+        self.shared_cache.set('other', (None, {'a': 3}))
+        self.assertEqual(self.cache.get('other'), (None, {'a': 3}))
+        self.assertEqual(self.local_cache.get('other'), (None, {'a': 3}))
+
+        self.assertEqual(
+            self.cache.stats(),
+            {'local_hits': 1, 'shared_hits': 1, 'misses': 1, 'hit_rate': 2.0 / 3}
+        )
+
+    def test_without_shared_tier(self):
+        cache = SafeExecCache(local_cache=self.local_cache)
+        cache.set('key', (None, {}))
+        self.assertEqual(cache.get('key'), (None, {}))
+
+    def test_cache_errors(self):
+        failing_cache = Mock(**{'get.side_effect': IOError, 'set.side_effect': IOError})
+        cache = SafeExecCache(failing_cache, self.shared_cache)
+        cache.set('key', (None, {}))
+        self.assertEqual(cache.get('key'), (None, {}))
+        self.assertIsNone(cache.get('other'))
+
+
+class DictCache(object):
+    """A cache implementation over a simple dict, for testing."""
+
+    def __init__(self):
+        self.cache = {}
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache[key] = value
@@ -166,6 +166,47 @@ class TestSafeExecCaching(unittest.TestCase):
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_cache_ignores_unnamed_globals(self):
+        # Globals that the code doesn't name don't affect its cached result.
+        cache = {}
+        g = {'anonymous_student_id': 'student1', 'seed': 1}
+        safe_exec("a = seed * 2", g, cache=DictCache(cache))
+        self.assertEqual(cache.values()[0], (None, {'a': 2, 'seed': 1}))
+
+        cache[cache.keys()[0]] = (None, {'a': 17, 'seed': 1})
+        g = {'anonymous_student_id': 'student2', 'seed': 1}
+        safe_exec("a = seed * 2", g, cache=DictCache(cache))
+        self.assertEqual(g, {'a': 17, 'anonymous_student_id': 'student2', 'seed': 1})
+
+        # A different value of a named global is a cache miss.
+        g = {'anonymous_student_id': 'student2', 'seed': 2}
+        safe_exec("a = seed * 2", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], 4)
+        self.assertEqual(len(cache), 2)
+
+    def test_cache_keeps_unnamed_results(self):
+        # Globals the code defines without naming them are cached, so that
+        # hits and misses give the same results.
+        cache = {}
+        g = {'anonymous_student_id': 'student1'}
+        safe_exec("globals().update({'b' + 'ee': 5})", g, cache=DictCache(cache))
+        self.assertEqual(g['bee'], 5)
+        self.assertEqual(cache.values()[0], (None, {'bee': 5}))
+
+        g = {'anonymous_student_id': 'student2'}
+        safe_exec("globals().update({'b' + 'ee': 5})", g, cache=DictCache(cache))
+        self.assertEqual(g, {'anonymous_student_id': 'student2', 'bee': 5})
+
+    def test_cache_keyed_by_extra_files(self):
+        # A new version of an extra file, such as a course's python_lib.zip,
+        # is a cache miss.
+        cache = {}
+        safe_exec("a = 1", {}, extra_files=[("lib.py", "v1")], cache=DictCache(cache))
+        safe_exec("a = 1", {}, extra_files=[("lib.py", "v1")], cache=DictCache(cache))
+        self.assertEqual(len(cache), 1)
+        safe_exec("a = 1", {}, extra_files=[("lib.py", "v2")], cache=DictCache(cache))
+        self.assertEqual(len(cache), 2)
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
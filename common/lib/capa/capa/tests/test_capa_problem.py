@@ -0,0 +1,133 @@
+"""
+Tests for the problem template cache of capa_problem.py
+"""
+from cStringIO import StringIO
+import textwrap
+import unittest
+import zipfile
+
+import mock
+from lxml import etree
+
+from capa import capa_problem
+from capa.capa_problem import ProblemTemplateCache
+from capa.tests import new_loncapa_problem, test_capa_system
+
+
+def make_python_lib_zip(helper_code=''):
+    """
+    Return the bytes of a python_lib.zip with a my_helper module.
+    """
+    zipstring = StringIO()
+    zipf = zipfile.ZipFile(zipstring, "w")
+    zipf.writestr("my_helper.py", helper_code)
+    zipf.close()
+    return zipstring.getvalue()
+
+
+class ProblemTemplateCacheTest(unittest.TestCase):
+    """
+    Test that LoncapaProblems share the parsed trees and script contexts of
+    the same problem, seed and student.
+    """
+    xml = textwrap.dedent("""
+        <problem>
+            <script type="loncapa/python">
+                answer = str(random.randint(0, 1000))
+            </script>
+            <stringresponse answer="$answer">
+                <textline size="20"/>
+            </stringresponse>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ProblemTemplateCacheTest, self).setUp()
+        self.template_cache = ProblemTemplateCache(max_size=10)
+        patcher = mock.patch.object(capa_problem, 'PROBLEM_TEMPLATE_CACHE', self.template_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def new_problem(self, xml=None, seed=723, anonymous_student_id='student', python_lib_zip=None):
+        """
+        Construct a LoncapaProblem, counting its calls to safe_exec.
+        """
+        capa_system = test_capa_system()
+        capa_system.anonymous_student_id = anonymous_student_id
+        capa_system.get_python_lib_zip = lambda: python_lib_zip
+        with mock.patch.object(capa_problem, 'safe_exec', wraps=capa_problem.safe_exec) as mock_safe_exec:
+            problem = new_loncapa_problem(xml or self.xml, capa_system=capa_system, seed=seed)
+        return problem, mock_safe_exec.call_count
+
+    def test_cached_template(self):
+        first_problem, first_calls = self.new_problem()
+        second_problem, second_calls = self.new_problem()
+        self.assertEqual((first_calls, second_calls), (1, 0))
+        self.assertEqual(second_problem.context['answer'], first_problem.context['answer'])
+        self.assertEqual(etree.tostring(second_problem.tree), etree.tostring(first_problem.tree))
+        self.assertEqual(
+            self.template_cache.stats(),
+            {'hits': 1, 'misses': 1, 'sandbox_calls_avoided': 1, 'entries': 1, 'size': 1, 'max_size': 10}
+        )
+
+    def test_copies_of_template(self):
+        first_problem, __ = self.new_problem()
+        second_problem, __ = self.new_problem()
+        self.assertIsNot(second_problem.tree, first_problem.tree)
+        first_problem.context['answer'] = 'changed'
+        third_problem, __ = self.new_problem()
+        self.assertNotEqual(third_problem.context['answer'], 'changed')
+
+    def test_seeds(self):
+        self.new_problem(seed=1)
+        __, calls = self.new_problem(seed=2)
+        self.assertEqual(calls, 1)
+
+    def test_students(self):
+        # The template is shared by students unless the problem refers to them.
+        self.new_problem(anonymous_student_id='student1')
+        problem, calls = self.new_problem(anonymous_student_id='student2')
+        self.assertEqual(calls, 0)
+        self.assertEqual(problem.context['anonymous_student_id'], 'student2')
+
+        xml = self.xml.replace('random.randint(0, 1000)', 'anonymous_student_id')
+        self.new_problem(xml, anonymous_student_id='student1')
+        problem, calls = self.new_problem(xml, anonymous_student_id='student2')
+        self.assertEqual(calls, 1)
+        self.assertEqual(problem.context['answer'], 'student2')
+
+    def test_python_lib_zip(self):
+        first_zip, second_zip = make_python_lib_zip(), make_python_lib_zip('# changed\n')
+        self.new_problem(python_lib_zip=first_zip)
+        problem, calls = self.new_problem(python_lib_zip=first_zip)
+        self.assertEqual(calls, 0)
+        self.assertEqual(problem.context['extra_files'], [("python_lib.zip", first_zip)])
+
+        # A new python_lib.zip gets a new template.
+        problem, calls = self.new_problem(python_lib_zip=second_zip)
+        self.assertEqual(calls, 1)
+        self.assertEqual(problem.context['extra_files'], [("python_lib.zip", second_zip)])
+
+    def test_includes_not_cached(self):
+        xml = textwrap.dedent("""
+            <problem>
+                <include file="included.xml"/>
+            </problem>
+        """)
+        with mock.patch.object(capa_problem.LoncapaProblem, '_process_includes') as mock_process_includes:
+            self.new_problem(xml)
+            self.new_problem(xml)
+        self.assertEqual(mock_process_includes.call_count, 2)
+        self.assertEqual(self.template_cache.stats()['entries'], 0)
+
+    def test_eviction(self):
+        template_cache = ProblemTemplateCache(max_size=1)
+        template_cache.set('key1', (etree.XML('<problem/>'), {'script_code': ''}))
+        template_cache.set('key2', (etree.XML('<problem/>'), {'script_code': ''}))
+        self.assertIsNone(template_cache.get('key1'))
+        self.assertIsNotNone(template_cache.get('key2'))
+
+    def test_disabled(self):
+        template_cache = ProblemTemplateCache(max_size=0)
+        template_cache.set('key', (etree.XML('<problem/>'), {'script_code': ''}))
+        self.assertIsNone(template_cache.get('key'))
@@ -577,6 +577,25 @@ class FormulaResponseTest(ResponseTest):
         input_dict = {'1_2_1': '1/0'}
         self.assertRaises(StudentInputError, problem.grade_answers, input_dict)
 
+        # The error is also raised when it only occurs for some samples.
+        input_dict = {'1_2_1': '1/(x-x)'}
+        self.assertRaises(StudentInputError, problem.grade_answers, input_dict)
+
+    def test_samples_evaluated_at_once(self):
+        """
+        Test that all the samples are evaluated together, without falling
+        back to evaluating them one by one.
+        """
+        sample_dict = {'x': (1, 2), 'y': (-3, -2)}
+        problem = self.build_problem(sample_dict=sample_dict,
+                                     num_samples=10,
+                                     tolerance="0.01%",
+                                     answer="x^2 * y + sin(x)")
+        with mock.patch('capa.responsetypes.evaluator') as mock_eval:
+            self.assert_grade(problem, "y * x^2 + sin(x)", "correct")
+            self.assert_grade(problem, "y * x^2 + cos(x)", "incorrect")
+        self.assertFalse(mock_eval.called)
+
     def test_validate_answer(self):
         """
         Makes sure that validate_answer works.
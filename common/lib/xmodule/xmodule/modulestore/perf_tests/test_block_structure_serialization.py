@@ -0,0 +1,118 @@
+"""
+Performance test for the size and load time of cached course block structures,
+in the original pickled format and in the compact format.
+"""
+# pylint: disable=protected-access
+import datetime
+import unittest
+
+import ddt
+#from nose.plugins.attrib import attr
+
+from nose.plugins.skip import SkipTest
+from opaque_keys.edx.locator import CourseLocator
+from pytz import UTC
+
+from openedx.core.lib.block_cache.block_structure import BlockStructureBlockData
+from openedx.core.lib.block_cache.block_structure_factory import BlockStructureFactory
+from openedx.core.lib.block_cache.tests.test_utils import MockCache, MockTransformer
+from openedx.core.lib.cache_utils import zpickle
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+# Number of verticals in the course, each with two problems.
+COURSE_SIZES = (100, 1000, 5000)
+
+# Number of times each cached block structure is loaded per test run.
+LOAD_COUNT = 20
+
+
+def build_block_structure(course_size):
+    """
+    Return a collected course block structure with the given number of verticals.
+    """
+    course_key = CourseLocator('org', 'course', 'run')
+    root_key = course_key.make_usage_key('course', 'course')
+    block_structure = BlockStructureBlockData(root_key)
+    block_structure._add_transformer(MockTransformer)
+    start = datetime.datetime(2015, 1, 1, tzinfo=UTC)
+
+    def add_block(block_key, parent_key):
+        """
+        Add the block with collected data similar to the course block transformers'.
+        """
+        if parent_key:
+            block_structure._add_relation(parent_key, block_key)
+        block_structure._block_data_map[block_key].xblock_fields.update({
+            'category': block_key.block_type,
+            'display_name': 'Block {}'.format(block_key.block_id),
+            'graded': False,
+            'format': None,
+        })
+        block_structure.set_transformer_block_field(block_key, MockTransformer, 'merged_start_date', start)
+        block_structure.set_transformer_block_field(block_key, MockTransformer, 'visible_to_staff_only', False)
+
+    add_block(root_key, None)
+    for index in range(course_size):
+        vertical_key = course_key.make_usage_key('vertical', 'vertical{}'.format(index))
+        add_block(vertical_key, root_key)
+        for problem_index in range(2):
+            add_block(course_key.make_usage_key('problem', 'problem{}_{}'.format(index, problem_index)), vertical_key)
+    return block_structure
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class BlockStructureSerializationTiming(unittest.TestCase):
+    """
+    This class exists to compare the size of the cached data and the latency of loading
+    course block structures cached in the original pickled format and in the compact format.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    test_run_time = datetime.datetime.now()
+
+    @ddt.data(*COURSE_SIZES)
+    def test_load_timings(self, course_size):
+        """
+        Generate the sizes and load timings of block structures of courses of different
+        sizes in both formats.
+        """
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        block_structure = build_block_structure(course_size)
+        root_key = block_structure.root_block_usage_key
+        cache_key = BlockStructureFactory._encode_root_cache_key(root_key)
+
+        original_cache = MockCache()
+        original_cache.set(cache_key, zpickle((
+            block_structure._block_relations,
+            block_structure._transformer_data,
+            block_structure._block_data_map,
+        )))
+        compact_cache = MockCache()
+        BlockStructureFactory.serialize_to_cache(block_structure, compact_cache)
+
+        desc = "BlockStructureSerialization:{}".format(course_size)
+        with CodeBlockTimer(desc):
+            for cache_format, cache in (('original', original_cache), ('compact', compact_cache)):
+                with CodeBlockTimer(cache_format):
+                    for __ in range(LOAD_COUNT):
+                        BlockStructureFactory.create_from_cache(root_key, cache, [MockTransformer])
+
+                result_str = "{} - Course Size: {:>5} - Format: {:>8} - Cached Bytes: {}\n".format(
+                    self.test_run_time, course_size, cache_format, len(cache.get(cache_key))
+                )
+                with open("block_structure_sizes.txt", "a") as f:
+                    f.write(result_str)
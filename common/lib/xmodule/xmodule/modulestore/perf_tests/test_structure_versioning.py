@@ -0,0 +1,89 @@
+"""
+Performance test for saving edits to large courses in the split modulestore,
+with structures stored in full or as deltas from their previous version.
+"""
+import datetime
+import itertools
+import unittest
+
+import ddt
+#from nose.plugins.attrib import attr
+
+from nose.plugins.skip import SkipTest
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.utils import VersioningModulestoreBuilder
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+# Number of verticals in the course, each with one html block.
+COURSE_SIZES = (100, 1000, 5000)
+
+# Maximum number of consecutive structure versions stored as deltas.
+DELTA_MAX_DEPTHS = (0, 10)
+
+# Number of edits saved per test run.
+EDIT_COUNT = 20
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class StructureVersioningTiming(unittest.TestCase):
+    """
+    This class exists to measure the latency and the number of bytes written to the
+    structures collection when saving edits to courses of different sizes.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    test_run_time = datetime.datetime.now()
+
+    @ddt.data(*itertools.product(COURSE_SIZES, DELTA_MAX_DEPTHS))
+    @ddt.unpack
+    def test_save_edit_timings(self, course_size, delta_max_depth):
+        """
+        Generate timings of update_item and the sizes of the structures written for edits
+        to courses of different sizes.
+        """
+        if CodeBlockTimer is None:
+            raise SkipTest("CodeBlockTimer undefined.")
+
+        desc = "StructureVersioning:{}:{}".format(course_size, delta_max_depth)
+
+        with CodeBlockTimer(desc):
+
+            with VersioningModulestoreBuilder().build_without_contentstore() as (__, store):
+                store.db_connection.structure_delta_max_depth = delta_max_depth
+                with store.branch_setting(ModuleStoreEnum.Branch.draft_preferred):
+                    with CodeBlockTimer("create_course"):
+                        course = store.create_course('org', 'course', 'run', 'test_user')
+                        with store.bulk_operations(course.id):
+                            for index in range(course_size):
+                                vertical = store.create_child('test_user', course.location, 'vertical')
+                                store.create_child(
+                                    'test_user', vertical.location, 'html', fields={'data': str(index)}
+                                )
+
+                    html = store.get_items(course.id, qualifiers={'category': 'html'})[0]
+                    structures = store.db_connection.structures
+                    initial_size = store.db.command('collstats', structures.name)['size']
+
+                    with CodeBlockTimer("save_edits"):
+                        for index in range(EDIT_COUNT):
+                            html.display_name = 'Edit {}'.format(index)
+                            html = store.update_item(html, 'test_user')
+
+                    written = store.db.command('collstats', structures.name)['size'] - initial_size
+                    result_str = "{} - Course Size: {:>5} - Delta Max Depth: {:>3} - Bytes Per Edit: {}\n".format(
+                        self.test_run_time, course_size, delta_max_depth, written / EDIT_COUNT
+                    )
+                    with open("structure_sizes.txt", "a") as f:
+                        f.write(result_str)
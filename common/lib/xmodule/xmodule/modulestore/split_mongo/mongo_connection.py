@@ -9,12 +9,14 @@ import pymongo
 import pytz
 import re
 from contextlib import contextmanager
+from threading import Lock
 from time import time
 
 # Import this just to export it
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -22,6 +24,7 @@ except ImportError:
 
 import dogstats_wrapper as dog_stats_api
 
+from calc.lru_cache import LRUCache
 from contracts import check, new_contract
 from mongodb_proxy import autoretry_read
 from xmodule.exceptions import HeartbeatFailure
@@ -223,13 +226,55 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+class StructureLocalCache(LRUCache):
+    """
+    A process-local, least-recently-used cache of deserialized course
+    structures, or of data derived from them, keyed by their version
+    guid.  Since a structure never changes once it is saved under a
+    version guid, cached entries are shared by all requests and threads
+    in the process, and must not be modified by their callers.
+
+    The cache is bounded by the total size of its entries, as given by
+    its callers: for structures, the size of their pickled
+    representation, which is an approximation of their memory usage.
+    """
+
+
+_LOCAL_CACHE = {}
+_LOCAL_CACHE_LOCK = Lock()
+
+
+def get_local_cache():
+    """
+    Return the process-wide :class:`StructureLocalCache`, sized by the
+    COURSE_STRUCTURE_LOCAL_CACHE_SIZE setting, or None if it is disabled.
+    """
+    if not DJANGO_AVAILABLE:
+        return None
+
+    max_size = getattr(settings, 'COURSE_STRUCTURE_LOCAL_CACHE_SIZE', 0)
+    if not max_size:
+        return None
+
+    with _LOCAL_CACHE_LOCK:
+        if max_size not in _LOCAL_CACHE:
+            _LOCAL_CACHE.clear()
+            _LOCAL_CACHE[max_size] = StructureLocalCache(max_size)
+        return _LOCAL_CACHE[max_size]
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
     The course structures are pickled and compressed when cached.
 
-    If the 'course_structure_cache' doesn't exist, then don't do anything for
-    for set and get.
+    Deserialized structures are also kept in the process-wide
+    :class:`StructureLocalCache`, when it is enabled, so that frequently
+    used structures aren't fetched, decompressed and unpickled on every
+    request.
+
+    If neither the 'course_structure_cache' nor the local cache exist,
+    then don't do anything for set and get.
     """
     def __init__(self):
         self.cache = None
@@ -238,13 +283,23 @@ class CourseStructureCache(object):
                 self.cache = get_cache('course_structure_cache')
             except InvalidCacheBackendError:
                 pass
+        self.local_cache = get_local_cache()
 
     def get(self, key, course_context=None):
         """Pull the compressed, pickled struct data from cache and deserialize."""
-        if self.cache is None:
+        if self.cache is None and self.local_cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
+            if self.local_cache is not None:
+                structure = self.local_cache.get(key)
+                tagger.tag(from_local_cache=str(structure is not None).lower())
+                if structure is not None:
+                    return structure
+
+            if self.cache is None:
+                return None
+
             compressed_pickled_data = self.cache.get(key)
             tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
 
@@ -258,17 +313,24 @@ class CourseStructureCache(object):
             pickled_data = zlib.decompress(compressed_pickled_data)
             tagger.measure('uncompressed_size', len(pickled_data))
 
-            return pickle.loads(pickled_data)
+            structure = pickle.loads(pickled_data)
+            self._set_local(key, structure, len(pickled_data), tagger)
+            return structure
 
     def set(self, key, structure, course_context=None):
         """Given a structure, will pickle, compress, and write to cache."""
-        if self.cache is None:
+        if self.cache is None and self.local_cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
             pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
             tagger.measure('uncompressed_size', len(pickled_data))
 
+            self._set_local(key, structure, len(pickled_data), tagger)
+
+            if self.cache is None:
+                return
+
             # 1 = Fastest (slightly larger results)
             compressed_pickled_data = zlib.compress(pickled_data, 1)
             tagger.measure('compressed_size', len(compressed_pickled_data))
@@ -276,6 +338,14 @@ class CourseStructureCache(object):
             # Stuctures are immutable, so we set a timeout of "never"
             self.cache.set(key, compressed_pickled_data, None)
 
+    def _set_local(self, key, structure, size, tagger):
+        """Add the structure to the local cache, if it is enabled."""
+        if self.local_cache is None:
+            return
+
+        self.local_cache.set(key, structure, size)
+        tagger.measure('local_cache_size', self.local_cache.size)
+
 
 class MongoConnection(object):
     """
@@ -283,10 +353,14 @@ class MongoConnection(object):
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_delta_max_depth=0, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        structure_delta_max_depth is the maximum number of consecutive structure versions which
+        are stored as deltas from their previous version, before a full structure is stored again.
+        0 stores every structure in full.
         """
         # Set a write concern of 1, which makes writes complete successfully to the primary
         # only before returning. Also makes pymongo report write errors.
@@ -301,6 +375,7 @@ class MongoConnection(object):
         self.course_index = self.database[collection + '.active_versions']
         self.structures = self.database[collection + '.structures']
         self.definitions = self.database[collection + '.definitions']
+        self.structure_delta_max_depth = structure_delta_max_depth
 
     def heartbeat(self):
         """
@@ -329,7 +404,7 @@ class MongoConnection(object):
                 with TIMER.timer("get_structure.find_one", course_context) as tagger_find_one:
                     doc = self.structures.find_one({'_id': key})
                     tagger_find_one.measure("blocks", len(doc['blocks']))
-                    structure = structure_from_mongo(doc, course_context)
+                    structure = structure_from_mongo(self._apply_structure_deltas(doc), course_context)
                     tagger_find_one.sample_rate = 1
 
                 cache.set(key, structure, course_context)
@@ -347,7 +422,7 @@ class MongoConnection(object):
         with TIMER.timer("find_structures_by_id", course_context) as tagger:
             tagger.measure("requested_ids", len(ids))
             docs = [
-                structure_from_mongo(structure, course_context)
+                structure_from_mongo(self._apply_structure_deltas(structure), course_context)
                 for structure in self.structures.find({'_id': {'$in': ids}})
             ]
             tagger.measure("structures", len(docs))
@@ -364,7 +439,7 @@ class MongoConnection(object):
         with TIMER.timer("find_structures_derived_from", course_context) as tagger:
             tagger.measure("base_ids", len(ids))
             docs = [
-                structure_from_mongo(structure, course_context)
+                structure_from_mongo(self._apply_structure_deltas(structure), course_context)
                 for structure in self.structures.find({'previous_version': {'$in': ids}})
             ]
             tagger.measure("structures", len(docs))
@@ -375,13 +450,15 @@ class MongoConnection(object):
         """
         Find all structures that originated from ``original_version`` that contain ``block_key``.
 
+        Structures stored as deltas are only found if ``block_key`` changed in them.
+
         Arguments:
             original_version (str or ObjectID): The id of a structure
             block_key (BlockKey): The id of the block in question
         """
         with TIMER.timer("find_ancestor_structures", course_context) as tagger:
             docs = [
-                structure_from_mongo(structure, course_context)
+                structure_from_mongo(self._apply_structure_deltas(structure), course_context)
                 for structure in self.structures.find({
                     'original_version': original_version,
                     'blocks': {
@@ -404,7 +481,67 @@ class MongoConnection(object):
         """
         with TIMER.timer("insert_structure", course_context) as tagger:
             tagger.measure("blocks", len(structure["blocks"]))
-            self.structures.insert(structure_to_mongo(structure, course_context))
+            doc = self._structure_delta(structure, course_context)
+            if doc is None:
+                doc = structure_to_mongo(structure, course_context)
+            else:
+                tagger.measure("delta_blocks", len(doc['blocks']))
+            self.structures.insert(doc)
+
+    def _structure_delta(self, structure, course_context=None):
+        """
+        Return the document storing the given structure as a delta from its previous version:
+        the structure without its unchanged blocks, the keys of the blocks it deleted in
+        'deleted_blocks', and in 'delta_chain' the ids of the full structure and of the deltas
+        to apply before it, in order.
+
+        Returns None if the structure should be stored in full.
+        """
+        if not self.structure_delta_max_depth or structure.get('previous_version') is None:
+            return None
+
+        base_id = structure['previous_version']
+        base_doc = self.structures.find_one({'_id': base_id}, {'delta_chain': True})
+        if base_doc is None:
+            return None
+        delta_chain = base_doc.get('delta_chain', []) + [base_id]
+        if len(delta_chain) > self.structure_delta_max_depth:
+            # Compact the chain by storing a full structure.
+            return None
+
+        base_blocks = self.get_structure(base_id, course_context)['blocks']
+        changed_blocks = {
+            block_key: block
+            for block_key, block in structure['blocks'].iteritems()
+            if block_key not in base_blocks or base_blocks[block_key].to_storable() != block.to_storable()
+        }
+        doc = structure_to_mongo(dict(structure, blocks=changed_blocks), course_context)
+        doc['deleted_blocks'] = [list(block_key) for block_key in base_blocks if block_key not in structure['blocks']]
+        doc['delta_chain'] = delta_chain
+        return doc
+
+    def _apply_structure_deltas(self, doc):
+        """
+        Given a structure document from mongo, return the document of the full structure,
+        applying its chain of deltas to the full structure it was based on if it is a delta.
+        """
+        if 'delta_chain' not in doc:
+            return doc
+
+        chain_docs = {
+            chain_doc['_id']: chain_doc
+            for chain_doc in self.structures.find({'_id': {'$in': doc['delta_chain']}})
+        }
+        blocks = {}
+        for chain_doc in [chain_docs[_id] for _id in doc['delta_chain']] + [doc]:
+            for block_key in chain_doc.get('deleted_blocks', []):
+                blocks.pop(tuple(block_key), None)
+            for block in chain_doc['blocks']:
+                blocks[(block['block_type'], block['block_id'])] = block
+
+        full_doc = {key: value for key, value in doc.iteritems() if key not in ('delta_chain', 'deleted_blocks')}
+        full_doc['blocks'] = blocks.values()
+        return full_doc
 
     def get_course_index(self, key, ignore_case=False):
         """
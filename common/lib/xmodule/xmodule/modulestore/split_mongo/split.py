@@ -82,6 +82,7 @@ from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex, get_structure_index
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
 from types import NoneType
@@ -641,14 +642,16 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None, structure_delta_max_depth=0, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param structure_delta_max_depth: how many consecutive versions of a structure to store as
+            deltas from their previous version between full copies; 0 always stores full copies.
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        self.db_connection = MongoConnection(structure_delta_max_depth=structure_delta_max_depth, **doc_store_config)
         self.db = self.db_connection.database
 
         if default_class is not None:
@@ -736,12 +739,17 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 definitions = {definition['_id']: definition
                                for definition in descendent_definitions}
 
-                for block in new_module_data.itervalues():
+                for block_key, block in new_module_data.iteritems():
                     if block.definition in definitions:
                         definition = definitions[block.definition]
+                        # The block data belongs to the structure, which may be shared
+                        # with other requests, so merge the definition into a copy.
+                        block = copy.copy(block)
                         # convert_fields gets done later in the runtime's xblock_from_json
+                        block.fields = dict(block.fields)
                         block.fields.update(definition.get('fields'))
                         block.definition_loaded = True
+                        new_module_data[block_key] = block
 
             system.module_data.update(new_module_data)
             return system.module_data
@@ -1085,34 +1093,40 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return []
 
         course = self._lookup_course(course_locator)
-        items = []
+        structure_index = self._get_structure_index(course)
+        blocks = course.structure['blocks']
         qualifiers = qualifiers.copy() if qualifiers else {}  # copy the qualifiers (destructively manipulated here)
 
-        def _block_matches_all(block_data):
+        def _blocks_matching_all(block_keys):
             """
-            Check that the block matches all the criteria
+            Return the given block keys whose blocks match all the criteria
             """
             # do the checks which don't require loading any additional data
-            if (  # pylint: disable=bad-continuation
-                self._block_matches(block_data, qualifiers) and
-                self._block_matches(block_data.fields, settings)
-            ):
-                if content:
-                    definition_block = self.get_definition(course_locator, block_data.definition)
-                    return self._block_matches(definition_block['fields'], content)
-                else:
-                    return True
+            block_keys = [
+                block_key for block_key in block_keys
+                if self._block_matches(blocks[block_key], qualifiers) and
+                self._block_matches(blocks[block_key].fields, settings)
+            ]
+            if content and block_keys:
+                definitions = {
+                    definition['_id']: definition
+                    for definition in self.get_definitions(
+                        course_locator, [blocks[block_key].definition for block_key in block_keys]
+                    )
+                }
+                block_keys = [
+                    block_key for block_key in block_keys
+                    if blocks[block_key].definition in definitions and
+                    self._block_matches(definitions[blocks[block_key].definition]['fields'], content)
+                ]
+            return block_keys
 
         if settings is None:
             settings = {}
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
-            block_ids = []
-            for block_id, block in course.structure['blocks'].iteritems():
-                if block_name == block_id.id and _block_matches_all(block):
-                    block_ids.append(block_id)
-
+            block_ids = _blocks_matching_all(structure_index.blocks_by_id.get(block_name, []))
             return self._load_items(course, block_ids, **kwargs)
 
         if 'category' in qualifiers:
@@ -1121,31 +1135,89 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # don't expect caller to know that children are in fields
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
-                items.append(block_id)
+        candidates = self._get_candidate_block_keys(course.structure, structure_index, qualifiers, settings)
+        items = _blocks_matching_all(candidates)
 
         if len(items) > 0:
             return self._load_items(course, items, depth=0, **kwargs)
         else:
             return []
 
+    def _get_structure_index(self, course_entry):
+        """
+        Return the StructureIndex of the course_entry's structure. A structure which is
+        still being edited in an active bulk operation is indexed, but the index isn't cached.
+        """
+        structure = course_entry.structure
+        bulk_write_record = self._get_bulk_ops_record(course_entry.course_key)
+        if bulk_write_record.active and structure['_id'] not in bulk_write_record.structures_in_db:
+            return StructureIndex(structure)
+        return get_structure_index(structure)
+
+    def _get_candidate_block_keys(self, structure, structure_index, qualifiers, settings):
+        """
+        Use the structure_index of the structure to narrow down the blocks which could match the get_items
+        qualifiers and settings. Returns the candidates in the order of the structure's blocks,
+        which still need to be checked against all the criteria.
+        """
+        candidates = None
+
+        block_types = self._plain_criteria_values(qualifiers.get('block_type'), basestring)
+        if block_types is not None:
+            candidates = [
+                block_key
+                for block_type in block_types
+                for block_key in structure_index.blocks_by_type.get(block_type, [])
+            ]
+
+        children = self._plain_criteria_values(settings.get('children'), BlockKey)
+        if children is not None:
+            parents = set(
+                block_key
+                for child in children
+                for block_key in structure_index.parents.get(child, [])
+            )
+            candidates = parents if candidates is None else [key for key in candidates if key in parents]
+
+        for field_name, criteria in settings.iteritems():
+            if isinstance(criteria, dict) and '$exists' in criteria:
+                # blocks which don't set the field can match
+                continue
+            with_field = structure_index.blocks_with_field(structure, field_name)
+            if candidates is None:
+                candidates = with_field
+            else:
+                candidates = [block_key for block_key in candidates if block_key in with_field]
+
+        if candidates is None:
+            return structure_index.block_keys
+        return sorted(candidates, key=structure_index.positions.__getitem__)
+
+    @staticmethod
+    def _plain_criteria_values(criteria, value_type):
+        """
+        Return the list of values of value_type which a get_items criteria matches exactly, or
+        None if it isn't a value of value_type nor an {'$in': [...]} of them.
+        """
+        if isinstance(criteria, value_type):
+            return [criteria]
+        if (  # pylint: disable=bad-continuation
+            isinstance(criteria, dict) and criteria.keys() == ['$in'] and
+            all(isinstance(value, value_type) for value in criteria['$in'])
+        ):
+            return criteria['$in']
+        return None
+
     def has_path_to_root(self, block_key, course):
         """
-        Check recursively if an xblock has a path to the course root
+        Check if an xblock has a path to the course root
 
         :param block_key: BlockKey of the component whose path is to be checked
         :param course: actual db json of course from structures
 
         :return Bool: whether or not component has path to the root
         """
-
-        xblock_parents = self._get_parents_from_structure(block_key, course.structure)
-        if len(xblock_parents) == 0 and block_key.type in ["course", "library"]:
-            # Found, xblock has the path to the root
-            return True
-
-        return any(self.has_path_to_root(xblock_parent, course) for xblock_parent in xblock_parents)
+        return block_key in self._get_structure_index(course).rooted_blocks
 
     def get_parent_location(self, locator, **kwargs):
         """
@@ -1160,14 +1232,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        all_parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        structure_index = self._get_structure_index(course)
+        all_parent_ids = structure_index.parents.get(BlockKey.from_usage_key(locator), [])
 
         # Check and verify the found parent_ids are not orphans; Remove parent which has no valid path
         # to the course root
         parent_ids = [
             valid_parent
             for valid_parent in all_parent_ids
-            if self.has_path_to_root(valid_parent, course)
+            if valid_parent in structure_index.rooted_blocks
         ]
 
         if len(parent_ids) == 0:
@@ -0,0 +1,104 @@
+"""
+Secondary indexes of the blocks in split modulestore course structures.
+"""
+from collections import defaultdict
+
+from xmodule.modulestore.split_mongo.mongo_connection import StructureLocalCache
+
+
+# Maximum total number of blocks in the structures indexed by the
+# process-wide index cache.
+STRUCTURE_INDEX_CACHE_SIZE = 500000
+
+
+class StructureIndex(object):
+    """
+    Indexes of a structure's blocks by block_type, by block_id, by parent
+    and, lazily, by the settings fields set on them and by whether they
+    have a path to the root of the course.
+
+    Each index maps to lists of BlockKeys in the iteration order of the
+    structure's 'blocks', and positions gives each block's place in that
+    order, so that narrowing a search with the indexes finds blocks in
+    the same order as scanning the whole structure.
+
+    The index is only valid as long as the structure isn't modified, so
+    it should only be cached for saved structures, which are immutable.
+    It doesn't reference the structure, so caching it doesn't keep the
+    structure in memory.
+    """
+    def __init__(self, structure):
+        self.block_keys = structure['blocks'].keys()
+        self.positions = {block_key: position for position, block_key in enumerate(self.block_keys)}
+
+        self.blocks_by_type = defaultdict(list)
+        self.blocks_by_id = defaultdict(list)
+        self.parents = defaultdict(list)
+        for block_key in self.block_keys:
+            block = structure['blocks'][block_key]
+            self.blocks_by_type[block.block_type].append(block_key)
+            self.blocks_by_id[block_key.id].append(block_key)
+            for child_key in block.fields.get('children', []):
+                self.parents[child_key].append(block_key)
+
+        # Map of settings field name to the set of BlockKeys which have
+        # the field set, built on first use of each field.
+        self._blocks_by_field = {}
+        self._rooted_blocks = None
+
+    @property
+    def rooted_blocks(self):
+        """
+        The set of BlockKeys of the blocks which have a path to the root of
+        the course, i.e. which are descendants of a course or library block
+        without any parents.
+        """
+        if self._rooted_blocks is None:
+            children = defaultdict(list)
+            for child_key, parent_keys in self.parents.iteritems():
+                for parent_key in parent_keys:
+                    children[parent_key].append(child_key)
+            stack = [
+                block_key for block_key in self.block_keys
+                if block_key.type in ('course', 'library') and block_key not in self.parents
+            ]
+            rooted_blocks = set(stack)
+            while stack:
+                for child_key in children.get(stack.pop(), []):
+                    if child_key not in rooted_blocks:
+                        rooted_blocks.add(child_key)
+                        stack.append(child_key)
+            self._rooted_blocks = frozenset(rooted_blocks)
+        return self._rooted_blocks
+
+    def blocks_with_field(self, structure, field_name):
+        """
+        Return the set of BlockKeys of the blocks which have a value set
+        for the given settings field in the given structure, which must be
+        the indexed one.
+        """
+        blocks = self._blocks_by_field.get(field_name)
+        if blocks is None:
+            blocks = frozenset(
+                block_key
+                for block_key, block in structure['blocks'].iteritems()
+                if field_name in block.fields
+            )
+            self._blocks_by_field[field_name] = blocks
+        return blocks
+
+
+_INDEX_CACHE = StructureLocalCache(STRUCTURE_INDEX_CACHE_SIZE)
+
+
+def get_structure_index(structure):
+    """
+    Return the :class:`StructureIndex` of the given saved structure,
+    building it only if it isn't already cached for this structure's
+    version.
+    """
+    index = _INDEX_CACHE.get(structure['_id'])
+    if index is None:
+        index = StructureIndex(structure)
+        _INDEX_CACHE.set(structure['_id'], index, len(structure['blocks']))
+    return index
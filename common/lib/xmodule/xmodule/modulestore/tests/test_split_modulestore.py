@@ -9,6 +9,7 @@ import random
 import re
 import unittest
 import uuid
+import weakref
 
 import ddt
 from contracts import contract
@@ -18,7 +19,7 @@ from django.core.cache import caches, InvalidCacheBackendError
 from openedx.core.lib import tempdir
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict
 from xmodule.course_module import CourseDescriptor
-from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore import BlockData, ModuleStoreEnum
 from xmodule.modulestore.exceptions import (
     ItemNotFoundError, VersionConflictError,
     DuplicateItemError, DuplicateCourseError,
@@ -29,7 +30,9 @@ from ccx_keys.locator import CCXBlockUsageLocator
 from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.x_module import XModuleMixin
 from xmodule.fields import Date, Timedelta
+from xmodule.modulestore.split_mongo.mongo_connection import StructureLocalCache
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex, get_structure_index
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 from xmodule.modulestore.split_mongo import BlockKey
 from xmodule.modulestore.tests.factories import check_mongo_calls
@@ -928,6 +931,142 @@ class SplitModuleCourseTests(SplitModuleTest):
         self.assertEqual(root_block_key.name, "course")
 
 
+class TestStructureLocalCache(unittest.TestCase):
+    """Tests for the StructureLocalCache"""
+
+    def setUp(self):
+        super(TestStructureLocalCache, self).setUp()
+        self.local_cache = StructureLocalCache(max_size=10)
+
+    def test_get(self):
+        self.assertIsNone(self.local_cache.get('v1'))
+        self.local_cache.set('v1', {'_id': 'v1'}, 4)
+        self.assertEqual(self.local_cache.get('v1'), {'_id': 'v1'})
+        stats = self.local_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 4))
+
+    def test_eviction(self):
+        self.local_cache.set('v1', {'_id': 'v1'}, 4)
+        self.local_cache.set('v2', {'_id': 'v2'}, 4)
+
+        # use v1 so that v2 is evicted first
+        self.local_cache.get('v1')
+        self.local_cache.set('v3', {'_id': 'v3'}, 4)
+
+        self.assertIsNotNone(self.local_cache.get('v1'))
+        self.assertIsNone(self.local_cache.get('v2'))
+        self.assertIsNotNone(self.local_cache.get('v3'))
+        self.assertEqual(self.local_cache.stats()['size'], 8)
+
+    def test_too_large(self):
+        self.local_cache.set('v1', {'_id': 'v1'}, 11)
+        self.assertIsNone(self.local_cache.get('v1'))
+        self.assertEqual(self.local_cache.stats()['entries'], 0)
+
+
+class TestStructureIndex(unittest.TestCase):
+    """Tests for the StructureIndex"""
+
+    def setUp(self):
+        super(TestStructureIndex, self).setUp()
+        self.course_key = BlockKey('course', 'course')
+        self.chapter_key = BlockKey('chapter', 'chapter')
+        self.html_key = BlockKey('html', 'html')
+        self.structure = {
+            '_id': 'structure',
+            'blocks': {
+                self.course_key: BlockData(block_type='course', fields={'children': [self.chapter_key]}),
+                self.chapter_key: BlockData(block_type='chapter', fields={'children': [self.html_key]}),
+                self.html_key: BlockData(block_type='html', fields={'display_name': 'Html'}),
+            },
+        }
+
+    def test_indexes(self):
+        index = StructureIndex(self.structure)
+        self.assertEqual(index.blocks_by_type['chapter'], [self.chapter_key])
+        self.assertEqual(index.blocks_by_id['html'], [self.html_key])
+        self.assertEqual(index.parents[self.html_key], [self.chapter_key])
+        self.assertNotIn(self.course_key, index.parents)
+        self.assertEqual(index.blocks_with_field(self.structure, 'display_name'), {self.html_key})
+        self.assertEqual(
+            sorted(index.block_keys, key=index.positions.__getitem__),
+            self.structure['blocks'].keys(),
+        )
+
+    def test_rooted_blocks(self):
+        orphan_key = BlockKey('vertical', 'orphan')
+        orphan_child_key = BlockKey('html', 'orphan_child')
+        self.structure['blocks'][orphan_key] = BlockData(block_type='vertical', fields={'children': [orphan_child_key]})
+        self.structure['blocks'][orphan_child_key] = BlockData(block_type='html', fields={})
+
+        index = StructureIndex(self.structure)
+        self.assertEqual(index.rooted_blocks, {self.course_key, self.chapter_key, self.html_key})
+        self.assertEqual(index.parents[orphan_child_key], [orphan_key])
+
+    def test_cached_per_version(self):
+        index = get_structure_index(self.structure)
+        self.assertIs(get_structure_index(self.structure), index)
+
+        # another copy of the same version shares the index
+        self.assertIs(get_structure_index(dict(self.structure)), index)
+        self.assertIsNot(get_structure_index(dict(self.structure, _id='other')), index)
+
+    def test_cached_index_does_not_keep_structure(self):
+        class WeakReferenceableDict(dict):
+            """A dict which can be weakly referenced"""
+            pass
+
+        structure = WeakReferenceableDict(self.structure, _id='unreferenced')
+        structure_ref = weakref.ref(structure)
+        index = get_structure_index(structure)
+        self.assertEqual(index.rooted_blocks, {self.course_key, self.chapter_key, self.html_key})
+        del structure
+        self.assertIsNone(structure_ref())
+
+
+class TestStructureDeltas(SplitModuleTest):
+    """Tests for storing structures as deltas from their previous versions"""
+
+    def setUp(self):
+        super(TestStructureDeltas, self).setUp()
+        self.db_connection = modulestore().db_connection
+        self.db_connection.structure_delta_max_depth = 2
+        self.addCleanup(setattr, self.db_connection, 'structure_delta_max_depth', 0)
+
+        self.user = random.getrandbits(32)
+        self.new_course = modulestore().create_course(
+            'org', 'delta', 'test_run', self.user, BRANCH_NAME_DRAFT,
+        )
+
+    def test_deltas(self):
+        chapter = modulestore().create_child(
+            self.user, self.new_course.location, 'chapter', fields={'display_name': 'Chapter'},
+        )
+        chain_lengths = []
+        for index in range(4):
+            chapter.display_name = 'Chapter {}'.format(index)
+            chapter = modulestore().update_item(chapter, self.user)
+
+            structure = modulestore()._lookup_course(self.new_course.id).structure  # pylint: disable=protected-access
+            doc = self.db_connection.structures.find_one({'_id': structure['_id']})
+            chain_lengths.append(len(doc.get('delta_chain', [])))
+            if 'delta_chain' in doc:
+                # only the edited block is stored
+                self.assertEqual([block['block_id'] for block in doc['blocks']], [chapter.location.block_id])
+
+            # the full structure is reconstructed from the deltas
+            self.assertEqual(set(structure['blocks']), {
+                BlockKey.from_usage_key(self.new_course.location),
+                BlockKey.from_usage_key(chapter.location),
+            })
+            chapter_key = self.new_course.id.make_usage_key('chapter', chapter.location.block_id)
+            self.assertEqual(modulestore().get_item(chapter_key).display_name, 'Chapter {}'.format(index))
+
+        # every third version is stored in full
+        self.assertIn(0, chain_lengths)
+        self.assertLessEqual(max(chain_lengths), 2)
+
+
 class TestCourseStructureCache(SplitModuleTest):
     """Tests for the CourseStructureCache"""
 
@@ -992,6 +1131,47 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_local_cache')
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_local_structure_cache(self, mock_get_cache, mock_get_local_cache):
+        mock_get_cache.return_value = self.cache
+        local_cache = StructureLocalCache(max_size=10 * 1024 * 1024)
+        mock_get_local_cache.return_value = local_cache
+
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+
+        # the structure is shared from the local cache, without going
+        # through the shared cache
+        self.cache.clear()
+        with check_mongo_calls(0):
+            cached_structure = self._get_structure(self.new_course)
+
+        self.assertIs(cached_structure, not_cached_structure)
+        stats = local_cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['entries'], 1)
+        self.assertGreater(stats['size'], 0)
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_local_cache')
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_local_structure_cache_warmed_from_cache(self, mock_get_cache, mock_get_local_cache):
+        mock_get_cache.return_value = self.cache
+
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+
+        # a process with an empty local cache reads the structure from the
+        # shared cache, and keeps it for the next request
+        mock_get_local_cache.return_value = StructureLocalCache(max_size=10 * 1024 * 1024)
+        with check_mongo_calls(0):
+            cached_structure = self._get_structure(self.new_course)
+        self.assertEqual(cached_structure, not_cached_structure)
+
+        self.cache.clear()
+        with check_mongo_calls(0):
+            self.assertIs(self._get_structure(self.new_course), cached_structure)
+
     def _get_structure(self, course):
         """
         Helper function to get a structure from a course.
@@ -1209,6 +1389,26 @@ class SplitModuleItemTests(SplitModuleTest):
         matches = modulestore().get_items(locator, settings={'group_access': {'$exists': False}})
         self.assertEqual(len(matches), 6)
 
+    def test_get_items_indexed_order(self):
+        """
+        Searches narrowed down with the structure index find the same blocks,
+        in the same order, as a scan of all the blocks.
+        """
+        locator = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        all_locations = [item.location for item in modulestore().get_items(locator)]
+
+        matches = modulestore().get_items(locator, qualifiers={'category': {'$in': ['chapter', 'problem']}})
+        self.assertEqual(
+            [item.location for item in matches],
+            [location for location in all_locations if location.block_type in ('chapter', 'problem')],
+        )
+
+        matches = modulestore().get_items(locator, qualifiers={'children': BlockKey('chapter', 'chapter1')})
+        self.assertEqual([item.location.block_id for item in matches], ['head12345'])
+
+        matches = modulestore().get_items(locator, qualifiers={'name': 'chapter1'})
+        self.assertEqual([item.location.block_id for item in matches], ['chapter1'])
+
     def test_get_parents(self):
         '''
         get_parent_location(locator): BlockUsageLocator
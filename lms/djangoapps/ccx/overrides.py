@@ -9,7 +9,7 @@ from django.db import transaction, IntegrityError
 
 import request_cache
 
-from courseware.field_overrides import FieldOverrideProvider
+from courseware.field_overrides import FieldOverrideProvider, clear_inherited_overrides
 from opaque_keys.edx.keys import CourseKey, UsageKey
 from ccx_keys.locator import CCXLocator, CCXBlockUsageLocator
 
@@ -159,6 +159,7 @@ def override_field_for_ccx(ccx, block, name, value):
 
     _get_overrides_for_ccx(ccx).setdefault(block.location, {})[name] = value_json
     _get_overrides_for_ccx(ccx).setdefault(block.location, {})[name + "_instance"] = override
+    clear_inherited_overrides()
 
 
 def clear_override_for_ccx(ccx, block, name):
@@ -175,6 +176,7 @@ def clear_override_for_ccx(ccx, block, name):
             field=name).delete()
 
         clear_ccx_field_info_from_ccx_map(ccx, block, name)
+        clear_inherited_overrides()
 
     except CcxFieldOverride.DoesNotExist:
         pass
@@ -201,3 +203,4 @@ def bulk_delete_ccx_override_fields(ccx, ids):
     ids = list(set(ids))
     if ids:
         CcxFieldOverride.objects.filter(ccx=ccx, id__in=ids).delete()
+        clear_inherited_overrides()
@@ -349,34 +349,43 @@ def certificate_status_for_student(student, course_id):
     If the student has been graded, the dictionary also contains their
     grade for the course with the key "grade".
     '''
+    return certificate_status(GeneratedCertificate.certificate_for_student(student, course_id))
 
-    try:
-        generated_certificate = GeneratedCertificate.objects.get(
-            user=student, course_id=course_id)
-        cert_status = {
-            'status': generated_certificate.status,
-            'mode': generated_certificate.mode,
-            'uuid': generated_certificate.verify_uuid,
-        }
-        if generated_certificate.grade:
-            cert_status['grade'] = generated_certificate.grade
-
-        if generated_certificate.mode == 'audit':
-            course_mode_slugs = [mode.slug for mode in CourseMode.modes_for_course(course_id)]
-            # Short term fix to make sure old audit users with certs still see their certs
-            # only do this if there if no honor mode
-            if 'honor' not in course_mode_slugs:
-                cert_status['status'] = CertificateStatuses.auditing
-                return cert_status
 
-        if generated_certificate.status == CertificateStatuses.downloadable:
-            cert_status['download_url'] = generated_certificate.download_url
+def certificate_status(generated_certificate, course_modes=None):
+    """
+    Returns the dictionary of `certificate_status_for_student` for a
+    GeneratedCertificate, or for a student without a certificate if
+    `generated_certificate` is None.
 
-        return cert_status
+    `course_modes` are the modes of the certificate's course, as returned by
+    `CourseMode.modes_for_course`, to avoid loading them.
+    """
+    if generated_certificate is None:
+        return {'status': CertificateStatuses.unavailable, 'mode': GeneratedCertificate.MODES.honor, 'uuid': None}
 
-    except GeneratedCertificate.DoesNotExist:
-        pass
-    return {'status': CertificateStatuses.unavailable, 'mode': GeneratedCertificate.MODES.honor, 'uuid': None}
+    cert_status = {
+        'status': generated_certificate.status,
+        'mode': generated_certificate.mode,
+        'uuid': generated_certificate.verify_uuid,
+    }
+    if generated_certificate.grade:
+        cert_status['grade'] = generated_certificate.grade
+
+    if generated_certificate.mode == 'audit':
+        if course_modes is None:
+            course_modes = CourseMode.modes_for_course(generated_certificate.course_id)
+        course_mode_slugs = [mode.slug for mode in course_modes]
+        # Short term fix to make sure old audit users with certs still see their certs
+        # only do this if there if no honor mode
+        if 'honor' not in course_mode_slugs:
+            cert_status['status'] = CertificateStatuses.auditing
+            return cert_status
+
+    if generated_certificate.status == CertificateStatuses.downloadable:
+        cert_status['download_url'] = generated_certificate.download_url
+
+    return cert_status
 
 
 def certificate_info_for_user(user, course_id, grade, user_is_whitelisted=None):
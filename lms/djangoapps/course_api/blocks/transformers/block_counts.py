@@ -9,6 +9,7 @@ class BlockCountsTransformer(BlockStructureTransformer):
     Keep a count of descendant blocks of the requested types
     """
     VERSION = 1
+    SUPPORTS_PARTIAL_COLLECT = True
     BLOCK_COUNTS = 'block_counts'
 
     def __init__(self, block_types_to_count):
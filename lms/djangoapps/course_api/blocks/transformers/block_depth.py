@@ -10,6 +10,7 @@ class BlockDepthTransformer(BlockStructureTransformer):
     of multiple paths to a given node (in a DAG), use the shallowest depth.
     """
     VERSION = 1
+    SUPPORTS_PARTIAL_COLLECT = True
     BLOCK_DEPTH = 'block_depth'
 
     def __init__(self, requested_depth=None):
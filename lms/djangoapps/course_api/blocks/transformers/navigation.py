@@ -21,6 +21,7 @@ class BlockNavigationTransformer(BlockStructureTransformer):
     transform phase.
     """
     VERSION = 1
+    SUPPORTS_PARTIAL_COLLECT = True
     BLOCK_NAVIGATION = 'block_nav'
     BLOCK_NAVIGATION_FOR_CHILDREN = 'children_block_nav'
 
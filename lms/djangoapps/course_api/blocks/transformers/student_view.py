@@ -9,6 +9,7 @@ class StudentViewTransformer(BlockStructureTransformer):
     Only show information that is appropriate for a learner
     """
     VERSION = 1
+    SUPPORTS_PARTIAL_COLLECT = True
     STUDENT_VIEW_DATA = 'student_view_data'
     STUDENT_VIEW_MULTI_DEVICE = 'student_view_multi_device'
 
@@ -27,7 +28,10 @@ class StudentViewTransformer(BlockStructureTransformer):
         # collect basic xblock fields
         block_structure.request_xblock_fields('category')
 
-        for block_key in block_structure.topological_traversal():
+        for block_key in block_structure.topological_traversal(
+                filter_func=block_structure.is_collect_needed,
+                yield_descendants_of_unyielded=True,
+        ):
             block = block_structure.get_xblock(block_key)
 
             # We're iterating through descriptors (not bound to a user) that are
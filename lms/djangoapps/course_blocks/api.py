@@ -2,9 +2,11 @@
 API entry point to the course_blocks app with top-level
 get_course_blocks and clear_course_from_cache functions.
 """
+from django.conf import settings
 from django.core.cache import cache
 
-from openedx.core.lib.block_cache.block_cache import get_blocks, clear_block_cache
+from openedx.core.lib.block_cache.block_cache import get_blocks, clear_block_cache, update_block_cache
+from openedx.core.lib.block_cache.local_cache import BlockStructureLocalCache
 from xmodule.modulestore.django import modulestore
 
 from .transformers import (
@@ -25,6 +27,11 @@ COURSE_BLOCK_ACCESS_TRANSFORMERS = [
     visibility.VisibilityTransformer(),
 ]
 
+# Process-local cache of course block structures, in front of the
+# shared django cache.  Its hit and miss counts are available from its
+# stats method.
+local_cache = BlockStructureLocalCache(settings.COURSE_BLOCKS_LOCAL_CACHE_SIZE)  # pylint: disable=invalid-name
+
 
 def get_course_blocks(
         user,
@@ -78,6 +85,7 @@ def get_course_blocks(
         CourseUsageInfo(root_block_usage_key.course_key, user),
         root_block_usage_key,
         COURSE_BLOCK_ACCESS_TRANSFORMERS if transformers is None else transformers,
+        local_cache,
     )
 
 
@@ -94,4 +102,21 @@ def clear_course_from_cache(course_key):
     arbitrary access to an intermediate block will be supported.
     """
     course_usage_key = modulestore().make_course_usage_key(course_key)
-    return clear_block_cache(cache, course_usage_key)
+    return clear_block_cache(cache, course_usage_key, local_cache)
+
+
+def update_course_in_cache(course_key):
+    """
+    A higher order function implemented on top of the
+    block_cache.update_block_cache function that collects and caches a
+    new block structure for the block structure starting at the root
+    block of the course for the given course_key, replacing any
+    previously cached one.  Only the data of blocks changed since the
+    previously cached block structure is recollected.
+
+    Note: See Note in clear_course_from_cache.
+    """
+    store = modulestore()
+    course_usage_key = store.make_course_usage_key(course_key)
+    with store.bulk_operations(course_key):
+        update_block_cache(cache, store, course_usage_key, local_cache)
@@ -1,6 +1,7 @@
 """
 Signal handlers for invalidating cached data.
 """
+from django.conf import settings
 from django.dispatch.dispatcher import receiver
 
 from xmodule.modulestore.django import SignalHandler
@@ -13,8 +14,21 @@ def _listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable
     """
     Catches the signal that a course has been published in the module
     store and invalidates the corresponding cache entry if one exists.
+
+    If the ENABLE_ASYNC_COURSE_BLOCKS_UPDATE feature is enabled, the cache
+    entry is instead replaced by a Celery task, so requests keep using the
+    previously published version until the new one is collected rather
+    than collecting it themselves.
     """
-    clear_course_from_cache(course_key)
+    if settings.FEATURES.get('ENABLE_ASYNC_COURSE_BLOCKS_UPDATE'):
+        # Import tasks here to avoid a circular import.
+        from .tasks import update_course_in_cache_task
+
+        # Note: The countdown=0 kwarg ensures the task does not access the
+        # course before the signal emitter has finished all operations.
+        update_course_in_cache_task.apply_async([unicode(course_key)], countdown=0)
+    else:
+        clear_course_from_cache(course_key)
 
 
 @receiver(SignalHandler.course_deleted)
@@ -0,0 +1,30 @@
+"""
+Asynchronous tasks related to the Course Blocks sub-application.
+"""
+import logging
+
+from celery.task import task
+from opaque_keys.edx.keys import CourseKey
+
+from .api import clear_course_from_cache, update_course_in_cache
+
+
+log = logging.getLogger('edx.celery.task')
+
+
+@task(name=u'lms.djangoapps.course_blocks.tasks.update_course_in_cache')
+def update_course_in_cache_task(course_key):
+    """
+    Collects and caches a new block structure for the specified course,
+    replacing any previously cached one.  If that fails, the cached block
+    structure is cleared instead so it isn't left outdated.
+    """
+    # Callers pass the course key as a Unicode string, since CourseKeys
+    # are not JSON-serializable.
+    course_key = CourseKey.from_string(course_key)
+    try:
+        update_course_in_cache(course_key)
+    except Exception:
+        log.exception(u'An error occurred while updating the cached block structure of course %s.', course_key)
+        clear_course_from_cache(course_key)
+        raise
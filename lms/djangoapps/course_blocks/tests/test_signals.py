@@ -0,0 +1,51 @@
+"""
+Tests for the course_blocks signal handlers.
+"""
+from django.core.cache import cache
+from mock import patch
+
+from openedx.core.lib.block_cache.block_structure_factory import BlockStructureFactory
+from student.tests.factories import UserFactory
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+from ..api import get_course_blocks
+
+
+class CourseBlocksSignalTest(ModuleStoreTestCase):
+    """
+    Tests for the cached course block structures when a course is
+    published.
+    """
+    def setUp(self):
+        super(CourseBlocksSignalTest, self).setUp()
+        self.user = UserFactory.create()
+        self.course = CourseFactory.create()
+        self.course_usage_key = self.store.make_course_usage_key(self.course.id)
+
+        # populate the cache
+        get_course_blocks(self.user, self.course_usage_key)
+
+    def _get_cached_block_structure(self):
+        """
+        Returns the course's block structure in the cache, if any.
+        """
+        return BlockStructureFactory.create_from_cache(self.course_usage_key, cache, transformers=[])
+
+    def test_course_publish_clears_cache(self):
+        self.assertIsNotNone(self._get_cached_block_structure())
+        ItemFactory.create(category='chapter', parent=self.course)
+        self.assertIsNone(self._get_cached_block_structure())
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_ASYNC_COURSE_BLOCKS_UPDATE': True})
+    def test_course_publish_updates_cache(self):
+        chapter = ItemFactory.create(category='chapter', parent=self.course)
+        block_structure = self._get_cached_block_structure()
+        self.assertIsNotNone(block_structure)
+        self.assertTrue(block_structure.has_block(chapter.location))
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_ASYNC_COURSE_BLOCKS_UPDATE': True})
+    @patch('lms.djangoapps.course_blocks.tasks.update_course_in_cache', side_effect=Exception)
+    def test_failed_update_clears_cache(self, _mock_update):
+        ItemFactory.create(category='chapter', parent=self.course)
+        self.assertIsNone(self._get_cached_block_structure())
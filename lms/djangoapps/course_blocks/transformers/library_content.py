@@ -18,6 +18,7 @@ class ContentLibraryTransformer(BlockStructureTransformer):
     Staff users are *not* exempted from library content pathways.
     """
     VERSION = 1
+    SUPPORTS_PARTIAL_COLLECT = True
 
     @classmethod
     def name(cls):
@@ -56,6 +57,8 @@ class ContentLibraryTransformer(BlockStructureTransformer):
         ):
             xblock = block_structure.get_xblock(block_key)
             for child_key in xblock.children:
+                if not block_structure.is_collect_needed(child_key):
+                    continue
                 summary = summarize_block(child_key)
                 block_structure.set_transformer_block_field(child_key, cls, 'block_analytics_summary', summary)
 
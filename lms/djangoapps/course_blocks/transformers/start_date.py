@@ -25,6 +25,7 @@ class StartDateTransformer(BlockStructureTransformer):
     Staff users are exempted from visibility rules.
     """
     VERSION = 1
+    SUPPORTS_PARTIAL_COLLECT = True
     MERGED_START_DATE = 'merged_start_date'
 
     @classmethod
@@ -53,7 +54,10 @@ class StartDateTransformer(BlockStructureTransformer):
         """
         block_structure.request_xblock_fields('days_early_for_beta')
 
-        for block_key in block_structure.topological_traversal():
+        for block_key in block_structure.topological_traversal(
+                filter_func=block_structure.is_collect_needed,
+                yield_descendants_of_unyielded=True,
+        ):
 
             # compute merged value of start date from all parents
             parents = block_structure.get_parents(block_key)
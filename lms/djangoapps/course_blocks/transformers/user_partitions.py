@@ -17,6 +17,7 @@ class UserPartitionTransformer(BlockStructureTransformer):
     Staff users are *not* exempted from user partition pathways.
     """
     VERSION = 1
+    SUPPORTS_PARTIAL_COLLECT = True
 
     @classmethod
     def name(cls):
@@ -54,7 +55,10 @@ class UserPartitionTransformer(BlockStructureTransformer):
         # topological sort, we know a block's parents are guaranteed to
         # already have merged group access computed before the block
         # itself.
-        for block_key in block_structure.topological_traversal():
+        for block_key in block_structure.topological_traversal(
+                filter_func=block_structure.is_collect_needed,
+                yield_descendants_of_unyielded=True,
+        ):
             xblock = block_structure.get_xblock(block_key)
             parent_keys = block_structure.get_parents(block_key)
             merged_parent_access_list = [
@@ -18,6 +18,7 @@ class VisibilityTransformer(BlockStructureTransformer):
     Staff users are exempted from visibility rules.
     """
     VERSION = 1
+    SUPPORTS_PARTIAL_COLLECT = True
 
     MERGED_VISIBLE_TO_STAFF_ONLY = 'merged_visible_to_staff_only'
 
@@ -46,7 +47,10 @@ class VisibilityTransformer(BlockStructureTransformer):
         Collects any information that's necessary to execute this
         transformer's transform method.
         """
-        for block_key in block_structure.topological_traversal():
+        for block_key in block_structure.topological_traversal(
+                filter_func=block_structure.is_collect_needed,
+                yield_descendants_of_unyielded=True,
+        ):
 
             # compute merged value of visible_to_staff_only from all parents
             parents = block_structure.get_parents(block_key)
@@ -19,12 +19,14 @@ import threading
 from abc import ABCMeta, abstractmethod
 from contextlib import contextmanager
 from django.conf import settings
+import request_cache
 from request_cache.middleware import RequestCache
 from xblock.field_data import FieldData
 from xmodule.modulestore.inheritance import InheritanceMixin
 
 NOTSET = object()
 ENABLED_OVERRIDE_PROVIDERS_KEY = "courseware.field_overrides.enabled_providers.{course_id}"
+INHERITED_OVERRIDES_CACHE_NAME = "courseware.field_overrides.inherited_overrides"
 
 
 def resolve_dotted(name):
@@ -113,6 +115,9 @@ class OverrideFieldData(FieldData):
     def __init__(self, user, fallback, providers):
         self.fallback = fallback
         self.providers = tuple(provider(user) for provider in providers)
+        # Overrides inherited from ancestors are cached per request for the
+        # user and the providers, which determine their values.
+        self._inherited_cache_key = (getattr(user, 'id', None), providers)
 
     def get_override(self, block, name):
         """
@@ -148,10 +153,9 @@ class OverrideFieldData(FieldData):
             # then we want to return False here, so the field_data uses the
             # override and not the original value for this block.
             inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    if self.get_override(ancestor, name) is not NOTSET:
-                        return False
+            if name in inheritable and not overrides_disabled():
+                if self.get_inherited_override(block, name) is not NOTSET:
+                    return False
 
         return has is not NOTSET or self.fallback.has(block, name)
 
@@ -164,12 +168,40 @@ class OverrideFieldData(FieldData):
         if self.providers and not overrides_disabled():
             inheritable = InheritanceMixin.fields.keys()
             if name in inheritable:
-                for ancestor in _lineage(block):
-                    value = self.get_override(ancestor, name)
-                    if value is not NOTSET:
-                        return value
+                value = self.get_inherited_override(block, name)
+                if value is not NOTSET:
+                    return value
         return self.fallback.default(block, name)
 
+    def get_inherited_override(self, block, name):
+        """
+        Checks for an override for the field identified by `name` in the
+        ancestors of `block`, starting with its parent.  Returns the nearest
+        overridden value or `NOTSET` if no override is found.
+
+        During a request, the result is cached for each block and field, so
+        that the overrides of each ancestor are only looked up once.
+        """
+        if request_cache.get_request() is None:
+            for ancestor in _lineage(block):
+                value = self.get_override(ancestor, name)
+                if value is not NOTSET:
+                    return value
+            return NOTSET
+
+        inherited_cache = request_cache.get_cache(INHERITED_OVERRIDES_CACHE_NAME)
+        cache_key = (self._inherited_cache_key, block.location, name)
+        if cache_key not in inherited_cache:
+            parent = block.get_parent()
+            if parent is None:
+                value = NOTSET
+            else:
+                value = self.get_override(parent, name)
+                if value is NOTSET:
+                    value = self.get_inherited_override(parent, name)
+            inherited_cache[cache_key] = value
+        return inherited_cache[cache_key]
+
 
 class _OverridesDisabled(threading.local):
     """
@@ -193,6 +225,14 @@ def disable_overrides():
     _OVERRIDES_DISABLED.disabled = prev
 
 
+def clear_inherited_overrides():
+    """
+    Clears the overrides inherited from ancestors cached during this request.
+    Must be called when overrides are changed.
+    """
+    request_cache.get_cache(INHERITED_OVERRIDES_CACHE_NAME).clear()
+
+
 def overrides_disabled():
     """
     Checks to see whether overrides are disabled in the current context.
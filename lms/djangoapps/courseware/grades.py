@@ -2,20 +2,26 @@
 from __future__ import division
 from collections import defaultdict
 from functools import partial
+from itertools import chain, islice
 import json
 import random
 import logging
 
 from contextlib import contextmanager
+from datetime import datetime, timedelta
+import dateutil.parser
 from django.conf import settings
 from django.test.client import RequestFactory
 from django.core.cache import cache
+from pytz import UTC
 
 import dogstats_wrapper as dog_stats_api
 
+from ccx_keys.locator import CCXLocator
 from courseware import courses
 from courseware.access import has_access
-from courseware.model_data import FieldDataCache, ScoresClient
+from courseware.access_utils import in_preview_mode
+from courseware.model_data import FieldDataCache, PrefetchedUserState, ScoresClient, get_descendant_descriptors
 from student.models import anonymous_id_for_user
 from util.db import outer_atomic
 from util.module_utils import yield_dynamic_descriptor_descendants
@@ -23,15 +29,19 @@ from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .models import PersistedCourseGrade, StudentModule, chunks
 from .module_render import get_module_for_descriptor
 from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from openedx.core.djangoapps.signals.signals import GRADES_UPDATED
 
 
 log = logging.getLogger("edx.courseware")
 
+# Number of students whose StudentModule rows are loaded together by
+# iterate_grades_for.
+GRADING_BATCH_SIZE = 100
+
 
 class MaxScoresCache(object):
     """
@@ -295,13 +305,105 @@ def answer_distributions(course_key):
     return answer_counts
 
 
-def grade(student, request, course, keep_raw_scores=False, field_data_cache=None, scores_client=None):
+def grade(student, request, course, keep_raw_scores=False, field_data_cache=None, scores_client=None,
+          max_scores_cache=None):
     """
     Returns the grade of the student.
 
+    If the ENABLE_PERSISTENT_GRADES feature is enabled, the grade is read
+    from the student's persisted grade when it is still valid, and persisted
+    after being computed otherwise. Raw scores are never persisted.
+
     Also sends a signal to update the minimum grade requirement status.
     """
-    grade_summary = _grade(student, request, course, keep_raw_scores, field_data_cache, scores_client)
+    course_version = None if keep_raw_scores else _get_persisted_course_version(course)
+
+    grade_summary = generation = None
+    if course_version is not None:
+        grade_summary, __, generation = PersistedCourseGrade.get_summaries(student.id, course.id, course_version)
+        if grade_summary is not None:
+            grade_summary = _decode_grade_summary(grade_summary, course.id)
+
+    if grade_summary is None:
+        if course_version is not None:
+            valid_until = _get_access_change_time(course, datetime.now(UTC))
+        grade_summary = _grade(
+            student, request, course, keep_raw_scores, field_data_cache, scores_client, max_scores_cache
+        )
+        if course_version is not None:
+            # Not stored if the grade was invalidated while being computed.
+            PersistedCourseGrade.set_grade_summary(
+                student.id,
+                course.id,
+                generation,
+                course_version,
+                json.dumps(grade_summary, default=_encode_summary_value),
+                valid_until,
+            )
+
+    _send_grades_updated(student, course, grade_summary)
+    return grade_summary
+
+
+def progress_and_grade_summaries(student, request, course):
+    """
+    Returns the progress summary of the student, as `progress_summary` does,
+    and their grade, as `grade` does.
+
+    If the ENABLE_PERSISTENT_GRADES feature is enabled, both are read from
+    the student's persisted grade with a single lookup when they're still
+    valid, and persisted after being computed otherwise, so that the
+    progress page doesn't walk the whole course.
+    """
+    course_version = _get_persisted_course_version(course)
+
+    courseware_summary = grade_summary = generation = None
+    if course_version is not None:
+        grade_summary, courseware_summary, generation = PersistedCourseGrade.get_summaries(
+            student.id, course.id, course_version
+        )
+        if grade_summary is not None:
+            grade_summary = _decode_grade_summary(grade_summary, course.id)
+        if courseware_summary is not None:
+            courseware_summary = _decode_progress_summary(courseware_summary, course.id)
+
+    if courseware_summary is None or grade_summary is None:
+        with outer_atomic():
+            field_data_cache = field_data_cache_for_grading(course, student)
+            scores_client = ScoresClient.from_field_data_cache(field_data_cache)
+
+    if courseware_summary is None:
+        valid_until = _get_access_change_time(course, datetime.now(UTC)) if course_version is not None else None
+        courseware_summary = progress_summary(
+            student, request, course, field_data_cache=field_data_cache, scores_client=scores_client
+        )
+        if courseware_summary is None:
+            # The student doesn't have access to the course.
+            return None, None
+        if course_version is not None:
+            # Not stored if the grade was invalidated while being computed.
+            PersistedCourseGrade.set_progress_summary(
+                student.id,
+                course.id,
+                generation,
+                course_version,
+                json.dumps(courseware_summary, default=_encode_summary_value),
+                valid_until,
+            )
+
+    if grade_summary is None:
+        return courseware_summary, grade(
+            student, request, course, field_data_cache=field_data_cache, scores_client=scores_client
+        )
+
+    _send_grades_updated(student, course, grade_summary)
+    return courseware_summary, grade_summary
+
+
+def _send_grades_updated(student, course, grade_summary):
+    """
+    Sends the signal to update the minimum grade requirement status.
+    """
     responses = GRADES_UPDATED.send_robust(
         sender=None,
         username=student.username,
@@ -313,10 +415,109 @@ def grade(student, request, course, keep_raw_scores=False, field_data_cache=None
     for receiver, response in responses:
         log.info('Signal fired when student grade is calculated. Receiver: %s. Response: %s', receiver, response)
 
+
+def _get_persisted_course_version(course):
+    """
+    Return the version of `course` to persist grades for, or None if grades
+    in the course aren't persisted.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES') or not _can_persist_grade(course):
+        return None
+    return _get_course_version(course)
+
+
+def _get_course_version(course):
+    """
+    Return a string identifying the published version of `course`, which
+    changes whenever its content or grading policy does, or None for courses
+    that don't track when they were last edited (e.g. XML courses).
+    """
+    if course.subtree_edited_on is None:
+        return None
+    return course.subtree_edited_on.isoformat()
+
+
+def _can_persist_grade(course):
+    """
+    Return whether grades in `course` can be persisted. They can't be if
+    some of its problems are always regraded, since their scores change
+    without being saved, or for CCX courses, whose field overrides aren't
+    tracked, or in preview mode, where all content is accessible.
+    """
+    if isinstance(course.id, CCXLocator) or in_preview_mode():
+        return False
+    return not any(
+        descriptor.always_recalculate_grades for descriptor in course.grading_context['all_descriptors']
+    )
+
+
+def _get_access_change_time(course, now):
+    """
+    Return the earliest time after `now` at which a student's access to the
+    graded content of `course` may change as a start date passes, for
+    students or beta testers, or None if all the start dates have passed.
+    """
+    change_times = []
+    for descriptor in [course] + course.grading_context['all_descriptors']:
+        if descriptor.start is None:
+            continue
+        change_times.append(descriptor.start)
+        if descriptor.days_early_for_beta is not None:
+            change_times.append(descriptor.start - timedelta(days=descriptor.days_early_for_beta))
+    return min([change_time for change_time in change_times if change_time > now] or [None])
+
+
+def _decode_grade_summary(encoded_summary, course_key):
+    """
+    Return the grade summary in the course persisted as JSON in `encoded_summary`.
+    """
+    grade_summary = json.loads(encoded_summary)
+    # Convert the totaled scores back into Score tuples.
+    grade_summary['totaled_scores'] = {
+        section_format: [_decode_score(score, course_key) for score in scores]
+        for section_format, scores in grade_summary['totaled_scores'].iteritems()
+    }
     return grade_summary
 
 
-def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_client):
+def _decode_progress_summary(encoded_summary, course_key):
+    """
+    Return the progress summary in the course persisted as JSON in `encoded_summary`.
+    """
+    chapters = json.loads(encoded_summary)
+    for chapter in chapters:
+        for section in chapter['sections']:
+            section['scores'] = [_decode_score(score, course_key) for score in section['scores']]
+            section['section_total'] = _decode_score(section['section_total'], course_key)
+            if section['due'] is not None:
+                section['due'] = dateutil.parser.parse(section['due'])
+    return chapters
+
+
+def _decode_score(encoded_score, course_key):
+    """
+    Return the Score in the course persisted as a JSON list in `encoded_score`.
+    """
+    earned, possible, graded, section, module_id = encoded_score
+    if module_id:
+        # Old Mongo usage keys don't serialize their run, so map them back into the course.
+        module_id = UsageKey.from_string(module_id).map_into_course(course_key)
+    return Score(earned, possible, graded, section, module_id)
+
+
+def _encode_summary_value(obj):
+    """
+    JSON encoder hook for the module ids of the Scores and the due dates in
+    grade and progress summaries.
+    """
+    if isinstance(obj, UsageKey):
+        return unicode(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError("{!r} is not JSON serializable".format(obj))
+
+
+def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_client, max_scores_cache=None):
     """
     Unwrapped version of "grade"
 
@@ -335,6 +536,10 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
 
+    If a `max_scores_cache` is passed in, it is expected to already be
+    populated, and the caller is responsible for pushing it to the remote
+    cache once done.
+
     More information on the format is in the docstring for CourseGrader.
     """
     with outer_atomic():
@@ -356,13 +561,15 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
             course.id.to_deprecated_string(),
             anonymous_id_for_user(student, course.id)
         )
-        max_scores_cache = MaxScoresCache.create_for_course(course)
+        owns_max_scores_cache = max_scores_cache is None
+        if owns_max_scores_cache:
+            max_scores_cache = MaxScoresCache.create_for_course(course)
 
-        # For the moment, we have to get scorable_locations from field_data_cache
-        # and not from scores_client, because scores_client is ignorant of things
-        # in the submissions API. As a further refactoring step, submissions should
-        # be hidden behind the ScoresClient.
-        max_scores_cache.fetch_from_remote(field_data_cache.scorable_locations)
+            # For the moment, we have to get scorable_locations from field_data_cache
+            # and not from scores_client, because scores_client is ignorant of things
+            # in the submissions API. As a further refactoring step, submissions should
+            # be hidden behind the ScoresClient.
+            max_scores_cache.fetch_from_remote(field_data_cache.scorable_locations)
 
     grading_context = course.grading_context
     raw_scores = []
@@ -488,7 +695,8 @@ def _grade(student, request, course, keep_raw_scores, field_data_cache, scores_c
             # so grader can be double-checked
             grade_summary['raw_scores'] = raw_scores
 
-        max_scores_cache.push_to_remote()
+        if owns_max_scores_cache:
+            max_scores_cache.push_to_remote()
 
     return grade_summary
 
@@ -769,34 +977,111 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     - grade_breakdown : A breakdown of the major components that
         make up the final grade. (For display)
     - raw_scores: contains scores for every graded module
+
+    Students are graded in batches of GRADING_BATCH_SIZE. The course tree is
+    only walked once and the max scores cache is shared by all students,
+    while StudentModule rows are loaded for a whole batch of students at a
+    time rather than once per student.
     """
     if isinstance(course_or_id, (basestring, CourseKey)):
         course = courses.get_course_by_id(course_or_id)
     else:
         course = course_or_id
 
-    for student in students:
-        with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
-            try:
-                request = _get_mock_request(student)
-                # Grading calls problem rendering, which calls masquerading,
-                # which checks session vars -- thus the empty session dict below.
-                # It's not pretty, but untangling that is currently beyond the
-                # scope of this feature.
-                request.session = {}
-                gradeset = grade(student, request, course, keep_raw_scores)
-                yield student, gradeset, ""
-            except Exception as exc:  # pylint: disable=broad-except
-                # Keep marching on even if this student couldn't be graded for
-                # some reason, but log it for future reference.
-                log.exception(
-                    'Cannot grade student %s (%s) in course %s because of exception: %s',
-                    student.username,
-                    student.id,
-                    course.id,
-                    exc.message
-                )
-                yield student, {}, exc.message
+    descriptor_filter = partial(descriptor_affects_grading, course.block_types_affecting_grading)
+    grading_descriptors = get_descendant_descriptors(course, descriptor_filter=descriptor_filter)
+    usage_keys = set(descriptor.scope_ids.usage_id for descriptor in grading_descriptors)
+    scorable_locations = set(descriptor.location for descriptor in grading_descriptors if descriptor.has_score)
+
+    max_scores_cache = MaxScoresCache.create_for_course(course)
+    max_scores_cache.fetch_from_remote(scorable_locations)
+
+    students = iter(students)
+    while True:
+        student_batch = list(islice(students, GRADING_BATCH_SIZE))
+        if not student_batch:
+            break
+
+        with outer_atomic():
+            user_states, scores = _fetch_student_modules_for_grading(
+                course.id, [student.id for student in student_batch], usage_keys, scorable_locations
+            )
+
+        for student in student_batch:
+            with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
+                try:
+                    request = _get_mock_request(student)
+                    # Grading calls problem rendering, which calls masquerading,
+                    # which checks session vars -- thus the empty session dict below.
+                    # It's not pretty, but untangling that is currently beyond the
+                    # scope of this feature.
+                    request.session = {}
+                    with outer_atomic():
+                        field_data_cache = FieldDataCache(
+                            grading_descriptors,
+                            course.id,
+                            student,
+                            prefetched_user_state=PrefetchedUserState(usage_keys, user_states[student.id]),
+                        )
+                    scores_client = ScoresClient.from_prefetched_scores(course.id, student.id, scores[student.id])
+                    gradeset = grade(
+                        student, request, course, keep_raw_scores, field_data_cache, scores_client, max_scores_cache
+                    )
+                    yield student, gradeset, ""
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Keep marching on even if this student couldn't be graded for
+                    # some reason, but log it for future reference.
+                    log.exception(
+                        'Cannot grade student %s (%s) in course %s because of exception: %s',
+                        student.username,
+                        student.id,
+                        course.id,
+                        exc.message
+                    )
+                    yield student, {}, exc.message
+
+        max_scores_cache.push_to_remote()
+
+
+def _fetch_student_modules_for_grading(course_key, student_ids, usage_keys, scorable_locations):
+    """
+    Load the StudentModule rows of all the given students for the blocks
+    in `usage_keys` with as few queries as possible.
+
+    Returns a tuple of two dicts, both keyed by student id:
+
+    - the Scope.user_state of each student, as a dict mapping usage keys to
+      dicts of field names to values, suitable for a PrefetchedUserState.
+    - the scores of each student for `scorable_locations`, as a dict mapping
+      locations to ScoresClient.Score tuples.
+    """
+    user_states = {student_id: {} for student_id in student_ids}
+    scores = {student_id: {} for student_id in student_ids}
+
+    student_modules = chain.from_iterable(
+        StudentModule.objects.filter(
+            student_id__in=student_ids,
+            course_id=course_key,
+            module_state_key__in=usage_keys_chunk,
+        ).values_list('student_id', 'module_state_key', 'state', 'grade', 'max_grade')
+        for usage_keys_chunk in chunks(list(usage_keys), 500)
+    )
+
+    for student_id, module_state_key, state, correct, total in student_modules:
+        # Locations in StudentModule don't necessarily have course key info
+        # attached to them (since old mongo identifiers don't include runs).
+        usage_key = UsageKey.from_string(module_state_key).map_into_course(course_key)
+        if usage_key in scorable_locations:
+            scores[student_id][usage_key] = ScoresClient.Score(correct, total)
+
+        # A state of None means the student has never looked at the block, and
+        # an empty dict means its state has been deleted; neither is cached.
+        if state is not None:
+            state = json.loads(state)
+            if state:
+                user_states[student_id][usage_key] = state
+
+    return user_states, scores
 
 
 def _get_mock_request(student):
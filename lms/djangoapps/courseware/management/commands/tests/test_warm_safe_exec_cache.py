@@ -0,0 +1,90 @@
+"""Tests for the warm_safe_exec_cache management command"""
+
+import textwrap
+from StringIO import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from mock import Mock, patch
+
+from capa.capa_problem import ProblemTemplateCache
+from capa.safe_exec.result_cache import SafeExecCache
+from capa.tests.response_xml_factory import CustomResponseXMLFactory
+from courseware.management.commands.warm_safe_exec_cache import Command
+from xmodule.capa_base import MAX_RANDOMIZATION_BINS, NUM_RANDOMIZATION_BINS
+from xmodule.capa_base_constants import RANDOMIZATION
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+
+class WarmSafeExecCacheTest(ModuleStoreTestCase):
+    """
+    Test that the command runs the code of the problems of a course for each seed.
+    """
+    def setUp(self):
+        super(WarmSafeExecCacheTest, self).setUp()
+        self.course = CourseFactory.create()
+        for rerandomize in ('per_student', 'never'):
+            script = textwrap.dedent("""
+                def check_func(expect, answer_given):
+                    return answer_given == expect
+
+                answer = random.randint(0, 1000)  # {}
+            """).format(rerandomize)
+            problem_xml = CustomResponseXMLFactory().build_xml(script=script, cfn='check_func', expect='42')
+            ItemFactory.create(
+                parent=self.course, category='problem', data=problem_xml, metadata={'rerandomize': rerandomize}
+            )
+        self.cache = SafeExecCache(shared_cache=DictCache())
+
+        # Don't reuse the problems' templates, so that their code is run each time.
+        patcher = patch('capa.capa_problem.PROBLEM_TEMPLATE_CACHE', ProblemTemplateCache(max_size=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def call_command(self, *args, **kwargs):
+        """
+        Call the command with the test cache, returning its output.
+        """
+        out = StringIO()
+        with patch(
+            'courseware.management.commands.warm_safe_exec_cache.get_safe_exec_cache', return_value=self.cache
+        ):
+            call_command('warm_safe_exec_cache', *args, stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_warm(self):
+        output = self.call_command(unicode(self.course.id), seeds=3)
+        self.assertIn('Ran the code of 4 problem variants (0 failed)', output)
+        self.assertEqual(self.cache.misses, 4)
+
+        # Warming again finds all the results in the cache.
+        self.call_command(unicode(self.course.id), seeds=3)
+        self.assertEqual(self.cache.stats()['shared_hits'], 4)
+
+    def test_seeds(self):
+        # The seeds are those students can get for each kind of randomization.
+        for rerandomize, num_seeds in (
+                (RANDOMIZATION.NEVER, 1),
+                (RANDOMIZATION.PER_STUDENT, NUM_RANDOMIZATION_BINS),
+                (RANDOMIZATION.ALWAYS, MAX_RANDOMIZATION_BINS),
+                (RANDOMIZATION.ONRESET, MAX_RANDOMIZATION_BINS),
+        ):
+            self.assertEqual(len(Command.seeds(Mock(rerandomize=rerandomize))), num_seeds)
+
+    def test_invalid_course(self):
+        with self.assertRaises(CommandError):
+            self.call_command('not/a/course')
+
+
+class DictCache(object):
+    """A cache implementation over a simple dict, for testing."""
+
+    def __init__(self):
+        self.cache = {}
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache[key] = value
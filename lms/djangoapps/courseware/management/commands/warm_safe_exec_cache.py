@@ -0,0 +1,126 @@
+"""
+A Django command that pre-warms the cache of sandboxed code execution results
+for the problems of a course, by running their script code for the seeds
+students are likely to get.
+
+This avoids running the code of each problem in the sandbox again for each
+student, e.g. when rescoring a problem for all the students of a course.
+"""
+import logging
+from optparse import make_option
+from textwrap import dedent
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from capa.capa_problem import LoncapaProblem, LoncapaSystem
+from edxmako.shortcuts import render_to_string
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip, get_safe_exec_cache
+from xmodule.capa_base import MAX_RANDOMIZATION_BINS, NUM_RANDOMIZATION_BINS
+from xmodule.capa_base_constants import RANDOMIZATION
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import modulestore, ModuleI18nService
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Pre-warm the safe_exec cache for the problems of a course.
+    """
+    args = "<course_id>"
+    help = dedent(__doc__).strip()
+    option_list = BaseCommand.option_list + (
+        make_option('--seeds',
+                    action='store',
+                    type='int',
+                    default=None,
+                    help='Maximum number of seeds to warm for each randomized problem '
+                         '(default: all the seeds students can get)'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("course_id not specified")
+
+        try:
+            course_key = CourseKey.from_string(args[0])
+        except InvalidKeyError:
+            raise CommandError("Invalid course_id")
+
+        store = modulestore()
+        if store.get_course(course_key) is None:
+            raise CommandError("Invalid course_id")
+
+        cache = get_safe_exec_cache()
+        warmed = failed = 0
+        for problem in store.get_items(course_key, qualifiers={'category': 'problem'}):
+            if 'anonymous_student_id' in problem.data:
+                # The results of the problem's code differ for each student.
+                continue
+            seeds = self.seeds(problem)
+            if options['seeds'] is not None:
+                seeds = seeds[:options['seeds']]
+            for seed in seeds:
+                try:
+                    LoncapaProblem(
+                        problem_text=problem.data,
+                        id=problem.location.html_id(),
+                        seed=seed,
+                        capa_system=self.capa_system(course_key, problem, cache),
+                        capa_module=problem,
+                    )
+                except Exception:  # pylint: disable=broad-except
+                    log.exception(u"Error running the code of %s with seed %s", problem.location, seed)
+                    failed += 1
+                else:
+                    warmed += 1
+
+        self.stdout.write(
+            u"Ran the code of {} problem variants ({} failed); cache stats: {}\n".format(
+                warmed + failed, failed, cache.stats()
+            )
+        )
+
+    @staticmethod
+    def seeds(problem):
+        """
+        Return the seeds students can get for the problem, as chosen by
+        `CapaMixin.choose_new_seed`: per_student problems are binned by the
+        student's seed, while those rerandomized on each attempt get any of
+        MAX_RANDOMIZATION_BINS seeds.
+        """
+        if problem.rerandomize == RANDOMIZATION.NEVER:
+            return [1]
+        if problem.rerandomize == RANDOMIZATION.PER_STUDENT:
+            return range(NUM_RANDOMIZATION_BINS)
+        return range(MAX_RANDOMIZATION_BINS)
+
+    @staticmethod
+    def capa_system(course_key, problem, cache):
+        """
+        Return a LoncapaSystem for constructing the problem, which is never
+        rendered for or graded for any student.
+        """
+        return LoncapaSystem(
+            ajax_url=None,
+            anonymous_student_id='',
+            cache=cache,
+            can_execute_unsafe_code=lambda: can_execute_unsafe_code(course_key),
+            get_python_lib_zip=lambda: get_python_lib_zip(contentstore, course_key),
+            DEBUG=settings.DEBUG,
+            filestore=problem.runtime.resources_fs,
+            i18n=ModuleI18nService(),
+            node_path=settings.NODE_PATH,
+            render_template=render_to_string,
+            seed=None,
+            STATIC_URL=settings.STATIC_URL,
+            xqueue={
+                'interface': None,
+                'construct_callback': lambda dispatch='score_update': None,
+                'default_queuename': '',
+                'waittime': settings.XQUEUE_WAITTIME_BETWEEN_REQUESTS,
+            },
+        )
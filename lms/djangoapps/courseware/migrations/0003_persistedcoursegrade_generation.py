@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseware', '0002_persistedcoursegrade'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='persistedcoursegrade',
+            name='generation',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='persistedcoursegrade',
+            name='valid_until',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseware', '0003_persistedcoursegrade_generation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='persistedcoursegrade',
+            name='progress_summary',
+            field=models.TextField(default=''),
+        ),
+    ]
@@ -24,6 +24,7 @@ DjangoOrmFieldCache: A base-class for single-row-per-field caches.
 import json
 from abc import abstractmethod, ABCMeta
 from collections import defaultdict, namedtuple
+import dogstats_wrapper as dog_stats_api
 from .models import (
     StudentModule,
     XModuleUserStateSummaryField,
@@ -86,6 +87,84 @@ def _all_block_types(descriptors, aside_types):
     return block_types
 
 
+# Map of XBlock classes to a map of scopes to the fields of that class in the scope.
+# {class: {Scope: set(Field)}}
+_FIELDS_BY_SCOPE_FOR_CLASS = {}
+
+
+def _fields_by_scope(descriptor):
+    """
+    Return a dict mapping scopes to the set of fields the `descriptor` has in that scope.
+    This is computed once per XBlock class.
+    """
+    descriptor_class = type(descriptor)
+    if descriptor_class not in _FIELDS_BY_SCOPE_FOR_CLASS:
+        fields_by_scope = defaultdict(set)
+        for field in descriptor.fields.values():
+            fields_by_scope[field.scope].add(field)
+        _FIELDS_BY_SCOPE_FOR_CLASS[descriptor_class] = dict(fields_by_scope)
+    return _FIELDS_BY_SCOPE_FOR_CLASS[descriptor_class]
+
+
+def plan_prefetch(descriptors, aside_types):
+    """
+    Return a dict mapping each scope to the fields to load in that scope for the
+    `descriptors`, and the descriptors to load them for.
+
+    Only the descriptors whose block types have fields in a scope are included
+    for that scope, so that each scope's data is loaded in a single batch for
+    only the blocks that may store it. Asides may store data in any scope for
+    any descriptor, so all descriptors are included when there are
+    `aside_types`.
+
+    Returns:
+        {Scope: (set(Field), [XModuleDescriptor])}
+    """
+    plan = defaultdict(lambda: (set(), []))
+    for descriptor in descriptors:
+        for scope, fields in _fields_by_scope(descriptor).iteritems():
+            scope_fields, scope_descriptors = plan[scope]
+            scope_fields.update(fields)
+            scope_descriptors.append(descriptor)
+
+    if aside_types:
+        return {scope: (fields, list(descriptors)) for scope, (fields, __) in plan.iteritems()}
+    return dict(plan)
+
+
+def get_descendant_descriptors(descriptor, depth=None, descriptor_filter=lambda descriptor: True):
+    """
+    Return a list of `descriptor` and its descendants down to the specified
+    depth that match the descriptor filter.
+
+    Arguments:
+        descriptor: The parent to search inside
+        depth: The number of levels to descend, or None for infinite depth
+        descriptor_filter(descriptor): A function that returns True
+            if descriptor should be included in the results
+    """
+    def get_child_descriptors(descriptor, depth, descriptor_filter):
+        """
+        Return a list of all child descriptors down to the specified depth
+        that match the descriptor filter. Includes `descriptor`
+        """
+        if descriptor_filter(descriptor):
+            descriptors = [descriptor]
+        else:
+            descriptors = []
+
+        if depth is None or depth > 0:
+            new_depth = depth - 1 if depth is not None else depth
+
+            for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
+                descriptors.extend(get_child_descriptors(child, new_depth, descriptor_filter))
+
+        return descriptors
+
+    with modulestore().bulk_operations(descriptor.location.course_key):
+        return get_child_descriptors(descriptor, depth, descriptor_filter)
+
+
 class DjangoKeyValueStore(KeyValueStore):
     """
     This KeyValueStore will read and write data in the following scopes to django models
@@ -349,11 +428,20 @@ class UserStateCache(object):
     """
     Cache for Scope.user_state xblock field data.
     """
-    def __init__(self, user, course_id):
+    def __init__(self, user, course_id, prefetched_state=None):
+        """
+        Arguments:
+            user: The user whose state is cached.
+            course_id: The course the state belongs to.
+            prefetched_state (:class:`PrefetchedUserState`): State that has already been
+                loaded for this user (e.g. in bulk for many users at once). Blocks covered
+                by it are never read from the database.
+        """
         self._cache = defaultdict(dict)
         self.course_id = course_id
         self.user = user
         self._client = DjangoXBlockUserStateClient(self.user)
+        self._prefetched_state = prefetched_state
 
     def cache_fields(self, fields, xblocks, aside_types):  # pylint: disable=unused-argument
         """
@@ -365,9 +453,15 @@ class UserStateCache(object):
             xblocks (list of :class:`XBlock`): XBlocks to cache fields for.
             aside_types (list of str): Aside types to cache fields for.
         """
+        usage_keys = _all_usage_keys(xblocks, aside_types)
+        if self._prefetched_state is not None:
+            usage_keys = self._prefetched_state.copy_into(self._cache, usage_keys)
+            if not usage_keys:
+                return
+
         block_field_state = self._client.get_many(
             self.user.username,
-            _all_usage_keys(xblocks, aside_types),
+            usage_keys,
         )
         for user_state in block_field_state:
             self._cache[user_state.block_key] = user_state.state
@@ -497,6 +591,36 @@ class UserStateCache(object):
         return key.block_scope_id
 
 
+class PrefetchedUserState(object):
+    """
+    Scope.user_state field data for a single user that was loaded ahead of
+    time for a known set of blocks, to be handed to a :class:`FieldDataCache`.
+    """
+    def __init__(self, usage_keys, block_states):
+        """
+        Arguments:
+            usage_keys (set of :class:`UsageKey`): Every block that state was loaded for,
+                including blocks for which the user has no state.
+            block_states (dict): Maps the usage keys of blocks that have state to
+                dicts of field names to values.
+        """
+        self.usage_keys = usage_keys
+        self.block_states = block_states
+
+    def copy_into(self, cache, usage_keys):
+        """
+        Copy the state of those of `usage_keys` that were prefetched into the
+        dict `cache`, and return the list of the remaining usage keys.
+        """
+        remaining_keys = []
+        for usage_key in usage_keys:
+            if usage_key not in self.usage_keys:
+                remaining_keys.append(usage_key)
+            elif usage_key in self.block_states:
+                cache[usage_key] = dict(self.block_states[usage_key])
+        return remaining_keys
+
+
 class UserStateSummaryCache(DjangoOrmFieldCache):
     """
     Cache for Scope.user_state_summary xblock field data.
@@ -686,7 +810,8 @@ class FieldDataCache(object):
     A cache of django model objects needed to supply the data
     for a module and its descendants
     """
-    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None):
+    def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None,
+                 prefetched_user_state=None):
         """
         Find any courseware.models objects that are needed by any descriptor
         in descriptors. Attempts to minimize the number of queries to the database.
@@ -699,6 +824,8 @@ class FieldDataCache(object):
         user: The user for which to cache data
         select_for_update: Ignored
         asides: The list of aside types to load, or None to prefetch no asides.
+        prefetched_user_state: A PrefetchedUserState holding already loaded
+            Scope.user_state data for `user`, or None to load it from the database.
         """
         if asides is None:
             self.asides = []
@@ -713,6 +840,7 @@ class FieldDataCache(object):
             Scope.user_state: UserStateCache(
                 self.user,
                 self.course_id,
+                prefetched_user_state,
             ),
             Scope.user_info: UserInfoCache(
                 self.user,
@@ -725,6 +853,12 @@ class FieldDataCache(object):
             ),
         }
         self.scorable_locations = set()
+
+        # Number of rows loaded into the cache of each scope, and the keys
+        # of the rows that were read, for instrumentation.
+        self._rows_fetched = defaultdict(int)
+        self._rows_used = defaultdict(set)
+
         self.add_descriptors_to_cache(descriptors)
 
     def add_descriptors_to_cache(self, descriptors):
@@ -733,11 +867,13 @@ class FieldDataCache(object):
         """
         if self.user.is_authenticated():
             self.scorable_locations.update(desc.location for desc in descriptors if desc.has_score)
-            for scope, fields in self._fields_to_cache(descriptors).items():
+            for scope, (fields, scope_descriptors) in plan_prefetch(descriptors, self.asides).iteritems():
                 if scope not in self.cache:
                     continue
 
-                self.cache[scope].cache_fields(fields, descriptors, self.asides)
+                rows_before = len(self.cache[scope])
+                self.cache[scope].cache_fields(fields, scope_descriptors, self.asides)
+                self._rows_fetched[scope] += len(self.cache[scope]) - rows_before
 
     def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=lambda descriptor: True):
         """
@@ -750,34 +886,7 @@ class FieldDataCache(object):
             descriptor_filter is a function that accepts a descriptor and return whether the field data
                 should be cached
         """
-
-        def get_child_descriptors(descriptor, depth, descriptor_filter):
-            """
-            Return a list of all child descriptors down to the specified depth
-            that match the descriptor filter. Includes `descriptor`
-
-            descriptor: The parent to search inside
-            depth: The number of levels to descend, or None for infinite depth
-            descriptor_filter(descriptor): A function that returns True
-                if descriptor should be included in the results
-            """
-            if descriptor_filter(descriptor):
-                descriptors = [descriptor]
-            else:
-                descriptors = []
-
-            if depth is None or depth > 0:
-                new_depth = depth - 1 if depth is not None else depth
-
-                for child in descriptor.get_children() + descriptor.get_required_module_descriptors():
-                    descriptors.extend(get_child_descriptors(child, new_depth, descriptor_filter))
-
-            return descriptors
-
-        with modulestore().bulk_operations(descriptor.location.course_key):
-            descriptors = get_child_descriptors(descriptor, depth, descriptor_filter)
-
-        self.add_descriptors_to_cache(descriptors)
+        self.add_descriptors_to_cache(get_descendant_descriptors(descriptor, depth, descriptor_filter))
 
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
@@ -797,15 +906,38 @@ class FieldDataCache(object):
         cache.add_descriptor_descendents(descriptor, depth, descriptor_filter)
         return cache
 
-    def _fields_to_cache(self, descriptors):
+    def prefetch_stats(self):
+        """
+        Returns a dict mapping each scope's name to the number of rows that were
+        loaded into the cache for it, and the number of those that were read.
+        """
+        return {
+            scope.name: {
+                'fetched': self._rows_fetched[scope],
+                'used': len(self._rows_used[scope]),
+            }
+            for scope in self.cache
+        }
+
+    def report_prefetch_stats(self):
         """
-        Returns a map of scopes to fields in that scope that should be cached
+        Sends the prefetch_stats of this cache to DataDog.
         """
-        scope_map = defaultdict(set)
-        for descriptor in descriptors:
-            for field in descriptor.fields.values():
-                scope_map[field.scope].add(field)
-        return scope_map
+        for scope_name, stats in self.prefetch_stats().iteritems():
+            tags = [u'scope:{}'.format(scope_name)]
+            dog_stats_api.histogram('FieldDataCache.rows_fetched', stats['fetched'], tags=tags)
+            dog_stats_api.histogram('FieldDataCache.rows_used', stats['used'], tags=tags)
+
+    def _record_row_used(self, key):
+        """
+        Records that the row storing the field identified by `key` was read.
+        Scope.user_state is stored in one row per block, the other scopes in one
+        row per field.
+        """
+        if key.scope == Scope.user_state:
+            self._rows_used[key.scope].add(key.block_scope_id)
+        else:
+            self._rows_used[key.scope].add((key.block_scope_id, key.field_name))
 
     @contract(key=DjangoKeyValueStore.Key)
     def get(self, key):
@@ -827,7 +959,9 @@ class FieldDataCache(object):
         if key.scope not in self.cache:
             raise KeyError(key.field_name)
 
-        return self.cache[key.scope].get(key)
+        value = self.cache[key.scope].get(key)
+        self._record_row_used(key)
+        return value
 
     @contract(kv_dict="dict(DjangoKeyValueStore_Key: *)")
     def set_many(self, kv_dict):
@@ -904,7 +1038,10 @@ class FieldDataCache(object):
         if key.scope not in self.cache:
             return False
 
-        return self.cache[key.scope].has(key)
+        if self.cache[key.scope].has(key):
+            self._record_row_used(key)
+            return True
+        return False
 
     @contract(key=DjangoKeyValueStore.Key, returns="datetime|None")
     def last_modified(self, key):
@@ -989,6 +1126,17 @@ class ScoresClient(object):
         client.fetch_scores(fd_cache.scorable_locations)
         return client
 
+    @classmethod
+    def from_prefetched_scores(cls, course_key, user_id, locations_to_scores):
+        """
+        Create a ScoresClient from scores that have already been loaded, as a
+        dict mapping locations to Score tuples.
+        """
+        client = cls(course_key, user_id)
+        client._locations_to_scores.update(locations_to_scores)  # pylint: disable=protected-access
+        client._has_fetched = True  # pylint: disable=protected-access
+        return client
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
@@ -17,12 +17,18 @@ import itertools
 
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver, Signal
+from django.utils import timezone
 
 from model_utils.models import TimeStampedModel
-from student.models import user_by_anonymous_id
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from openedx.core.djangoapps.course_groups.models import CourseUserGroup, CourseUserGroupPartitionGroup
+from openedx.core.djangoapps.user_api.models import UserCourseTag
+from student.models import CourseAccessRole, CourseEnrollment, user_by_anonymous_id
 from submissions.models import score_set, score_reset
 
 from xmodule_django.models import CourseKeyField, LocationKeyField, BlockTypeKeyField
@@ -295,6 +301,235 @@ class OfflineComputedGradeLog(models.Model):
         return "[OCGLog] %s: %s" % (self.course_id.to_deprecated_string(), self.created)  # pylint: disable=no-member
 
 
+class PersistedCourseGrade(models.Model):
+    """
+    The most recently computed grade and progress summaries of a user in a
+    course, so that `courseware.grades.grade` and the progress page don't
+    have to walk the whole course every time they're needed.
+
+    The summaries are only valid for the version of the course they were
+    computed against (see `course_version`), and until `valid_until`, when
+    the user's access to graded content may change as a start date passes.
+    They are invalidated whenever something else they depend on changes: one
+    of the user's scores, enrollment, cohort, partition groups, roles or
+    field overrides in the course.  Invalidating them increments
+    `generation`, so that summaries computed before the change aren't stored.
+    """
+    class Meta(object):
+        app_label = "courseware"
+        unique_together = (('user', 'course_id'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+
+    # Identifies the published version of the course the summaries were computed for.
+    course_version = models.CharField(max_length=255)
+
+    # The grade summary, stored as JSON, or empty if there isn't a valid one.
+    grade_summary = models.TextField()
+
+    # The progress summary, stored as JSON, or empty if there isn't a valid one.
+    progress_summary = models.TextField(default='')
+
+    # When the summaries expire, if ever.
+    valid_until = models.DateTimeField(null=True)
+
+    # Incremented whenever the grade of the user is invalidated.
+    generation = models.IntegerField(default=0)
+
+    modified = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def get_summaries(cls, user_id, course_key, course_version):
+        """
+        Return (grade_summary, progress_summary, generation): the JSON encoded
+        grade and progress summaries stored for the user in the given version
+        of the course, each None if there isn't a valid one, and the
+        generation of the user's grade to pass to `set_grade_summary` and
+        `set_progress_summary`, or None if nothing is stored for the user.
+        """
+        persisted_grade = cls.objects.filter(user_id=user_id, course_id=course_key).first()
+        if persisted_grade is None:
+            return None, None, None
+        if persisted_grade.course_version != course_version or (
+                persisted_grade.valid_until is not None and persisted_grade.valid_until <= timezone.now()
+        ):
+            return None, None, persisted_grade.generation
+        return (
+            persisted_grade.grade_summary or None,
+            persisted_grade.progress_summary or None,
+            persisted_grade.generation,
+        )
+
+    @classmethod
+    def set_grade_summary(cls, user_id, course_key, generation, course_version, grade_summary, valid_until=None):
+        """
+        Store the JSON encoded `grade_summary` of the user for the given
+        version of the course, valid until `valid_until`, unless the user's
+        grade was invalidated since `generation` was read.  Returns whether
+        it was stored.
+        """
+        return cls._set_summary(
+            user_id, course_key, generation, course_version, valid_until, grade_summary=grade_summary
+        )
+
+    @classmethod
+    def set_progress_summary(cls, user_id, course_key, generation, course_version, progress_summary,
+                             valid_until=None):
+        """
+        Store the JSON encoded `progress_summary` of the user for the given
+        version of the course, valid until `valid_until`, unless the user's
+        grade was invalidated since `generation` was read.  Returns whether
+        it was stored.
+        """
+        return cls._set_summary(
+            user_id, course_key, generation, course_version, valid_until, progress_summary=progress_summary
+        )
+
+    @classmethod
+    def _set_summary(cls, user_id, course_key, generation, course_version, valid_until, **summary):
+        """
+        Store the given summary of the user, keeping the other one only if it
+        was computed for the same version of the course and access.
+        """
+        if generation is None:
+            # Nothing was stored for the user when the summary was read, so
+            # nothing can have been invalidated since.
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        user_id=user_id,
+                        course_id=course_key,
+                        course_version=course_version,
+                        valid_until=valid_until,
+                        **summary
+                    )
+                return True
+            except IntegrityError:
+                # The grade was stored or invalidated concurrently.
+                return False
+
+        persisted_grades = cls.objects.filter(user_id=user_id, course_id=course_key, generation=generation)
+        if persisted_grades.filter(course_version=course_version, valid_until=valid_until).update(**summary):
+            return True
+        summary.setdefault('grade_summary', '')
+        summary.setdefault('progress_summary', '')
+        return bool(persisted_grades.update(course_version=course_version, valid_until=valid_until, **summary))
+
+    @classmethod
+    def invalidate(cls, user_id, course_key=None):
+        """
+        Discard the stored summaries of the user in the course, or in all
+        courses if `course_key` is None.
+        """
+        persisted_grades = cls.objects.filter(user_id=user_id)
+        if course_key is None:
+            persisted_grades.update(generation=F('generation') + 1, grade_summary='', progress_summary='')
+            return
+
+        persisted_grades = persisted_grades.filter(course_id=course_key)
+        if persisted_grades.update(generation=F('generation') + 1, grade_summary='', progress_summary=''):
+            return
+        # Record the invalidation, so that summaries being computed for the
+        # user's first stored grade aren't stored.
+        try:
+            with transaction.atomic():
+                cls.objects.create(user_id=user_id, course_id=course_key, generation=1)
+        except IntegrityError:
+            persisted_grades.update(generation=F('generation') + 1, grade_summary='', progress_summary='')
+
+    @classmethod
+    def invalidate_course(cls, course_key):
+        """
+        Discard the stored summaries of all the users in the course.
+        """
+        cls.objects.filter(course_id=course_key).update(
+            generation=F('generation') + 1, grade_summary='', progress_summary=''
+        )
+
+    def __unicode__(self):
+        return u"[PersistedCourseGrade] {}: {} ({})".format(self.user_id, self.course_id, self.course_version)
+
+
+@receiver(post_save, sender=StudentModule)
+@receiver(post_delete, sender=StudentModule)
+def invalidate_persisted_grade(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discard the persisted grade of a student when one of their scores is
+    saved or deleted. StudentModules that have never held a score don't
+    affect grades, so saving their state is ignored.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        return
+    if instance.grade is not None or instance.max_grade is not None:
+        PersistedCourseGrade.invalidate(instance.student_id, instance.course_id)
+
+
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_save, sender=UserCourseTag)
+def invalidate_persisted_grade_for_user(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discard the persisted grade of a user when their enrollment mode or
+    random partition groups in the course change, which may change the
+    content they are graded on.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        return
+    PersistedCourseGrade.invalidate(instance.user_id, instance.course_id)
+
+
+@receiver(post_save, sender=CourseAccessRole)
+@receiver(post_delete, sender=CourseAccessRole)
+def invalidate_persisted_grades_for_role(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discard the persisted grades of a user when their roles change, since
+    staff and beta testers have access to content other students don't.
+    Org and global roles apply to many courses, so all the user's grades
+    are discarded.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        return
+    PersistedCourseGrade.invalidate(instance.user_id, instance.course_id or None)
+
+
+@receiver(m2m_changed, sender=CourseUserGroup.users.through)
+def invalidate_persisted_grades_for_cohort(sender, instance, action, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discard the persisted grades of users added to or removed from a
+    cohort, whose content groups change.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        return
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    pk_set = kwargs['pk_set']
+    if kwargs['reverse']:
+        # The instance is a user, and pk_set the ids of the groups.
+        groups = CourseUserGroup.objects.filter(id__in=pk_set) if pk_set else instance.course_groups.all()
+        for group in groups:
+            PersistedCourseGrade.invalidate(instance.id, group.course_id)
+    elif pk_set:
+        for user_id in pk_set:
+            PersistedCourseGrade.invalidate(user_id, instance.course_id)
+    else:
+        PersistedCourseGrade.invalidate_course(instance.course_id)
+
+
+@receiver(pre_delete, sender=CourseUserGroup)
+@receiver(post_save, sender=CourseUserGroupPartitionGroup)
+@receiver(post_delete, sender=CourseUserGroupPartitionGroup)
+def invalidate_persisted_grades_for_cohort_groups(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discard the persisted grades of all the users of a course when one of
+    its cohorts is deleted or linked to another content group.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        return
+    if isinstance(instance, CourseUserGroupPartitionGroup):
+        instance = instance.course_user_group
+    PersistedCourseGrade.invalidate_course(instance.course_id)
+
+
 class StudentFieldOverride(TimeStampedModel):
     """
     Holds the value of a specific field overriden for a student.  This is used
@@ -313,6 +548,18 @@ class StudentFieldOverride(TimeStampedModel):
     value = models.TextField(default='null')
 
 
+@receiver(post_save, sender=StudentFieldOverride)
+@receiver(post_delete, sender=StudentFieldOverride)
+def invalidate_persisted_grade_for_override(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discard the persisted grade of a student when one of their individual
+    field overrides, such as a start or due date, changes.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        return
+    PersistedCourseGrade.invalidate(instance.student_id, instance.course_id)
+
+
 # Signal that indicates that a user's score for a problem has been updated.
 # This signal is generated when a scoring event occurs either within the core
 # platform or in the Submissions module. Note that this signal will be triggered
@@ -409,3 +656,40 @@ def submissions_score_reset_handler(sender, **kwargs):  # pylint: disable=unused
             u"Failed to process score_reset signal from Submissions API. "
             "user: %s, course_id: %s, usage_id: %s", user, course_id, usage_id
         )
+
+
+@receiver(SCORE_CHANGED)
+def score_changed_handler(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discard the persisted grade of the user whose score changed.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        return
+    _invalidate_persisted_grade_for_score(kwargs['user_id'], kwargs['course_id'])
+
+
+@receiver(score_set)
+def submissions_score_set_grade_handler(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Discard the persisted grade of the user whose score was set in the
+    Submissions API. SCORE_CHANGED isn't sent for scores of 0, which still
+    change the grade.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+        return
+    user = user_by_anonymous_id(kwargs.get('anonymous_user_id'))
+    if user is not None and kwargs.get('course_id'):
+        _invalidate_persisted_grade_for_score(user.id, kwargs['course_id'])
+
+
+def _invalidate_persisted_grade_for_score(user_id, course_id):
+    """
+    Discard the persisted grade of the user in the course with the given
+    unicode id.
+    """
+    try:
+        course_key = CourseKey.from_string(course_id)
+    except InvalidKeyError:
+        log.warning(u"Unable to invalidate persisted grade for invalid course id %s", course_id)
+        return
+    PersistedCourseGrade.invalidate(user_id, course_key)
@@ -4,9 +4,14 @@ by the individual due dates feature.
 """
 import json
 
-from .field_overrides import FieldOverrideProvider
+import request_cache
+
+from .field_overrides import FieldOverrideProvider, clear_inherited_overrides
 from .models import StudentFieldOverride
 
+# Name of the request cache of each user's overrides in each course.
+OVERRIDES_CACHE_NAME = 'courseware.student_field_overrides'
+
 
 class IndividualStudentOverrideProvider(FieldOverrideProvider):
     """
@@ -42,20 +47,79 @@ def _get_overrides_for_user(user, block):
     """
     Gets all of the individual student overrides for given user and block.
     Returns a dictionary of field override values keyed by field name.
+
+    During a request, the overrides come from all of the user's overrides in
+    the course, which are loaded with a single query.  Otherwise, they're
+    queried for the block alone, as nothing would clear the loaded overrides
+    once they're out of date.
     """
-    query = StudentFieldOverride.objects.filter(
-        course_id=block.runtime.course_id,
-        location=block.location,
-        student_id=user.id,
-    )
+    course_overrides = _get_course_overrides_for_user(user, block.runtime.course_id)
+    if course_overrides is not None:
+        serialized_overrides = course_overrides.get(_override_key(block.location, block.runtime.course_id), {})
+    else:
+        query = StudentFieldOverride.objects.filter(
+            course_id=block.runtime.course_id,
+            location=block.location,
+            student_id=user.id,
+        )
+        serialized_overrides = {override.field: override.value for override in query}
+
     overrides = {}
-    for override in query:
-        field = block.fields[override.field]
-        value = field.from_json(json.loads(override.value))
-        overrides[override.field] = value
+    for name, serialized_value in serialized_overrides.iteritems():
+        field = block.fields[name]
+        value = field.from_json(json.loads(serialized_value))
+        overrides[name] = value
     return overrides
 
 
+def _get_course_overrides_for_user(user, course_id):
+    """
+    Gets all of the individual student overrides for given user in the given
+    course, loading them once per request.  Returns a dictionary mapping block
+    locations to dictionaries of serialized field override values keyed by
+    field name, or None if there is no current request.
+    """
+    if request_cache.get_request() is None:
+        return None
+
+    overrides_cache = request_cache.get_cache(OVERRIDES_CACHE_NAME)
+    cache_key = (user.id, course_id)
+    if cache_key not in overrides_cache:
+        overrides = {}
+        query = StudentFieldOverride.objects.filter(
+            course_id=course_id,
+            student_id=user.id,
+        )
+        for override in query:
+            overrides.setdefault(_override_key(override.location, course_id), {})[override.field] = override.value
+        overrides_cache[cache_key] = overrides
+    return overrides_cache[cache_key]
+
+
+def _get_loaded_course_overrides_for_user(user, course_id):
+    """
+    Returns the overrides of the user in the course loaded by
+    `_get_course_overrides_for_user` during this request, if any, so that
+    they can be kept up to date.
+    """
+    if request_cache.get_request() is None:
+        return None
+    return request_cache.get_cache(OVERRIDES_CACHE_NAME).get((user.id, course_id))
+
+
+def _override_key(location, course_id):
+    """
+    Returns the key of the overrides of the block at `location` in the
+    overrides loaded for the course.  Locations are stored without their
+    branch or version, and Old Mongo locations without their run, so they're
+    mapped into the course and made version agnostic.
+    """
+    location = location.map_into_course(course_id)
+    if hasattr(location, 'version_agnostic') and hasattr(location, 'for_branch'):
+        return location.for_branch(None).version_agnostic()
+    return location
+
+
 def override_field_for_user(user, block, name, value):
     """
     Overrides a field for the `user`.  `block` and `name` specify the block
@@ -71,6 +135,11 @@ def override_field_for_user(user, block, name, value):
     override.value = json.dumps(field.to_json(value))
     override.save()
 
+    course_overrides = _get_loaded_course_overrides_for_user(user, block.runtime.course_id)
+    if course_overrides is not None:
+        course_overrides.setdefault(_override_key(block.location, block.runtime.course_id), {})[name] = override.value
+    clear_inherited_overrides()
+
 
 def clear_override_for_user(user, block, name):
     """
@@ -87,3 +156,8 @@ def clear_override_for_user(user, block, name):
             field=name).delete()
     except StudentFieldOverride.DoesNotExist:
         pass
+
+    course_overrides = _get_loaded_course_overrides_for_user(user, block.runtime.course_id)
+    if course_overrides is not None:
+        course_overrides.get(_override_key(block.location, block.runtime.course_id), {}).pop(name, None)
+    clear_inherited_overrides()
@@ -4,7 +4,9 @@ Tests for `field_overrides` module.
 import unittest
 from nose.plugins.attrib import attr
 
+from django.test.client import RequestFactory
 from django.test.utils import override_settings
+from request_cache.middleware import RequestCache
 from xblock.field_data import DictFieldData
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.modulestore.tests.django_utils import (
@@ -12,6 +14,7 @@ from xmodule.modulestore.tests.django_utils import (
 )
 
 from ..field_overrides import (
+    clear_inherited_overrides,
     disable_overrides,
     FieldOverrideProvider,
     OverrideFieldData,
@@ -95,6 +98,72 @@ class OverrideFieldDataTests(ModuleStoreTestCase):
         self.assertIsInstance(data, DictFieldData)
 
 
+@attr('shard_1')
+@override_settings(FIELD_OVERRIDE_PROVIDERS=(
+    'courseware.tests.test_field_overrides.TestInheritedOverrideProvider',))
+class OverrideFieldDataInheritanceTests(ModuleStoreTestCase):
+    """
+    Tests for the overrides `OverrideFieldData` inherits from ancestors.
+    """
+
+    def setUp(self):
+        super(OverrideFieldDataInheritanceTests, self).setUp()
+        self.course = CourseFactory.create(enable_ccx=True)
+        OverrideFieldData.provider_classes = None
+        TestInheritedOverrideProvider.lookups = []
+
+        self.chapter = FakeBlock('chapter', None)
+        self.sequential = FakeBlock('sequential', self.chapter)
+        self.verticals = [FakeBlock('vertical{}'.format(index), self.sequential) for index in range(2)]
+
+        RequestCache().process_request(RequestFactory().get('/'))
+        self.addCleanup(RequestCache.clear_request_cache)
+
+    def tearDown(self):
+        super(OverrideFieldDataInheritanceTests, self).tearDown()
+        OverrideFieldData.provider_classes = None
+
+    def make_one(self):
+        """
+        Factory method.
+        """
+        return OverrideFieldData.wrap(TESTUSER, self.course, DictFieldData({'due': 'original due'}))
+
+    def test_inherited_override(self):
+        data = self.make_one()
+        for vertical in self.verticals:
+            self.assertEqual(data.default(vertical, 'due'), 'overridden due')
+
+        # The overrides of each ancestor were only looked up once.
+        self.assertEqual(TestInheritedOverrideProvider.lookups, ['sequential', 'chapter'])
+
+    def test_has_inherited_override(self):
+        data = self.make_one()
+        self.assertFalse(data.has(self.verticals[0], 'due'))
+        self.assertFalse(data.has(self.verticals[1], 'due'))
+        self.assertEqual(TestInheritedOverrideProvider.lookups, ['vertical0', 'sequential', 'chapter', 'vertical1'])
+
+    def test_inherited_override_cleared(self):
+        data = self.make_one()
+        data.default(self.verticals[0], 'due')
+        clear_inherited_overrides()
+        data.default(self.verticals[0], 'due')
+        self.assertEqual(TestInheritedOverrideProvider.lookups, ['sequential', 'chapter'] * 2)
+
+    def test_overrides_disabled(self):
+        data = self.make_one()
+        with disable_overrides():
+            self.assertTrue(data.has(self.verticals[0], 'due'))
+        self.assertFalse(data.has(self.verticals[0], 'due'))
+
+    def test_without_request(self):
+        RequestCache.clear_request_cache()
+        data = self.make_one()
+        data.default(self.verticals[0], 'due')
+        data.default(self.verticals[1], 'due')
+        self.assertEqual(TestInheritedOverrideProvider.lookups, ['sequential', 'chapter'] * 2)
+
+
 @attr('shard_1')
 class ResolveDottedTests(unittest.TestCase):
     """
@@ -145,3 +214,37 @@ def inject_field_overrides(blocks, course, user):
     for block in blocks:
         block._field_data = OverrideFieldData.wrap(   # pylint: disable=protected-access
             user, course, block._field_data)   # pylint: disable=protected-access
+
+
+class TestInheritedOverrideProvider(FieldOverrideProvider):
+    """
+    A concrete implementation of `FieldOverrideProvider` which overrides the
+    due date of the chapter, and records the blocks it's asked about.
+    """
+    lookups = []
+
+    def get(self, block, name, default):
+        if name == 'due':
+            self.lookups.append(block.location)
+            if block.location == 'chapter':
+                return 'overridden due'
+        return default
+
+    @classmethod
+    def enabled_for(cls, course):
+        return True
+
+
+class FakeBlock(object):
+    """
+    The parts of a block used by `OverrideFieldData` to find inherited overrides.
+    """
+    def __init__(self, location, parent):
+        self.location = location
+        self.parent = parent
+
+    def get_parent(self):
+        """
+        Returns the parent block.
+        """
+        return self.parent
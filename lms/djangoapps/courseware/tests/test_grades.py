@@ -1,23 +1,38 @@
 """
 Test grade calculation.
 """
+from datetime import datetime, timedelta
+
 from django.http import Http404
 from django.test import TestCase
 from django.test.client import RequestFactory
 
+from freezegun import freeze_time
 from mock import patch, MagicMock
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 from opaque_keys.edx.locator import CourseLocator, BlockUsageLocator
-
-from courseware.grades import field_data_cache_for_grading, grade, iterate_grades_for, MaxScoresCache, ProgressSummary
+from pytz import UTC
+
+import courseware.grades
+from courseware.grades import (
+    field_data_cache_for_grading, grade, iterate_grades_for, MaxScoresCache, ProgressSummary,
+    progress_and_grade_summaries,
+)
+from courseware.models import PersistedCourseGrade, SCORE_CHANGED
+from courseware.student_field_overrides import override_field_for_user
+from courseware.tests.factories import StudentModuleFactory
+from courseware.user_state_client import DjangoXBlockUserStateClient
 from student.tests.factories import UserFactory
-from student.models import CourseEnrollment
+from student.models import CourseEnrollment, anonymous_id_for_user
+from student.roles import CourseBetaTesterRole
+from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
+from submissions.models import score_set
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, *args):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -28,7 +43,7 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(student, request, course, keep_raw_scores, *args)
 
 
 @attr('shard_1')
@@ -111,6 +126,44 @@ class TestGradeIteration(ModuleStoreTestCase):
         self.assertTrue(all_gradesets[student2])
         self.assertTrue(all_gradesets[student5])
 
+    @patch('courseware.grades.GRADING_BATCH_SIZE', 2)
+    def test_batched_grades_match_individual_grades(self):
+        """
+        Grades computed in batches, from StudentModule rows loaded for several
+        students at once, should match grading each student on their own.
+        """
+        chapter = ItemFactory.create(category='chapter', parent=self.course)
+        sequential = ItemFactory.create(
+            category='sequential', parent=chapter, metadata={'graded': True, 'format': 'Homework'}
+        )
+        problems = [ItemFactory.create(category='problem', parent=sequential) for _ in range(2)]
+        for index, student in enumerate(self.students):
+            CourseEnrollment.enroll(student, self.course.id)
+            for problem in problems[:index % 3]:
+                StudentModuleFactory.create(
+                    student=student,
+                    course_id=self.course.id,
+                    module_state_key=problem.location,
+                    state='{"attempts": 1}',
+                    grade=index % 2,
+                    max_grade=1,
+                )
+
+        with patch.object(DjangoXBlockUserStateClient, 'get_many') as mock_get_many:
+            all_gradesets, all_errors = self._gradesets_and_errors_for(self.course.id, self.students)
+        # All user state was loaded up front, in bulk.
+        self.assertFalse(mock_get_many.called)
+        self.assertEqual(all_errors, {})
+
+        course = self.store.get_course(self.course.id)
+        for student in self.students:
+            request = RequestFactory().get('/')
+            request.user = student
+            request.session = {}
+            expected_gradeset = grade(student, request, course)
+            self.assertEqual(all_gradesets[student]['percent'], expected_gradeset['percent'])
+            self.assertEqual(all_gradesets[student]['section_breakdown'], expected_gradeset['section_breakdown'])
+
     ################################# Helpers #################################
     def _gradesets_and_errors_for(self, course_id, students):
         """Simple helper method to iterate through student grades and give us
@@ -169,6 +222,167 @@ class TestMaxScoresCache(ModuleStoreTestCase):
         self.assertEqual(max_scores_cache.num_cached_from_remote(), 1)
 
 
+@patch.dict('django.conf.settings.FEATURES', {'ENABLE_PERSISTENT_GRADES': True})
+class TestPersistedCourseGrade(ModuleStoreTestCase):
+    """
+    Tests for reading and invalidating persisted course grades.
+    """
+    def setUp(self):
+        super(TestPersistedCourseGrade, self).setUp()
+        self.student = UserFactory.create()
+        self.course = CourseFactory.create()
+        chapter = ItemFactory.create(category='chapter', parent=self.course)
+        sequential = ItemFactory.create(
+            category='sequential', parent=chapter, metadata={'graded': True, 'format': 'Homework'}
+        )
+        self.problem = ItemFactory.create(category='problem', parent=sequential)
+        self.course = self.store.get_course(self.course.id)
+
+        CourseEnrollment.enroll(self.student, self.course.id)
+        self.request = RequestFactory().get('/')
+        self.request.user = self.student
+        self.request.session = {}
+
+    def _persisted_grade_exists(self):
+        """Return whether a valid grade is persisted for the student."""
+        return PersistedCourseGrade.objects.filter(
+            user=self.student, course_id=self.course.id
+        ).exclude(grade_summary='').exists()
+
+    def test_persisted_grade_is_reused(self):
+        expected_gradeset = grade(self.student, self.request, self.course)
+        self.assertTrue(self._persisted_grade_exists())
+
+        with patch('courseware.grades._grade') as mock_grade:
+            gradeset = grade(self.student, self.request, self.course)
+        self.assertFalse(mock_grade.called)
+        self.assertEqual(gradeset['percent'], expected_gradeset['percent'])
+        self.assertEqual(gradeset['section_breakdown'], expected_gradeset['section_breakdown'])
+        self.assertEqual(gradeset['totaled_scores'], expected_gradeset['totaled_scores'])
+
+    def test_progress_summary_is_reused(self):
+        expected_summary, expected_gradeset = progress_and_grade_summaries(self.student, self.request, self.course)
+        self.assertTrue(self._persisted_grade_exists())
+
+        with patch('courseware.grades.field_data_cache_for_grading') as mock_field_data_cache:
+            with patch('courseware.grades._progress_summary') as mock_progress_summary:
+                courseware_summary, gradeset = progress_and_grade_summaries(self.student, self.request, self.course)
+        self.assertFalse(mock_field_data_cache.called)
+        self.assertFalse(mock_progress_summary.called)
+        self.assertEqual(courseware_summary, expected_summary)
+        self.assertEqual(gradeset['percent'], expected_gradeset['percent'])
+
+    def test_reading_grade_does_not_store_it(self):
+        self.assertEqual(
+            PersistedCourseGrade.get_summaries(self.student.id, self.course.id, 'a-version'), (None, None, None)
+        )
+        self.assertFalse(PersistedCourseGrade.objects.filter(user=self.student).exists())
+
+    def test_raw_scores_are_not_persisted(self):
+        grade(self.student, self.request, self.course, keep_raw_scores=True)
+        self.assertFalse(self._persisted_grade_exists())
+
+    def test_score_change_invalidates_persisted_grade(self):
+        self.assertEqual(grade(self.student, self.request, self.course)['percent'], 0.0)
+
+        StudentModuleFactory.create(
+            student=self.student,
+            course_id=self.course.id,
+            module_state_key=self.problem.location,
+            state='{"attempts": 1}',
+            grade=1,
+            max_grade=1,
+        )
+        self.assertFalse(self._persisted_grade_exists())
+        self.assertEqual(grade(self.student, self.request, self.course)['percent'], 1.0)
+
+    def test_score_changed_signal_invalidates_persisted_grade(self):
+        grade(self.student, self.request, self.course)
+        SCORE_CHANGED.send(
+            sender=None,
+            points_possible=1,
+            points_earned=1,
+            user_id=self.student.id,
+            course_id=unicode(self.course.id),
+            usage_id=unicode(self.problem.location),
+        )
+        self.assertFalse(self._persisted_grade_exists())
+
+    def test_zero_submissions_score_invalidates_persisted_grade(self):
+        grade(self.student, self.request, self.course)
+        score_set.send(
+            sender=None,
+            points_possible=1,
+            points_earned=0,
+            anonymous_user_id=anonymous_id_for_user(self.student, self.course.id),
+            course_id=unicode(self.course.id),
+            item_id=unicode(self.problem.location),
+        )
+        self.assertFalse(self._persisted_grade_exists())
+
+    def test_grade_for_other_course_version_is_ignored(self):
+        grade(self.student, self.request, self.course)
+        grade_summary, __, __ = PersistedCourseGrade.get_summaries(
+            self.student.id, self.course.id, 'an-earlier-version'
+        )
+        self.assertIsNone(grade_summary)
+
+    def test_grade_invalidated_while_computed_is_not_persisted(self):
+        def grade_and_change_score(*args, **kwargs):
+            """Compute the grade while a score changes."""
+            gradeset = real_grade(*args, **kwargs)
+            PersistedCourseGrade.invalidate(self.student.id, self.course.id)
+            return gradeset
+
+        real_grade = courseware.grades._grade
+        with patch('courseware.grades._grade', side_effect=grade_and_change_score):
+            grade(self.student, self.request, self.course)
+        self.assertFalse(self._persisted_grade_exists())
+
+    def test_grade_expires_when_start_date_passes(self):
+        start = (datetime.now(UTC) + timedelta(days=1)).replace(microsecond=0)
+        self.problem.start = start
+        self.store.update_item(self.problem, self.user.id)
+        self.course = self.store.get_course(self.course.id)
+
+        grade(self.student, self.request, self.course)
+        self.assertTrue(self._persisted_grade_exists())
+        persisted_grade = PersistedCourseGrade.objects.get(user=self.student, course_id=self.course.id)
+        self.assertEqual(persisted_grade.valid_until, start)
+
+        with freeze_time(start + timedelta(seconds=1)):
+            grade_summary, __, __ = PersistedCourseGrade.get_summaries(
+                self.student.id, self.course.id, persisted_grade.course_version
+            )
+        self.assertIsNone(grade_summary)
+
+    def test_enrollment_change_invalidates_persisted_grade(self):
+        grade(self.student, self.request, self.course)
+        CourseEnrollment.enroll(self.student, self.course.id, 'verified')
+        self.assertFalse(self._persisted_grade_exists())
+
+    def test_override_change_invalidates_persisted_grade(self):
+        grade(self.student, self.request, self.course)
+        override_field_for_user(self.student, self.problem, 'start', datetime.now(UTC) + timedelta(days=1))
+        self.assertFalse(self._persisted_grade_exists())
+
+    def test_cohort_change_invalidates_persisted_grade(self):
+        cohort = CohortFactory.create(course_id=self.course.id)
+        grade(self.student, self.request, self.course)
+        cohort.users.add(self.student)
+        self.assertFalse(self._persisted_grade_exists())
+
+    def test_role_change_invalidates_persisted_grade(self):
+        grade(self.student, self.request, self.course)
+        CourseBetaTesterRole(self.course.id).add_users(self.student)
+        self.assertFalse(self._persisted_grade_exists())
+
+    @patch('courseware.grades.in_preview_mode', return_value=True)
+    def test_preview_grades_are_not_persisted(self, __):
+        grade(self.student, self.request, self.course)
+        self.assertFalse(self._persisted_grade_exists())
+
+
 class TestFieldDataCacheScorableLocations(ModuleStoreTestCase):
     """
     Make sure we can filter the locations we pull back student state for via
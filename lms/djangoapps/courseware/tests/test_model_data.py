@@ -6,7 +6,7 @@ from mock import Mock, patch
 from nose.plugins.attrib import attr
 from functools import partial
 
-from courseware.model_data import DjangoKeyValueStore, FieldDataCache, InvalidScopeError
+from courseware.model_data import DjangoKeyValueStore, FieldDataCache, InvalidScopeError, plan_prefetch
 from courseware.models import StudentModule, XModuleUserStateSummaryField
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
@@ -124,6 +124,13 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
         with self.assertNumQueries(0):
             self.assertEquals('a_value', self.kvs.get(user_state_key('a_field')))
 
+    def test_prefetch_stats(self):
+        "Test that the rows loaded and read are reported"
+        self.assertEquals(self.field_data_cache.prefetch_stats()['user_state'], {'fetched': 1, 'used': 0})
+        self.kvs.get(user_state_key('a_field'))
+        self.kvs.get(user_state_key('b_field'))
+        self.assertEquals(self.field_data_cache.prefetch_stats()['user_state'], {'fetched': 1, 'used': 1})
+
     def test_get_missing_field(self):
         "Test that getting a missing field from an existing StudentModule raises a KeyError"
         # This should only read from the cache, not the database
@@ -415,3 +422,27 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+class TestPlanPrefetch(TestCase):
+    """Tests for planning which fields to load for which descriptors"""
+    def setUp(self):
+        super(TestPlanPrefetch, self).setUp()
+        self.state_field = mock_field(Scope.user_state, 'state_field')
+        self.prefs_field = mock_field(Scope.preferences, 'prefs_field')
+        self.settings_field = mock_field(Scope.settings, 'settings_field')
+        self.stateful_descriptor = mock_descriptor([self.state_field, self.settings_field])
+        self.stateless_descriptor = mock_descriptor([self.prefs_field, self.settings_field])
+        self.descriptors = [self.stateful_descriptor, self.stateless_descriptor]
+
+    def test_plan_by_scope(self):
+        plan = plan_prefetch(self.descriptors, [])
+        self.assertEquals(plan[Scope.user_state], ({self.state_field}, [self.stateful_descriptor]))
+        self.assertEquals(plan[Scope.preferences], ({self.prefs_field}, [self.stateless_descriptor]))
+        self.assertEquals(plan[Scope.settings], ({self.settings_field}, self.descriptors))
+        self.assertNotIn(Scope.user_state_summary, plan)
+
+    def test_plan_with_asides(self):
+        plan = plan_prefetch(self.descriptors, ['aside'])
+        self.assertEquals(plan[Scope.user_state], ({self.state_field}, self.descriptors))
+        self.assertEquals(plan[Scope.preferences], ({self.prefs_field}, self.descriptors))
@@ -0,0 +1,89 @@
+"""
+Tests for `student_field_overrides` module.
+"""
+import datetime
+
+import ddt
+from django.test.client import RequestFactory
+from django.utils.timezone import utc
+from nose.plugins.attrib import attr
+
+from request_cache.middleware import RequestCache
+from student.tests.factories import UserFactory
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+from ..student_field_overrides import (
+    clear_override_for_user,
+    get_override_for_user,
+    override_field_for_user,
+)
+
+
+@attr('shard_1')
+@ddt.ddt
+class IndividualStudentOverridesTest(ModuleStoreTestCase):
+    """
+    Tests for the overrides of fields for individual students.
+    """
+    def setUp(self):
+        super(IndividualStudentOverridesTest, self).setUp()
+        self.due = datetime.datetime(2010, 5, 12, 2, 42, tzinfo=utc)
+        self.extended = datetime.datetime(2013, 12, 25, 0, 0, tzinfo=utc)
+        self.user = UserFactory.create()
+
+    def create_course(self, store_type):
+        """
+        Create a course with three chapters in the given store, the first two
+        of which have their due dates extended for the user.
+        """
+        with self.store.default_store(store_type):
+            self.course = CourseFactory.create()
+            self.chapters = [ItemFactory.create(parent=self.course, due=self.due) for __ in range(3)]
+        for chapter in self.chapters[:2]:
+            override_field_for_user(self.user, chapter, 'due', self.extended)
+
+    def start_request(self):
+        """
+        Make the tests run as if during a request.
+        """
+        RequestCache().process_request(RequestFactory().get('/'))
+        self.addCleanup(RequestCache.clear_request_cache)
+
+    def reload_chapters(self):
+        """
+        Reload the chapters, which memoize their overrides.
+        """
+        self.chapters = [self.store.get_item(chapter.location) for chapter in self.chapters]
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_overrides(self, store_type):
+        self.create_course(store_type)
+        self.reload_chapters()
+        self.assertEqual(get_override_for_user(self.user, self.chapters[0], 'due'), self.extended)
+        self.assertIsNone(get_override_for_user(self.user, self.chapters[2], 'due'))
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_overrides_loaded_once_per_request(self, store_type):
+        self.create_course(store_type)
+        self.start_request()
+        self.reload_chapters()
+        with self.assertNumQueries(1):
+            overrides = [get_override_for_user(self.user, chapter, 'due') for chapter in self.chapters]
+        self.assertEqual(overrides, [self.extended, self.extended, None])
+
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_overrides_updated_during_request(self, store_type):
+        self.create_course(store_type)
+        self.start_request()
+        self.reload_chapters()
+        get_override_for_user(self.user, self.chapters[0], 'due')
+
+        clear_override_for_user(self.user, self.chapters[0], 'due')
+        override_field_for_user(self.user, self.chapters[2], 'due', self.extended)
+
+        self.reload_chapters()
+        with self.assertNumQueries(0):
+            overrides = [get_override_for_user(self.user, chapter, 'due') for chapter in self.chapters]
+        self.assertEqual(overrides, [None, self.extended, self.extended])
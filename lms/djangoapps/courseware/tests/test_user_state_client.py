@@ -6,7 +6,9 @@ defined in edx_user_state_client.
 from collections import defaultdict
 from unittest import skip
 
+from django.contrib.auth.models import User
 from django.test import TestCase
+from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator
 
 from edx_user_state_client.tests import UserStateClientTestBase
 from courseware.user_state_client import DjangoXBlockUserStateClient
@@ -65,3 +67,78 @@ class TestDjangoUserStateClient(UserStateClientTestBase, TestCase):
     @skip("Not supported by DjangoXBlockUserStateClient")
     def test_iter_course_many_users(self):
         pass
+
+
+class TestDjangoUserStateClientManyUsers(TestCase):
+    """
+    Tests of the bulk, multi-user methods of the DjangoUserStateClient backend.
+    """
+    def setUp(self):
+        super(TestDjangoUserStateClientManyUsers, self).setUp()
+        self.client = DjangoXBlockUserStateClient()
+        self.users = [UserFactory.create() for _ in range(3)]
+        self.usernames = [user.username for user in self.users]
+        course_key = CourseLocator('org', 'course', 'run')
+        self.problems = [BlockUsageLocator(course_key, 'problem', 'problem{}'.format(idx)) for idx in range(2)]
+        self.html = BlockUsageLocator(course_key, 'html', 'html')
+
+    def _get_state(self, usernames, block_keys):
+        """
+        Returns a dict mapping (username, block_key) to the stored state.
+        """
+        return {
+            (user_state.username, user_state.block_key): user_state.state
+            for user_state in self.client.get_many_users(usernames, block_keys)
+        }
+
+    def test_get_many_users(self):
+        self.client.set_many(self.usernames[0], {self.problems[0]: {'a': 1}, self.problems[1]: {'b': 2}})
+        self.client.set_many(self.usernames[1], {self.problems[1]: {'c': 3}})
+        self.client.set_many(self.usernames[2], {self.problems[0]: {'d': 4}})
+
+        with self.assertNumQueries(2):
+            state = self._get_state(self.usernames[:2], self.problems)
+        self.assertEqual(state, {
+            (self.usernames[0], self.problems[0]): {'a': 1},
+            (self.usernames[0], self.problems[1]): {'b': 2},
+            (self.usernames[1], self.problems[1]): {'c': 3},
+        })
+
+    def test_set_many_users(self):
+        self.client.set_many(self.usernames[0], {self.problems[0]: {'a': 1, 'b': 1}})
+
+        self.client.set_many_users({
+            self.usernames[0]: {self.problems[0]: {'b': 2}, self.html: {'c': 3}},
+            self.usernames[1]: {self.problems[0]: {'d': 4}, self.problems[1]: {'e': 5}},
+        })
+
+        self.assertEqual(self._get_state(self.usernames, self.problems + [self.html]), {
+            (self.usernames[0], self.problems[0]): {'a': 1, 'b': 2},
+            (self.usernames[0], self.html): {'c': 3},
+            (self.usernames[1], self.problems[0]): {'d': 4},
+            (self.usernames[1], self.problems[1]): {'e': 5},
+        })
+
+        # History is recorded for problems only.
+        history = list(self.client.get_history(self.usernames[0], self.problems[0]))
+        self.assertEqual([entry.state for entry in history], [{'a': 1, 'b': 2}, {'a': 1, 'b': 1}])
+        self.assertEqual(len(list(self.client.get_history(self.usernames[1], self.problems[1]))), 1)
+        with self.assertRaises(self.client.DoesNotExist):
+            list(self.client.get_history(self.usernames[0], self.html))
+
+    def test_set_many_users_in_large_chunks(self):
+        # Writing this many blocks in chunks of this size needs more than the
+        # parameters sqlite3 allows in a query, so the queries are split.
+        problems = [BlockUsageLocator(self.html.course_key, 'problem', 'p{}'.format(idx)) for idx in range(400)]
+        for value in (1, 2):
+            self.client.set_many_users(
+                {self.usernames[0]: {problem: {'a': value} for problem in problems}}, chunk_size=500
+            )
+            self.assertEqual(
+                self._get_state(self.usernames, problems),
+                {(self.usernames[0], problem): {'a': value} for problem in problems}
+            )
+
+    def test_set_many_users_unknown_user(self):
+        with self.assertRaises(User.DoesNotExist):
+            self.client.set_many_users({'unknown_user': {self.problems[0]: {'a': 1}}})
@@ -3,6 +3,7 @@ An implementation of :class:`XBlockUserStateClient`, which stores XBlock Scope.u
 data in a Django ORM model.
 """
 
+from collections import defaultdict
 import itertools
 from operator import attrgetter
 from time import time
@@ -14,10 +15,16 @@ except ImportError:
 
 import dogstats_wrapper as dog_stats_api
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Case, TextField, Value, When
+from django.utils import timezone
 from xblock.fields import Scope, ScopeBase
-from courseware.models import StudentModule, StudentModuleHistory
+from courseware.models import StudentModule, StudentModuleHistory, chunks
 from edx_user_state_client.interface import XBlockUserStateClient, XBlockUserState
 
+# The maximum number of parameters in a query, which sqlite3 limits to 999.
+MAX_QUERY_PARAMETERS = 999
+
 
 class DjangoXBlockUserStateClient(XBlockUserStateClient):
     """
@@ -95,6 +102,51 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
                 yield (student_module, usage_key)
 
+    def _get_student_modules_for_users(self, user_ids, block_keys, chunk_size=450):
+        """
+        Retrieve the :class:`~StudentModule`s of all the supplied users for the supplied
+        ``block_keys``, in a few chunked queries.
+
+        Arguments:
+            user_ids (list of int): The ids of the users to load `StudentModule`s for.
+            block_keys (list of :class:`~UsageKey`): The set of XBlocks to load data for.
+            chunk_size (int): The maximum number of users, and of blocks, per query.
+                Both chunks and the course id must fit in MAX_QUERY_PARAMETERS.
+
+        Yields:
+            (student_module, usage_key) tuples.
+        """
+        course_key_func = attrgetter('course_key')
+        by_course = itertools.groupby(
+            sorted(block_keys, key=course_key_func),
+            course_key_func,
+        )
+
+        for course_key, usage_keys in by_course:
+            usage_keys = list(usage_keys)
+            for user_ids_chunk in chunks(user_ids, chunk_size):
+                query = StudentModule.objects.chunked_filter(
+                    'module_state_key__in',
+                    usage_keys,
+                    student_id__in=user_ids_chunk,
+                    course_id=course_key,
+                    chunk_size=chunk_size,
+                )
+                for student_module in query:
+                    usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
+                    yield (student_module, usage_key)
+
+    def _get_user_ids(self, usernames):
+        """
+        Return a dict mapping the supplied ``usernames`` to the ids of their users.
+        """
+        if self.user is not None and list(usernames) == [self.user.username]:
+            return {self.user.username: self.user.id}
+        return dict(itertools.chain.from_iterable(
+            User.objects.filter(username__in=usernames_chunk).values_list('username', 'id')
+            for usernames_chunk in chunks(usernames, 500)
+        ))
+
     def _ddog_increment(self, evt_time, evt_name):
         """
         DataDog increment method.
@@ -245,6 +297,192 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         self._ddog_histogram(evt_time, 'set_many.blks_updated', len(block_keys_to_state))
         self._ddog_histogram(evt_time, 'set_many.response_time', (finish_time - evt_time) * 1000)
 
+    def get_many_users(self, usernames, block_keys, scope=Scope.user_state, fields=None):
+        """
+        Retrieve the stored XBlock state of many users for the specified XBlock usages,
+        using a few chunked queries rather than querying each user separately.
+
+        Arguments:
+            usernames ([str]): The names of the users whose state should be retrieved
+            block_keys ([UsageKey]): A list of UsageKeys identifying which xblock states to load.
+            scope (Scope): The scope to load data from
+            fields: A list of field values to retrieve. If None, retrieve all stored fields.
+
+        Yields:
+            XBlockUserState tuples for each specified UsageKey in block_keys that each of
+            the users has state for, in no particular order.
+        """
+        if scope != Scope.user_state:
+            raise ValueError("Only Scope.user_state is supported, not {}".format(scope))
+
+        evt_time = time()
+        self._ddog_histogram(evt_time, 'get_many_users.users_requested', len(usernames))
+        self._ddog_histogram(evt_time, 'get_many_users.blks_requested', len(block_keys))
+
+        usernames_by_id = {user_id: username for username, user_id in self._get_user_ids(usernames).iteritems()}
+        modules = self._get_student_modules_for_users(usernames_by_id.keys(), block_keys)
+        for module, usage_key in modules:
+            if module.state is None:
+                continue
+
+            state = json.loads(module.state)
+
+            # If the state is the empty dict, then it has been deleted, and so
+            # conformant UserStateClients should treat it as if it doesn't exist.
+            if state == {}:
+                continue
+
+            if fields is not None:
+                state = {
+                    field: state[field]
+                    for field in fields
+                    if field in state
+                }
+            yield XBlockUserState(usernames_by_id[module.student_id], usage_key, state, module.modified, scope)
+
+        finish_time = time()
+        self._ddog_histogram(evt_time, 'get_many_users.response_time', (finish_time - evt_time) * 1000)
+
+    def set_many_users(self, username_to_block_keys_to_state, scope=Scope.user_state, chunk_size=100):
+        """
+        Set fields for many XBlocks of many users, using bulk queries rather than
+        saving each block of each user separately.
+
+        Like :meth:`set_many`, this creates a history entry for each updated problem.
+        Unlike it, no post_save signals are sent for the updated `StudentModule`s.
+
+        Arguments:
+            username_to_block_keys_to_state (dict): A dict mapping usernames to dicts
+                mapping UsageKeys to state dicts. Each state dict maps field names to
+                values. These state dicts are overlaid over the stored state. To
+                delete fields, use :meth:`delete` or :meth:`delete_many`.
+            scope (Scope): The scope to load data from
+            chunk_size (int): The maximum number of rows written per query. Fewer
+                rows are written if they'd need more than MAX_QUERY_PARAMETERS.
+        """
+        if scope != Scope.user_state:
+            raise ValueError("Only Scope.user_state is supported")
+
+        evt_time = time()
+        user_ids = self._get_user_ids(username_to_block_keys_to_state.keys())
+        missing_usernames = set(username_to_block_keys_to_state) - set(user_ids)
+        if missing_usernames:
+            raise User.DoesNotExist(u"Users {} do not exist".format(sorted(missing_usernames)))
+
+        # Map of (user id, usage key) to the state to set.
+        new_state = {
+            (user_ids[username], usage_key): state
+            for username, block_keys_to_state in username_to_block_keys_to_state.iteritems()
+            for usage_key, state in block_keys_to_state.iteritems()
+        }
+        block_keys = set(usage_key for _, usage_key in new_state)
+
+        with transaction.atomic():
+            # Overlay the new state over the stored state of existing modules.
+            modules_to_update = []
+            for student_module, usage_key in self._get_student_modules_for_users(user_ids.values(), block_keys):
+                state = new_state.pop((student_module.student_id, usage_key), None)
+                if state is None:
+                    continue
+                current_state = json.loads(student_module.state) if student_module.state is not None else {}
+                current_state.update(state)
+                student_module.state = json.dumps(current_state)
+                modules_to_update.append(student_module)
+
+            modified = timezone.now()
+            # Each row updated takes its id twice and its state, and the
+            # modified time is shared.
+            update_chunk_size = min(chunk_size, (MAX_QUERY_PARAMETERS - 1) // 3)
+            for student_modules_chunk in chunks(modules_to_update, update_chunk_size):
+                StudentModule.objects.filter(id__in=[module.id for module in student_modules_chunk]).update(
+                    state=Case(
+                        *[When(id=module.id, then=Value(module.state)) for module in student_modules_chunk],
+                        output_field=TextField()
+                    ),
+                    modified=modified,
+                )
+            for student_module in modules_to_update:
+                student_module.modified = modified
+
+            # Create the remaining modules.
+            modules_to_create = [
+                StudentModule(
+                    student_id=user_id,
+                    course_id=usage_key.course_key,
+                    module_state_key=usage_key,
+                    module_type=usage_key.block_type,
+                    state=json.dumps(block_state),
+                )
+                for (user_id, usage_key), block_state in new_state.iteritems()
+            ]
+            created_modules = []
+            if modules_to_create:
+                try:
+                    with transaction.atomic():
+                        StudentModule.objects.bulk_create(
+                            modules_to_create, batch_size=self._insert_batch_size(StudentModule, chunk_size)
+                        )
+                except IntegrityError:
+                    # Some of the modules were created concurrently, so fall back
+                    # to finding or creating them one by one.
+                    self._set_many_by_user(user_ids, new_state)
+                else:
+                    # Read the created modules back, since bulk_create doesn't set their ids.
+                    created_modules = [
+                        student_module
+                        for student_module, usage_key in self._get_student_modules_for_users(
+                            list(set(user_id for user_id, _ in new_state)),
+                            set(usage_key for _, usage_key in new_state),
+                        )
+                        if (student_module.student_id, usage_key) in new_state
+                    ]
+
+            StudentModuleHistory.objects.bulk_create(
+                [
+                    StudentModuleHistory(
+                        student_module=student_module,
+                        version=None,
+                        created=student_module.modified,
+                        state=student_module.state,
+                        grade=student_module.grade,
+                        max_grade=student_module.max_grade,
+                    )
+                    for student_module in itertools.chain(modules_to_update, created_modules)
+                    if student_module.module_type in StudentModuleHistory.HISTORY_SAVING_TYPES
+                ],
+                batch_size=self._insert_batch_size(StudentModuleHistory, chunk_size),
+            )
+
+        finish_time = time()
+        self._ddog_histogram(evt_time, 'set_many_users.blks_updated', len(modules_to_update))
+        self._ddog_histogram(evt_time, 'set_many_users.blks_created', len(modules_to_create))
+        self._ddog_histogram(evt_time, 'set_many_users.response_time', (finish_time - evt_time) * 1000)
+
+    @staticmethod
+    def _insert_batch_size(model_class, chunk_size):
+        """
+        Return the number of rows of `model_class`, at most `chunk_size`, that
+        can be inserted with MAX_QUERY_PARAMETERS parameters. An explicit
+        batch size overrides the one Django limits sqlite3 inserts to.
+        """
+        field_count = len(model_class._meta.concrete_fields)  # pylint: disable=protected-access
+        return min(chunk_size, MAX_QUERY_PARAMETERS // field_count)
+
+    def _set_many_by_user(self, user_ids, new_state):
+        """
+        Set the given state with :meth:`set_many`, separately for each user.
+
+        Arguments:
+            user_ids (dict): A dict mapping usernames to user ids.
+            new_state (dict): A dict mapping (user id, UsageKey) tuples to state dicts.
+        """
+        block_keys_to_state_by_user_id = defaultdict(dict)
+        for (user_id, usage_key), state in new_state.iteritems():
+            block_keys_to_state_by_user_id[user_id][usage_key] = state
+        for username, user_id in user_ids.iteritems():
+            if user_id in block_keys_to_state_by_user_id:
+                self.set_many(username, block_keys_to_state_by_user_id[user_id])
+
     def delete_many(self, username, block_keys, scope=Scope.user_state, fields=None):
         """
         Delete the stored XBlock state for a many xblock usages.
@@ -56,7 +56,7 @@ from openedx.core.djangoapps.credit.api import (
 )
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from courseware.models import StudentModuleHistory
-from courseware.model_data import FieldDataCache, ScoresClient
+from courseware.model_data import FieldDataCache
 from .module_render import toc_for_course, get_module_for_descriptor, get_module, get_module_by_usage_id
 from .entrance_exams import (
     course_has_entrance_exam,
@@ -571,6 +571,7 @@ def _index_bulk_op(request, course_key, chapter, section, position):
             ))
 
         result = render_to_response('courseware/courseware.html', context)
+        field_data_cache.report_prefetch_stats()
     except Exception as e:
 
         # Doesn't bar Unicode characters from URL, but if Unicode characters do
@@ -961,16 +962,7 @@ def _progress(request, course_key, student_id):
     # additional DB lookup (this kills the Progress page in particular).
     student = User.objects.prefetch_related("groups").get(id=student.id)
 
-    with outer_atomic():
-        field_data_cache = grades.field_data_cache_for_grading(course, student)
-        scores_client = ScoresClient.from_field_data_cache(field_data_cache)
-
-    courseware_summary = grades.progress_summary(
-        student, request, course, field_data_cache=field_data_cache, scores_client=scores_client
-    )
-    grade_summary = grades.grade(
-        student, request, course, field_data_cache=field_data_cache, scores_client=scores_client
-    )
+    courseware_summary, grade_summary = grades.progress_and_grade_summaries(student, request, course)
     studio_url = get_studio_url(course, 'settings/grading')
 
     if courseware_summary is None:
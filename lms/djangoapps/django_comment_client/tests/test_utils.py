@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
 import datetime
 import json
+import threading
 import mock
 from nose.plugins.attrib import attr
 from pytz import UTC
 from django.utils.timezone import UTC as django_utc
 
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase, RequestFactory
+from django.utils import translation
 from edxmako import add_lookup
 
 from django_comment_client.tests.factories import RoleFactory
@@ -28,6 +31,8 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, TEST_DAT
 from xmodule.modulestore.django import modulestore
 from opaque_keys.edx.locator import CourseLocator
 from lms.djangoapps.teams.tests.factories import CourseTeamFactory
+from lms.lib.comment_client import utils as cc_utils
+from lms.lib.comment_client.cache import ReadCache
 
 
 @attr('shard_1')
@@ -1084,6 +1089,116 @@ class RenderMustacheTests(TestCase):
         self.assertEqual(utils.render_mustache('test.mustache', {}), 'Testing 1 2 3.\n')
 
 
+@attr('shard_1')
+class PerformConcurrentlyTestCase(TestCase):
+    """
+    Test the `perform_concurrently` utility function of the comments client.
+    """
+
+    def test_results(self):
+        self.assertEqual(cc_utils.perform_concurrently(lambda: 1, lambda: 2, lambda: 3), [1, 2, 3])
+        self.assertEqual(cc_utils.perform_concurrently(lambda: 1), [1])
+
+    def test_error(self):
+        calls = [mock.Mock(return_value=1), mock.Mock(side_effect=ValueError), mock.Mock(side_effect=KeyError)]
+        with self.assertRaises(ValueError):
+            cc_utils.perform_concurrently(*calls)
+        for call in calls:
+            call.assert_called_once_with()
+
+    def test_language(self):
+        with translation.override('eo'):
+            languages = cc_utils.perform_concurrently(translation.get_language, translation.get_language)
+        self.assertEqual(languages, ['eo', 'eo'])
+
+    @mock.patch('lms.lib.comment_client.utils.CONCURRENT_REQUESTS', False)
+    def test_disabled(self):
+        self.assertEqual(cc_utils.perform_concurrently(lambda: 1, lambda: 2), [1, 2])
+
+    def test_session(self):
+        adapter = cc_utils.SESSION.get_adapter('http://localhost:4567/api/v1')
+        self.assertEqual(adapter._pool_maxsize, cc_utils.POOL_MAXSIZE)  # pylint: disable=protected-access
+
+
+@attr('shard_1')
+class ReadCacheTestCase(TestCase):
+    """
+    Test the cache of the responses of the comments service to reads.
+    """
+
+    def setUp(self):
+        super(ReadCacheTestCase, self).setUp()
+        cache.clear()
+        self.read_cache = ReadCache(timeout=60)
+        self.fetch = mock.Mock(side_effect=lambda: {'collection': [self.fetch.call_count]})
+
+    def read(self, params, **kwargs):
+        """
+        Read the thread list with the params through the cache.
+        """
+        return self.read_cache.get('http://localhost:4567/api/v1/threads', params, self.fetch, **kwargs)
+
+    def test_cached(self):
+        params = {'course_id': 'edX/toy/2012_Fall', 'user_id': '1'}
+        self.assertEqual(self.read(params), {'collection': [1]})
+        self.assertEqual(self.read(params), {'collection': [1]})
+        self.assertEqual(self.read(dict(params, page=2)), {'collection': [2]})
+
+    def test_disabled(self):
+        self.read_cache = ReadCache(timeout=0)
+        self.read({})
+        self.read({})
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_invalidate_course(self):
+        self.read({'course_id': 'edX/toy/2012_Fall'})
+        self.read({'course_id': 'edX/other/2012_Fall'})
+        self.read_cache.invalidate({'course_id': 'edX/toy/2012_Fall', 'body': 'new thread'})
+        self.assertEqual(self.read({'course_id': 'edX/toy/2012_Fall'}), {'collection': [3]})
+        self.assertEqual(self.read({'course_id': 'edX/other/2012_Fall'}), {'collection': [2]})
+
+    def test_invalidate_user(self):
+        self.read({}, user_id=1)
+        self.read({}, user_id=2)
+        self.read_cache.invalidate({'user_id': 1, 'value': 'up'})
+        self.assertEqual(self.read({}, user_id=1), {'collection': [3]})
+        self.assertEqual(self.read({}, user_id=2), {'collection': [2]})
+
+    def test_invalidate_all(self):
+        self.read({'course_id': 'edX/toy/2012_Fall'})
+        self.read_cache.invalidate({})
+        self.assertEqual(self.read({'course_id': 'edX/toy/2012_Fall'}), {'collection': [2]})
+
+    def test_copies(self):
+        self.read({})['collection'].append('changed')
+        self.assertEqual(self.read({}), {'collection': [1]})
+
+    def test_coalesced(self):
+        results = []
+        other_thread = threading.Thread(target=lambda: results.append(self.read({})))
+
+        def fetch():
+            """
+            Make the same read in another thread while this one is in progress.
+            """
+            other_thread.start()
+            other_thread.join(0.1)
+            return {'collection': ['fetched']}
+
+        results.append(self.read_cache.get('http://localhost:4567/api/v1/threads', {}, fetch))
+        other_thread.join()
+        self.assertEqual(results, [{'collection': ['fetched']}] * 2)
+        self.assertFalse(self.fetch.called)
+
+    def test_failed_read_not_cached(self):
+        self.fetch.side_effect = cc_utils.CommentClient500Error('error')
+        with self.assertRaises(cc_utils.CommentClient500Error):
+            self.read({})
+        self.fetch.side_effect = None
+        self.fetch.return_value = {}
+        self.assertEqual(self.read({}), {})
+
+
 class DiscussionTabTestCase(ModuleStoreTestCase):
     """ Test visibility of the discussion tab. """
 
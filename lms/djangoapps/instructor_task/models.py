@@ -20,6 +20,7 @@ import json
 import hashlib
 import os.path
 import urllib
+import zlib
 
 from boto.s3.connection import S3Connection
 from boto.s3.key import Key
@@ -35,6 +36,9 @@ from xmodule_django.models import CourseKeyField
 QUEUING = 'QUEUING'
 PROGRESS = 'PROGRESS'
 
+# S3 rejects multipart upload parts (other than the last one) smaller than 5MB.
+S3_MULTIPART_CHUNK_SIZE = 5 * 1024 * 1024
+
 
 class InstructorTask(models.Model):
     """
@@ -179,10 +183,17 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Reports can either be stored in one go from a complete dataset
+    (`store_rows`), or written incrementally through a rows writer returned
+    by `open_rows_writer` so that memory use does not grow with the size of
+    the report.
+
+    Files whose names start with `HIDDEN_FILE_PREFIX` are used for
+    intermediate data (e.g. reports that are still being written) and are
+    never returned by `links_for`.
     """
+    HIDDEN_FILE_PREFIX = '.'
+
     @classmethod
     def from_config(cls, config_name):
         """
@@ -204,6 +215,72 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_utf8_decoded_rows(self, lines):
+        """
+        Parse csv rows out of the utf-8 encoded `lines`, yielding each row
+        as a list of unicode strings.
+        """
+        for row in csv.reader(lines):
+            yield [item.decode('utf-8') for item in row]
+
+
+class ReportRowsWriter(object):
+    """
+    Incrementally writes CSV rows to a `ReportStore`. Rows are pushed out to
+    the underlying storage as they are written, and the report only becomes
+    visible through `links_for()` once `close()` is called, so partially
+    written reports are never offered for download. Call `abort()` instead of
+    `close()` to discard everything written so far.
+
+    Instances can be used as context managers: the report is closed when the
+    block exits normally and aborted if it raises.
+    """
+    def __init__(self, report_store):
+        self.report_store = report_store
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def writerow(self, row):
+        """
+        Write a single `row` (an iterable of unicode strings) to the report.
+        """
+        self._write_encoded_row(next(self.report_store._get_utf8_encoded_rows([row])))  # pylint: disable=protected-access
+        self.rows_written += 1
+
+    def writerows(self, rows):
+        """
+        Write every row in the iterable `rows` to the report.
+        """
+        for row in rows:
+            self.writerow(row)
+
+    def _write_encoded_row(self, row):
+        """
+        Subclasses should override this to write a utf-8 encoded `row`.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Subclasses should override this to flush any remaining data and make
+        the report available for download.
+        """
+        raise NotImplementedError
+
+    def abort(self):
+        """
+        Subclasses should override this to discard the partially written report.
+        """
+        raise NotImplementedError
+
 
 class S3ReportStore(ReportStore):
     """
@@ -313,6 +390,31 @@ class S3ReportStore(ReportStore):
 
         self.store(course_id, filename, output_buffer)
 
+    def open_rows_writer(self, course_id, filename, chunk_size=S3_MULTIPART_CHUNK_SIZE):
+        """
+        Return an `S3ReportRowsWriter` that streams a gzip'd csv file named
+        `filename` to S3 as it is written, using a multipart upload of parts
+        of at least `chunk_size` bytes.
+        """
+        return S3ReportRowsWriter(self, self.key_for(course_id, filename), chunk_size)
+
+    def read_rows(self, course_id, filename):
+        """
+        Yield the rows of the gzip'd csv file `filename` stored for
+        `course_id`, as lists of unicode strings. The file is downloaded and
+        decompressed incrementally, so it is never held in memory in full.
+        """
+        key = self.bucket.get_key(self.key_for(course_id, filename).key)
+        if key is None:
+            raise IOError(u"No report named {} for {}".format(filename, course_id))
+        return self._get_utf8_decoded_rows(_iter_gzip_lines(key))
+
+    def delete(self, course_id, filename):
+        """
+        Delete the file `filename` stored for `course_id`.
+        """
+        self.bucket.delete_key(self.key_for(course_id, filename).key)
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples. `url`
@@ -322,9 +424,85 @@ class S3ReportStore(ReportStore):
         return [
             (key.key.split("/")[-1], key.generate_url(expires_in=300))
             for key in sorted(self.bucket.list(prefix=course_dir.key), reverse=True, key=lambda k: k.last_modified)
+            if not key.key.split("/")[-1].startswith(self.HIDDEN_FILE_PREFIX)
         ]
 
 
+def _iter_gzip_lines(chunks):
+    """
+    Decompress the gzip'd data arriving as an iterable of string `chunks`,
+    yielding it line by line.
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    remainder = ''
+    for chunk in chunks:
+        lines = (remainder + decompressor.decompress(chunk)).splitlines(True)
+        remainder = lines.pop() if lines else ''
+        for line in lines:
+            yield line
+    remainder += decompressor.flush()
+    for line in remainder.splitlines(True):
+        yield line
+
+
+class S3ReportRowsWriter(ReportRowsWriter):
+    """
+    Streams a gzip'd csv file to S3. Compressed output is buffered until at
+    least `chunk_size` bytes are available and then sent as one part of a
+    multipart upload, so at most one chunk is held in memory at a time.
+    Reports that never fill a single chunk are uploaded with a plain PUT.
+    """
+    def __init__(self, report_store, key, chunk_size):
+        super(S3ReportRowsWriter, self).__init__(report_store)
+        self.key = key
+        self.chunk_size = chunk_size
+        self.headers = {
+            "Content-Encoding": "gzip",
+            "Content-Type": "text/csv",
+        }
+        self.multipart_upload = None
+        self.part_num = 0
+        self.output_buffer = StringIO()
+        self.gzip_file = GzipFile(fileobj=self.output_buffer, mode="wb")
+        self.csvwriter = csv.writer(self.gzip_file)
+
+    def _write_encoded_row(self, row):
+        self.csvwriter.writerow(row)
+        if self.output_buffer.tell() >= self.chunk_size:
+            self._upload_part()
+
+    def _upload_part(self):
+        """
+        Send the buffered compressed data as the next part of the multipart
+        upload, starting the upload if this is the first part.
+        """
+        if self.multipart_upload is None:
+            self.multipart_upload = self.key.bucket.initiate_multipart_upload(self.key.key, headers=self.headers)
+        self.part_num += 1
+        self.output_buffer.seek(0)
+        self.multipart_upload.upload_part_from_file(self.output_buffer, part_num=self.part_num)
+        self.output_buffer.seek(0)
+        self.output_buffer.truncate()
+
+    def close(self):
+        self.gzip_file.close()
+        if self.multipart_upload is None:
+            data = self.output_buffer.getvalue()
+            headers = dict(self.headers, **{"Content-Length": len(data)})
+            self.key.set_contents_from_string(data, headers=headers)
+        else:
+            if self.output_buffer.tell():
+                self._upload_part()
+            self.multipart_upload.complete_upload()
+        self.output_buffer.close()
+
+    def abort(self):
+        self.gzip_file.close()
+        self.output_buffer.close()
+        if self.multipart_upload is not None:
+            self.multipart_upload.cancel_upload()
+
+
 class LocalFSReportStore(ReportStore):
     """
     LocalFS implementation of a ReportStore. This is meant for debugging
@@ -388,6 +566,29 @@ class LocalFSReportStore(ReportStore):
 
         self.store(course_id, filename, output_buffer)
 
+    def open_rows_writer(self, course_id, filename):
+        """
+        Return a `LocalFSReportRowsWriter` that writes csv rows to a hidden
+        temporary file as they are written, and moves it into place as
+        `filename` once closed.
+        """
+        return LocalFSReportRowsWriter(self, self.path_to(course_id, filename))
+
+    def read_rows(self, course_id, filename):
+        """
+        Yield the rows of the csv file `filename` stored for `course_id`, as
+        lists of unicode strings.
+        """
+        with open(self.path_to(course_id, filename), "rb") as report_file:
+            for row in self._get_utf8_decoded_rows(report_file):
+                yield row
+
+    def delete(self, course_id, filename):
+        """
+        Delete the file `filename` stored for `course_id`.
+        """
+        os.remove(self.path_to(course_id, filename))
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples. `url`
@@ -399,10 +600,43 @@ class LocalFSReportStore(ReportStore):
         course_dir = self.path_to(course_id, '')
         if not os.path.exists(course_dir):
             return []
-        files = [(filename, os.path.join(course_dir, filename)) for filename in os.listdir(course_dir)]
+        files = [
+            (filename, os.path.join(course_dir, filename))
+            for filename in os.listdir(course_dir)
+            if not filename.startswith(self.HIDDEN_FILE_PREFIX)
+        ]
         files.sort(key=lambda (filename, full_path): os.path.getmtime(full_path), reverse=True)
 
         return [
             (filename, ("file://" + urllib.quote(full_path)))
             for filename, full_path in files
         ]
+
+
+class LocalFSReportRowsWriter(ReportRowsWriter):
+    """
+    Writes csv rows to a hidden temporary file next to `full_path`, which is
+    renamed to `full_path` once the report is complete.
+    """
+    PARTIAL_PREFIX = ReportStore.HIDDEN_FILE_PREFIX + 'partial-'
+
+    def __init__(self, report_store, full_path):
+        super(LocalFSReportRowsWriter, self).__init__(report_store)
+        self.full_path = full_path
+        directory, filename = os.path.split(full_path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+        self.partial_path = os.path.join(directory, self.PARTIAL_PREFIX + filename)
+        self.partial_file = open(self.partial_path, "wb")
+        self.csvwriter = csv.writer(self.partial_file)
+
+    def _write_encoded_row(self, row):
+        self.csvwriter.writerow(row)
+
+    def close(self):
+        self.partial_file.close()
+        os.rename(self.partial_path, self.full_path)
+
+    def abort(self):
+        self.partial_file.close()
+        os.remove(self.partial_path)
@@ -36,6 +36,7 @@ from instructor_task.tasks_helper import (
     delete_problem_module_state,
     upload_problem_responses_csv,
     upload_grades_csv,
+    upload_grades_csv_shard,
     upload_problem_grade_report,
     upload_students_csv,
     cohort_students_and_upload,
@@ -175,6 +176,18 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_shard(entry_id, student_ids, subtask_status_dict):
+    """
+    Grade a subset of the students in a course, as one of the subtasks of a
+    grade report queued by `calculate_grades_csv` for large courses.
+
+    The InstructorTask entry is updated by the subtasks themselves, so this
+    doesn't use BaseInstructorTask.
+    """
+    return upload_grades_csv_shard(entry_id, student_ids, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
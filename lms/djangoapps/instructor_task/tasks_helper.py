@@ -5,7 +5,9 @@ running state of a course.
 """
 import json
 import re
+import traceback
 from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 from django.conf import settings
 from eventtracking import tracker
@@ -58,6 +60,12 @@ from instructor_analytics.basic import (
 )
 from instructor_analytics.csvs import format_dictlist
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status,
+)
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
@@ -599,6 +607,18 @@ def delete_problem_module_state(xmodule_instance_args, _module_descriptor, stude
     return UPDATE_STATUS_SUCCEEDED
 
 
+def _get_report_csv_filename(csv_name, course_id, timestamp):
+    """
+    Return the name under which the `csv_name` report generated at
+    `timestamp` for `course_id` is stored.
+    """
+    return u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
+    )
+
+
 def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
     """
     Upload data as a CSV using ReportStore.
@@ -616,16 +636,30 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
     report_store = ReportStore.from_config(config_name)
     report_store.store_rows(
         course_id,
-        u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
-            course_prefix=course_filename_prefix_generator(course_id),
-            csv_name=csv_name,
-            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
-        ),
+        _get_report_csv_filename(csv_name, course_id, timestamp),
         rows
     )
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": csv_name, })
 
 
+@contextmanager
+def csv_writer_for_report_store(csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
+    """
+    Context manager yielding a `ReportRowsWriter` that streams CSV rows to
+    the ReportStore as they are written, instead of collecting the whole
+    report in memory like `upload_csv_to_report_store`. The report is
+    published when the block exits, or discarded if it raises.
+
+    Arguments:
+        csv_name: Name of the resulting CSV
+        course_id: ID of the course
+    """
+    report_store = ReportStore.from_config(config_name)
+    with report_store.open_rows_writer(course_id, _get_report_csv_filename(csv_name, course_id, timestamp)) as writer:
+        yield writer
+    tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": csv_name, })
+
+
 def upload_exec_summary_to_store(data_dict, report_name, course_id, generated_at, config_name='FINANCIAL_REPORTS'):
     """
     Upload Executive Summary Html file using ReportStore.
@@ -656,24 +690,132 @@ def upload_exec_summary_to_store(data_dict, report_name, course_id, generated_at
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": report_name})
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+class GradeReportRowBuilder(object):
+    """
+    Builds the rows of the grade report for a course, one graded student at a
+    time. The course-wide data needed for every row (cohort, team, experiment
+    group and certificate whitelist settings) is loaded once up front.
+    """
+    def __init__(self, course_id):
+        self.course_id = course_id
+        course = get_course_by_id(course_id)
+        self.course_is_cohorted = is_course_cohorted(course.id)
+        self.teams_enabled = course.teams_enabled
+        self.experiment_partitions = get_split_user_partitions(course.user_partitions)
+        certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
+        self.whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
+        self.section_labels = None
+
+    def header_row(self, gradeset):
+        """
+        Return the header row of the report, taking the section labels from
+        the first successfully computed `gradeset`.
+        """
+        self.section_labels = [section['label'] for section in gradeset[u'section_breakdown']]
+        cohorts_header = ['Cohort Name'] if self.course_is_cohorted else []
+        teams_header = ['Team Name'] if self.teams_enabled else []
+        group_configs_header = [
+            u'Experiment Group ({})'.format(partition.name) for partition in self.experiment_partitions
+        ]
+        certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
+        return (
+            ["id", "email", "username", "grade"] + self.section_labels + cohorts_header +
+            group_configs_header + teams_header +
+            ['Enrollment Track', 'Verification Status'] + certificate_info_header
+        )
+
+    def row_for(self, student, gradeset):
+        """
+        Return the report row for `student`, who was successfully graded
+        with `gradeset`. `header_row` must have been called first.
+        """
+        percents = {
+            section['label']: section.get('percent', 0.0)
+            for section in gradeset[u'section_breakdown']
+            if 'label' in section
+        }
+
+        cohorts_group_name = []
+        if self.course_is_cohorted:
+            group = get_cohort(student, self.course_id, assign=False)
+            cohorts_group_name.append(group.name if group else '')
+
+        group_configs_group_names = []
+        for partition in self.experiment_partitions:
+            group = LmsPartitionService(student, self.course_id).get_group(partition, assign=False)
+            group_configs_group_names.append(group.name if group else '')
+
+        team_name = []
+        if self.teams_enabled:
+            try:
+                membership = CourseTeamMembership.objects.get(user=student, team__course_id=self.course_id)
+                team_name.append(membership.team.name)
+            except CourseTeamMembership.DoesNotExist:
+                team_name.append('')
+
+        enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, self.course_id)[0]
+        verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
+            student,
+            self.course_id,
+            enrollment_mode
+        )
+        certificate_info = certificate_info_for_user(
+            student,
+            self.course_id,
+            gradeset['grade'],
+            student.id in self.whitelisted_user_ids
+        )
+
+        # Not everybody has the same gradable items. If the item is not
+        # found in the user's gradeset, just assume it's a 0. The aggregated
+        # grades for their sections and overall course will be calculated
+        # without regard for the item they didn't have access to, so it's
+        # possible for a student to have a 0.0 show up in their row but
+        # still have 100% for the course.
+        row_percents = [percents.get(label, 0.0) for label in self.section_labels]
+        return (
+            [student.id, student.email, student.username, gradeset['percent']] +
+            row_percents + cohorts_group_name + group_configs_group_names + team_name +
+            [enrollment_mode] + [verification_status] + certificate_info
+        )
+
+    def write_gradeset(self, writer, student, gradeset):
+        """
+        Write the row for `student` to the ReportRowsWriter `writer`,
+        preceded by the header row if this is the first row written.
+        """
+        if self.section_labels is None:
+            writer.writerow(self.header_row(gradeset))
+        writer.writerow(self.row_for(student, gradeset))
+
+
+def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
     be accessed by instantiating another `ReportStore` (via
-    `ReportStore.from_config()`) and calling `link_for()` on it. Writes are
-    buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
-    that are visible in ReportStore will be complete ones.
-
-    As we start to add more CSV downloads, it will probably be worthwhile to
-    make a more general CSVDoc class instead of building out the rows like we
-    do here.
+    `ReportStore.from_config()`) and calling `link_for()` on it. Rows are
+    streamed to the ReportStore as students are graded, so memory use stays
+    bounded regardless of enrollment size, but a report only becomes visible
+    in ReportStore once it is complete.
+
+    If `settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK` is set and the course has
+    more enrolled students than that, grading is instead split across
+    subtasks that run in parallel (see `upload_grades_csv_shard`).
     """
     start_time = time()
     start_date = datetime.now(UTC)
     status_interval = 100
     enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+    total_enrolled_students = enrolled_students.count()
+
+    students_per_task = settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK
+    if students_per_task and total_enrolled_students > students_per_task:
+        return _queue_grade_report_subtasks(
+            _entry_id, action_name, enrolled_students, students_per_task, total_enrolled_students
+        )
+
+    task_progress = TaskProgress(action_name, total_enrolled_students, start_time)
 
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
@@ -684,26 +826,13 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
-    course = get_course_by_id(course_id)
-    course_is_cohorted = is_course_cohorted(course.id)
-    teams_enabled = course.teams_enabled
-    cohorts_header = ['Cohort Name'] if course_is_cohorted else []
-    teams_header = ['Team Name'] if teams_enabled else []
-
-    experiment_partitions = get_split_user_partitions(course.user_partitions)
-    group_configs_header = [u'Experiment Group ({})'.format(partition.name) for partition in experiment_partitions]
+    row_builder = GradeReportRowBuilder(course_id)
 
-    certificate_info_header = ['Certificate Eligible', 'Certificate Delivered', 'Certificate Type']
-    certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
-    whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
-
-    # Loop over all our students and build our CSV lists in memory
-    header = None
-    rows = []
+    # Loop over all our students, streaming graded rows straight to the
+    # ReportStore. Only the (typically few) error rows are kept in memory.
     err_rows = [["id", "username", "error_msg"]]
     current_step = {'step': 'Calculating Grades'}
 
-    total_enrolled_students = enrolled_students.count()
     student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
@@ -713,17 +842,36 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
 
         total_enrolled_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
-        # Periodically update task status (this is a cache write)
-        if task_progress.attempted % status_interval == 0:
-            task_progress.update_task_state(extra_meta=current_step)
-        task_progress.attempted += 1
+    with csv_writer_for_report_store('grade_report', course_id, start_date) as grade_writer:
+        for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
+            # Periodically update task status (this is a cache write)
+            if task_progress.attempted % status_interval == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            task_progress.attempted += 1
+
+            # Now add a log entry after each student is graded to get a sense
+            # of the task's progress
+            student_counter += 1
+            TASK_LOG.info(
+                u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+                task_info_string,
+                action_name,
+                current_step,
+                student_counter,
+                total_enrolled_students
+            )
+
+            if gradeset:
+                # We were able to successfully grade this student for this course.
+                task_progress.succeeded += 1
+                row_builder.write_gradeset(grade_writer, student, gradeset)
+            else:
+                # An empty gradeset means we failed to grade a student.
+                task_progress.failed += 1
+                err_rows.append([student.id, student.username, err_msg])
 
-        # Now add a log entry after each student is graded to get a sense
-        # of the task's progress
-        student_counter += 1
         TASK_LOG.info(
-            u'%s, Task type: %s, Current step: %s, Grade calculation in-progress for students: %s/%s',
+            u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
             task_info_string,
             action_name,
             current_step,
@@ -731,95 +879,228 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             total_enrolled_students
         )
 
-        if gradeset:
-            # We were able to successfully grade this student for this course.
-            task_progress.succeeded += 1
-            if not header:
-                header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
-                    ["id", "email", "username", "grade"] + header + cohorts_header +
-                    group_configs_header + teams_header +
-                    ['Enrollment Track', 'Verification Status'] + certificate_info_header
-                )
+        # By this point, all grade rows have been written out; closing the
+        # writer uploads whatever is still buffered.
+        current_step = {'step': 'Uploading CSVs'}
+        task_progress.update_task_state(extra_meta=current_step)
+        TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-            percents = {
-                section['label']: section.get('percent', 0.0)
-                for section in gradeset[u'section_breakdown']
-                if 'label' in section
-            }
+    # If there are any error rows (don't count the header), write them out as well
+    if len(err_rows) > 1:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
 
-            cohorts_group_name = []
-            if course_is_cohorted:
-                group = get_cohort(student, course_id, assign=False)
-                cohorts_group_name.append(group.name if group else '')
+    # One last update before we close out...
+    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
+    return task_progress.update_task_state(extra_meta=current_step)
 
-            group_configs_group_names = []
-            for partition in experiment_partitions:
-                group = LmsPartitionService(student, course_id).get_group(partition, assign=False)
-                group_configs_group_names.append(group.name if group else '')
 
-            team_name = []
-            if teams_enabled:
-                try:
-                    membership = CourseTeamMembership.objects.get(user=student, team__course_id=course_id)
-                    team_name.append(membership.team.name)
-                except CourseTeamMembership.DoesNotExist:
-                    team_name.append('')
-
-            enrollment_mode = CourseEnrollment.enrollment_mode_for_user(student, course_id)[0]
-            verification_status = SoftwareSecurePhotoVerification.verification_status_for_user(
-                student,
+def _get_report_shard_filename(csv_name, shard_id):
+    """
+    Return the name of the hidden file holding the `csv_name` rows produced
+    by the subtask with id `shard_id`.
+    """
+    return u"{hidden_prefix}{csv_name}_shard_{shard_id}.csv".format(
+        hidden_prefix=ReportStore.HIDDEN_FILE_PREFIX,
+        csv_name=csv_name,
+        shard_id=shard_id
+    )
+
+
+def _queue_grade_report_subtasks(entry_id, action_name, enrolled_students, students_per_task, total_num_students):
+    """
+    Split the grade report for `enrolled_students` into subtasks grading no
+    more than `students_per_task` students each, and queue them.
+    """
+    # Imported here to avoid a circular import, since tasks.py imports from this module.
+    from instructor_task.tasks import calculate_grades_csv_shard
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # If the task has been requeued after its subtasks were created (e.g. after
+    # a loss of connection to the broker), don't queue a second set of them.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(
+            u"Task %s has already queued grade report subtasks!  InstructorTask = %s", entry.task_id, entry
+        )
+        return json.loads(entry.task_output)
+
+    def _create_grade_report_subtask(student_list, initial_subtask_status):
+        """Creates a subtask to grade the students in `student_list`."""
+        return calculate_grades_csv_shard.subtask(
+            (
+                entry_id,
+                [student['pk'] for student in student_list],
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grade_report_subtask,
+        [enrolled_students],
+        [],
+        students_per_task,
+        total_num_students,
+    )
+
+
+def upload_grades_csv_shard(entry_id, student_ids, subtask_status_dict):
+    """
+    Grade the students with the given `student_ids` as one subtask of a
+    sharded grade report, writing their rows (and error rows, if any) to
+    hidden partial CSV files in the ReportStore.
+
+    Progress is accumulated into the parent InstructorTask through
+    `update_subtask_status`. Whichever subtask completes last merges all the
+    partial files into the final report and marks the InstructorTask as done.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    TASK_LOG.info(
+        u"Preparing to grade %d students as subtask %s for instructor task %d",
+        len(student_ids), current_task_id, entry_id
+    )
+
+    # Raises an exception if this subtask is unknown to the InstructorTask,
+    # or has already been (or is being) performed by another worker.
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    course_id = InstructorTask.objects.get(pk=entry_id).course_id
+    report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+    students = User.objects.filter(id__in=student_ids)
+    err_rows = [["id", "username", "error_msg"]]
+
+    try:
+        row_builder = GradeReportRowBuilder(course_id)
+        grade_filename = _get_report_shard_filename('grade_report', current_task_id)
+        with report_store.open_rows_writer(course_id, grade_filename) as grade_writer:
+            for student, gradeset, err_msg in iterate_grades_for(course_id, students):
+                if gradeset:
+                    subtask_status.increment(succeeded=1)
+                    row_builder.write_gradeset(grade_writer, student, gradeset)
+                else:
+                    subtask_status.increment(failed=1)
+                    err_rows.append([student.id, student.username, err_msg])
+
+        if len(err_rows) > 1:
+            err_filename = _get_report_shard_filename('grade_report_err', current_task_id)
+            report_store.store_rows(course_id, err_filename, err_rows)
+    except Exception:
+        TASK_LOG.exception(
+            u"Grade report subtask %s for instructor task %d: failed unexpectedly!", current_task_id, entry_id
+        )
+        # None of this subtask's rows are merged into the grade report, so
+        # list all of its students in the error report instead, and count
+        # them all as having failed.
+        _delete_report_shards(report_store, course_id, current_task_id)
+        try:
+            report_store.store_rows(
                 course_id,
-                enrollment_mode
+                _get_report_shard_filename('grade_report_err', current_task_id),
+                [err_rows[0]] + [
+                    [student.id, student.username, u"Grade report subtask failed"] for student in students
+                ],
             )
-            certificate_info = certificate_info_for_user(
-                student,
-                course_id,
-                gradeset['grade'],
-                student.id in whitelisted_user_ids
+        except Exception:  # pylint: disable=broad-except
+            # The merge fails the InstructorTask when this file is missing.
+            TASK_LOG.exception(
+                u"Grade report subtask %s for instructor task %d: failed to store errors", current_task_id, entry_id
             )
+        subtask_status = SubtaskStatus.create(current_task_id, failed=len(student_ids), state=FAILURE)
+        if update_subtask_status(entry_id, current_task_id, subtask_status, defer_completion=True):
+            _merge_grade_report_shards(entry_id)
+        raise
 
-            # Not everybody has the same gradable items. If the item is not
-            # found in the user's gradeset, just assume it's a 0. The aggregated
-            # grades for their sections and overall course will be calculated
-            # without regard for the item they didn't have access to, so it's
-            # possible for a student to have a 0.0 show up in their row but
-            # still have 100% for the course.
-            row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
-                [student.id, student.email, student.username, gradeset['percent']] +
-                row_percents + cohorts_group_name + group_configs_group_names + team_name +
-                [enrollment_mode] + [verification_status] + certificate_info
-            )
-        else:
-            # An empty gradeset means we failed to grade a student.
-            task_progress.failed += 1
-            err_rows.append([student.id, student.username, err_msg])
+    subtask_status.increment(state=SUCCESS)
+    if update_subtask_status(entry_id, current_task_id, subtask_status, defer_completion=True):
+        _merge_grade_report_shards(entry_id)
 
-    TASK_LOG.info(
-        u'%s, Task type: %s, Current step: %s, Grade calculation completed for students: %s/%s',
-        task_info_string,
-        action_name,
-        current_step,
-        student_counter,
-        total_enrolled_students
-    )
+    # return status in a form that can be serialized by Celery into JSON:
+    return subtask_status.to_dict()
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+def _merge_report_shards(report_store, csv_name, course_id, timestamp, shard_ids):
+    """
+    Concatenate the partial `csv_name` files written by the subtasks with ids
+    `shard_ids` into the final report, then delete them. Every non-empty
+    partial file starts with the same header row, so only the first one is
+    kept.
+    """
+    with csv_writer_for_report_store(csv_name, course_id, timestamp) as writer:
+        for shard_id in shard_ids:
+            rows = report_store.read_rows(course_id, _get_report_shard_filename(csv_name, shard_id))
+            if writer.rows_written:
+                next(rows, None)
+            writer.writerows(rows)
 
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+    for shard_id in shard_ids:
+        report_store.delete(course_id, _get_report_shard_filename(csv_name, shard_id))
 
-    # One last update before we close out...
-    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
-    return task_progress.update_task_state(extra_meta=current_step)
+
+def _delete_report_shards(report_store, course_id, shard_id):
+    """
+    Delete whatever partial files the subtask with id `shard_id` left behind,
+    ignoring those that don't exist.
+    """
+    for csv_name in ('grade_report', 'grade_report_err'):
+        try:
+            report_store.delete(course_id, _get_report_shard_filename(csv_name, shard_id))
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+
+def _merge_grade_report_shards(entry_id):
+    """
+    Merge the partial files written by the subtasks of a sharded grade report
+    into the final grade report (and error report, if any students failed),
+    then mark the InstructorTask as complete. Subtasks that failed outright
+    only left an error file listing all their students behind; if that file
+    is missing, their students can't be reported and the InstructorTask is
+    marked as failed.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    task_progress = json.loads(entry.task_output)
+    start_date = datetime.fromtimestamp(task_progress['start_time'], UTC)
+    subtasks = sorted(
+        (SubtaskStatus.from_dict(status_dict) for status_dict in json.loads(entry.subtasks)['status'].values()),
+        key=lambda subtask_status: subtask_status.task_id
+    )
+    completed_shard_ids = [
+        subtask_status.task_id for subtask_status in subtasks if subtask_status.state == SUCCESS
+    ]
+    failed_shard_ids = [
+        subtask_status.task_id for subtask_status in subtasks if subtask_status.state == FAILURE
+    ]
+    error_shard_ids = [
+        subtask_status.task_id for subtask_status in subtasks
+        if subtask_status.failed and subtask_status.state in (SUCCESS, FAILURE)
+    ]
+    TASK_LOG.info(
+        u"Merging %d grade report subtasks for instructor task %d (%d failed)",
+        len(completed_shard_ids) + len(failed_shard_ids), entry_id, len(failed_shard_ids)
+    )
+
+    report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+    try:
+        _merge_report_shards(report_store, 'grade_report', course_id, start_date, completed_shard_ids)
+        if error_shard_ids:
+            _merge_report_shards(report_store, 'grade_report_err', course_id, start_date, error_shard_ids)
+    except Exception as exc:
+        TASK_LOG.exception(u"Failed to merge grade report subtasks for instructor task %d", entry_id)
+        entry.task_output = InstructorTask.create_output_for_failure(exc, traceback.format_exc())
+        entry.task_state = FAILURE
+        entry.save_now()
+        raise
+    finally:
+        for shard_id in failed_shard_ids:
+            _delete_report_shards(report_store, course_id, shard_id)
+
+    entry.task_state = SUCCESS
+    entry.save_now()
 
 
 def _order_problems(blocks):
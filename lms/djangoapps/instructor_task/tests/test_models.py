@@ -20,29 +20,74 @@ class MockKey(object):
     def __init__(self, bucket):
         self.last_modified = datetime.now()
         self.bucket = bucket
+        self.key = None
+        self.contents = ''
 
     def set_contents_from_string(self, contents, headers):  # pylint: disable=unused-argument
         """ Expected method on a Key object. """
+        self.contents = contents
         self.bucket.store_key(self)
 
+    def __iter__(self):
+        """ Keys can be iterated over to read their contents in chunks. """
+        return iter([self.contents])
+
     def generate_url(self, expires_in):  # pylint: disable=unused-argument
         """ Expected method on a Key object. """
         return "http://fake-edx-s3.edx.org/"
 
 
+class MockMultiPartUpload(object):
+    """ Mocking a boto S3 MultiPartUpload object. """
+    def __init__(self, bucket, key_name):
+        self.bucket = bucket
+        self.key_name = key_name
+        self.parts = []
+
+    def upload_part_from_file(self, fp, part_num):
+        """ Expected method on a MultiPartUpload object. """
+        self.parts.append((part_num, fp.read()))
+
+    def complete_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        key = MockKey(self.bucket)
+        key.key = self.key_name
+        key.contents = ''.join(contents for _, contents in self.parts)
+        self.bucket.store_key(key)
+
+    def cancel_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        self.parts = []
+
+
 class MockBucket(object):
     """ Mocking a boto S3 Bucket object. """
     def __init__(self, _name):
         self.keys = []
+        self.multipart_uploads = []
 
     def store_key(self, key):
         """ Not a Bucket method, created just to store the keys in the Bucket for testing purposes. """
         self.keys.append(key)
 
+    def initiate_multipart_upload(self, key_name, headers):  # pylint: disable=unused-argument
+        """ Expected method on a Bucket object. """
+        multipart_upload = MockMultiPartUpload(self, key_name)
+        self.multipart_uploads.append(multipart_upload)
+        return multipart_upload
+
     def list(self, prefix):  # pylint: disable=unused-argument
         """ Expected method on a Bucket object. """
         return self.keys
 
+    def get_key(self, key_name):
+        """ Expected method on a Bucket object. """
+        return next((key for key in self.keys if key.key == key_name), None)
+
+    def delete_key(self, key_name):
+        """ Expected method on a Bucket object. """
+        self.keys = [key for key in self.keys if key.key != key_name]
+
 
 class MockS3Connection(object):
     """ Mocking a boto S3 Connection """
@@ -84,6 +129,55 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_rows_writer_publishes_on_close(self):
+        """
+        Test that a report written through a rows writer is only listed
+        by ReportStore.links_for() once the writer is closed.
+        """
+        report_store = self.create_report_store()
+        writer = report_store.open_rows_writer(self.course_id, 'streamed_file')
+        writer.writerows([[u'id', u'username'], [1, u'ni\xf1o']])
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
+        writer.close()
+        self.assertEqual(writer.rows_written, 2)
+        self.assertEqual(len(report_store.links_for(self.course_id)), 1)
+
+    def test_rows_writer_abort(self):
+        """
+        Test that a rows writer used as a context manager discards the
+        report when an exception is raised.
+        """
+        report_store = self.create_report_store()
+        with self.assertRaises(ValueError):
+            with report_store.open_rows_writer(self.course_id, 'aborted_file') as writer:
+                writer.writerow([u'id', u'username'])
+                raise ValueError()
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
+    def test_hidden_files_not_listed(self):
+        """
+        Test that ReportStore.links_for() does not return hidden files.
+        """
+        report_store = self.create_report_store()
+        report_store.store(self.course_id, '.hidden_file', StringIO())
+        report_store.store(self.course_id, 'visible_file', StringIO())
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['visible_file'])
+
+    def test_read_rows_and_delete(self):
+        """
+        Test that rows written to a report can be read back, and that the
+        report can then be deleted.
+        """
+        report_store = self.create_report_store()
+        rows = [[u'id', u'username'], [u'1', u'ni\xf1o\nline two']]
+        with report_store.open_rows_writer(self.course_id, 'streamed_file') as writer:
+            writer.writerows(rows)
+        self.assertEqual(list(report_store.read_rows(self.course_id, 'streamed_file')), rows)
+
+        report_store.delete(self.course_id, 'streamed_file')
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     """
@@ -93,6 +187,19 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config(config_name='GRADES_DOWNLOAD')
 
+    def test_rows_writer_content(self):
+        """
+        Test that rows written through a rows writer end up utf-8 encoded
+        in the stored file.
+        """
+        report_store = self.create_report_store()
+        with report_store.open_rows_writer(self.course_id, 'streamed_file') as writer:
+            writer.writerow([u'id', u'username'])
+            writer.writerow([1, u'ni\xf1o'])
+
+        with open(report_store.path_to(self.course_id, 'streamed_file')) as report_file:
+            self.assertEqual(report_file.read(), 'id,username\r\n1,ni\xc3\xb1o\r\n')
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +212,21 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+
+    def test_rows_writer_multipart_upload(self):
+        """
+        Test that rows writers upload reports larger than the chunk size
+        as a multipart upload, one chunk at a time.
+        """
+        report_store = self.create_report_store()
+        with report_store.open_rows_writer(self.course_id, 'streamed_file', chunk_size=1) as writer:
+            writer.writerow([u'id', u'username'])
+            writer.writerow([1, u'ni\xf1o'])
+
+        multipart_upload, = report_store.bucket.multipart_uploads
+        self.assertGreater(len(multipart_upload.parts), 1)
+        self.assertEqual(
+            [part_num for part_num, _ in multipart_upload.parts],
+            range(1, len(multipart_upload.parts) + 1)
+        )
+        self.assertEqual(len(report_store.links_for(self.course_id)), 1)
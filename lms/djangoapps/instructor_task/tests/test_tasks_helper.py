@@ -8,8 +8,11 @@ Tests that CSV grade report generation works with unicode emails.
 """
 import ddt
 from mock import Mock, patch
+import os
 import tempfile
 import json
+from uuid import uuid4
+from celery.states import FAILURE, SUCCESS
 from openedx.core.djangoapps.course_groups import cohorts
 import unicodecsv
 from django.core.urlresolvers import reverse
@@ -20,6 +23,7 @@ from certificates.models import CertificateStatuses, GeneratedCertificate
 from certificates.tests.factories import GeneratedCertificateFactory, CertificateWhitelistFactory
 from course_modes.models import CourseMode
 from courseware.tests.factories import InstructorFactory
+from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin, InstructorTaskModuleTestCase
 from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup, CohortMembership
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
@@ -32,7 +36,8 @@ from student.models import CourseEnrollment, CourseEnrollmentAllowed, ManualEnro
 from lms.djangoapps.verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.partitions.partitions import Group, UserPartition
-from instructor_task.models import ReportStore
+from instructor_task import tasks_helper
+from instructor_task.models import InstructorTask, ReportStore
 from survey.models import SurveyForm, SurveyAnswer
 from instructor_task.tasks_helper import (
     cohort_students_and_upload,
@@ -327,6 +332,135 @@ class TestTeamGradeReport(InstructorGradeReportTestCase):
         self._verify_cell_data_for_user(self.student2.username, self.course.id, 'Team Name', team2.name)
 
 
+@override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+class TestShardedGradeReport(InstructorGradeReportTestCase):
+    """
+    Tests that grade reports for large courses are split across subtasks
+    and merged back into a single report.
+    """
+    def setUp(self):
+        super(TestShardedGradeReport, self).setUp()
+        self.course = CourseFactory.create()
+        self.students = [self.create_student(u'student{}'.format(i)) for i in range(5)]
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+
+    def _upload_grades_csv(self):
+        """
+        Run the grade report, whose subtasks run eagerly in tests, and return
+        the updated InstructorTask entry.
+        """
+        with patch('instructor_task.tasks_helper._get_current_task'):
+            upload_grades_csv(None, self.entry.id, self.course.id, None, 'graded')
+        return InstructorTask.objects.get(pk=self.entry.id)
+
+    def test_sharded_report_is_merged(self):
+        entry = self._upload_grades_csv()
+
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks)['total'], 3)
+        self.assertDictContainsSubset(
+            {'attempted': 5, 'succeeded': 5, 'failed': 0, 'total': 5},
+            json.loads(entry.task_output)
+        )
+        self.verify_rows_in_csv(
+            [{'username': student.username} for student in self.students],
+            verify_order=False,
+            ignore_other_columns=True,
+        )
+        # Only the merged report is left behind.
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(len(report_store.links_for(self.course.id)), 1)
+        self.assertEqual(
+            [filename for filename in os.listdir(report_store.path_to(self.course.id, '')) if filename.startswith('.')],
+            []
+        )
+
+    @patch('instructor_task.tasks_helper.iterate_grades_for')
+    def test_sharded_report_errors_are_merged(self, mock_iterate_grades_for):
+        mock_iterate_grades_for.side_effect = lambda course_id, students: [
+            (student, {}, 'Cannot grade student') for student in students
+        ]
+        entry = self._upload_grades_csv()
+
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 0, 'failed': 5}, json.loads(entry.task_output))
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        err_filename = next(
+            filename for filename, _ in report_store.links_for(self.course.id) if 'grade_report_err' in filename
+        )
+        err_rows = list(report_store.read_rows(self.course.id, err_filename))
+        self.assertEqual(err_rows[0], [u'id', u'username', u'error_msg'])
+        self.assertItemsEqual(
+            [row[1] for row in err_rows[1:]],
+            [student.username for student in self.students]
+        )
+
+    def _fail_subtask_grading(self):
+        """
+        Make the subtask grading the first student fail after grading one of
+        its students, and return the list that the usernames of the students
+        of the failing subtask are added to.
+        """
+        failed_usernames = []
+        iterate_grades_for = tasks_helper.iterate_grades_for
+
+        def fail_grading(course_id, students):
+            """Grade the first student, then fail if grading the first student of the course."""
+            students = list(students)
+            for result in iterate_grades_for(course_id, students[:1]):
+                yield result
+            if self.students[0] in students:
+                failed_usernames.extend(student.username for student in students)
+                raise Exception('Grading failed')
+            for result in iterate_grades_for(course_id, students[1:]):
+                yield result
+
+        patcher = patch('instructor_task.tasks_helper.iterate_grades_for', side_effect=fail_grading)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return failed_usernames
+
+    def _hidden_files(self):
+        """Return the names of the partial files left behind."""
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        return [
+            filename for filename in os.listdir(report_store.path_to(self.course.id, '')) if filename.startswith('.')
+        ]
+
+    def test_failed_subtask_students_are_reported(self):
+        failed_usernames = self._fail_subtask_grading()
+        entry = self._upload_grades_csv()
+
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 3, 'failed': 2}, json.loads(entry.task_output))
+        self.verify_rows_in_csv(
+            [{'username': student.username} for student in self.students if student.username not in failed_usernames],
+            file_index=1,
+            verify_order=False,
+            ignore_other_columns=True,
+        )
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        err_filename = next(
+            filename for filename, _ in report_store.links_for(self.course.id) if 'grade_report_err' in filename
+        )
+        err_rows = list(report_store.read_rows(self.course.id, err_filename))
+        self.assertItemsEqual([row[1] for row in err_rows[1:]], failed_usernames)
+        self.assertEqual(self._hidden_files(), [])
+
+    @patch('instructor_task.models.LocalFSReportStore.store_rows', side_effect=IOError)
+    def test_unreported_failed_subtask_fails_task(self, __):
+        self._fail_subtask_grading()
+        entry = self._upload_grades_csv()
+
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(self._hidden_files(), [])
+
+
 class TestProblemResponsesReport(TestReportMixin, InstructorTaskCourseTestCase):
     """
     Tests that generation of CSV files listing student answers to a
@@ -281,6 +281,11 @@ FEATURES = {
     # Enable temporary APIs required for xBlocks on Mobile
     'ENABLE_COURSE_BLOCKS_NAVIGATION_API': False,
 
+    # When a course is published, collect its new block structure in a Celery
+    # task and replace the cached one, instead of clearing the cache and
+    # leaving the next request to collect it.
+    'ENABLE_ASYNC_COURSE_BLOCKS_UPDATE': False,
+
     # Enable the combined login/registration form
     'ENABLE_COMBINED_LOGIN_REGISTRATION': False,
 
@@ -367,6 +372,10 @@ FEATURES = {
     # Enable the max score cache to speed up grading
     'ENABLE_MAX_SCORE_CACHE': True,
 
+    # Store each user's computed course grade, and reuse it until one of their
+    # scores changes or new course content is published.
+    'ENABLE_PERSISTENT_GRADES': False,
+
     # Enable LTI Provider feature.
     'ENABLE_LTI_PROVIDER': False,
 }
@@ -691,6 +700,12 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 
 MODULESTORE_BRANCH = 'published-only'
 CONTENTSTORE = None
+
+# Maximum total size, in bytes of pickled data, of the split modulestore course
+# structures each process keeps in memory in front of the course_structure_cache.
+# Set to 0 to disable the process-local cache.
+COURSE_STRUCTURE_LOCAL_CACHE_SIZE = 64 * 1024 * 1024
+
 DOC_STORE_CONFIG = {
     'host': 'localhost',
     'db': 'xmodule',
@@ -763,6 +778,17 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# Cache of the results of executing code in the sandbox.
+SAFE_EXEC_CACHE = {
+    # Path to a local SQLite database of results, shared by the server's
+    # processes and kept across restarts.  None means don't keep one.
+    'local_path': None,
+    # Maximum number of results in the local database.
+    'local_max_entries': 100000,
+    # Name of the Django cache to share results between servers.  None means don't share them.
+    'shared_cache': 'default',
+}
+
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG in your environment settings files, not here
 DEBUG = False
@@ -2144,6 +2170,11 @@ BADGR_ISSUER_SLUG = "example-issuer"
 ###################### Grade Downloads ######################
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# Grade reports for courses with more enrolled students than this are split
+# into subtasks grading this many students each, which run in parallel.
+# Set to None to always grade the whole course in a single task.
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = None
+
 GRADES_DOWNLOAD = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-grades',
@@ -2453,6 +2484,11 @@ COURSE_ABOUT_VISIBILITY_PERMISSION = 'see_exists'
 # Enrollment API Cache Timeout
 ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT = 60
 
+# Maximum total size, in bytes of uncompressed serialized data, of the course
+# block structures each process keeps in memory in front of the shared cache.
+# Set to 0 to disable the process-local cache.
+COURSE_BLOCKS_LOCAL_CACHE_SIZE = 64 * 1024 * 1024
+
 # for Student Notes we would like to avoid too frequent token refreshes (default is 30 seconds)
 if FEATURES['ENABLE_EDXNOTES']:
     OAUTH_ID_TOKEN_EXPIRATION = 60 * 60
@@ -235,6 +235,9 @@ CACHES = {
     },
 }
 
+# Keep query counts of split modulestore tests independent of earlier tests.
+COURSE_STRUCTURE_LOCAL_CACHE_SIZE = 0
+
 # Dummy secret key for dev
 SECRET_KEY = '85920908f28904ed733fe576320db18cabd7b6cd'
 
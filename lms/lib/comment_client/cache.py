@@ -0,0 +1,157 @@
+"""
+A short-lived cache of the responses of the comments service to reads, which
+is shared by all the servers through the Django cache.  Identical reads made
+concurrently by the threads of a process are coalesced into a single request.
+
+Cached responses are invalidated by writes rather than by their keys: the
+keys of responses include generation numbers of the course and of the user
+the read is for, and of all the responses, and writes increment the
+generations of their course and user, or of all the responses if they are
+for neither.
+"""
+import copy
+import hashlib
+import json
+import random
+import threading
+
+import dogstats_wrapper as dog_stats_api
+from django.core.cache import cache
+
+CACHE_METRIC_NAME = 'comment_client.cache'
+
+
+class _Flight(object):
+    """
+    A read in progress, which other threads making the same read wait for.
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+class ReadCache(object):
+    """
+    A read-through cache of responses of the comments service, which are kept
+    for `timeout` seconds.  Caching is disabled if `timeout` is 0.
+    """
+    KEY_PREFIX = 'comment_client.read'
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def get(self, url, params, fetch, user_id=None):
+        """
+        Return the response to a read of the url with the params, calling
+        `fetch` to make the request if it's neither cached nor being made by
+        another thread.  `user_id` is the id of the user whose data is read,
+        if not in the params.
+        """
+        if not self.timeout:
+            return fetch()
+
+        scopes = self._scopes(params)
+        if user_id is not None:
+            scopes.append(('user_id', unicode(user_id)))
+        key = self._key(url, params, scopes)
+        value = cache.get(key)
+        if value is not None:
+            self._count('hit')
+            return value
+
+        with self._lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.value is not None:
+                self._count('coalesced')
+                return copy.deepcopy(flight.value)
+            # The request failed, so make it again to get its error.
+            return fetch()
+
+        self._count('miss')
+        try:
+            value = fetch()
+            # The callers may modify the value, so the waiting threads get
+            # copies of a copy that isn't returned.
+            flight.value = copy.deepcopy(value)
+            cache.set(key, flight.value, self.timeout)
+            return value
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight.done.set()
+
+    def invalidate(self, data_or_params):
+        """
+        Invalidate the cached responses which may be changed by a write with
+        the given data, i.e. those for its course and its user, or all the
+        responses if it's for neither.
+        """
+        if not self.timeout:
+            return
+        scopes = self._scopes(data_or_params) or [None]
+        for scope in scopes:
+            generation_key = self._generation_key(scope)
+            try:
+                cache.incr(generation_key)
+            except ValueError:
+                # The generation isn't in the cache, so there are no cached
+                # responses with it.
+                pass
+
+    def _key(self, url, params, scopes):
+        """
+        Return the cache key of a read of the url with the params, which
+        includes the current generations of its scopes.
+        """
+        generation_keys = [self._generation_key(scope) for scope in [None] + scopes]
+        generations = cache.get_many(generation_keys)
+        for generation_key in generation_keys:
+            if generation_key not in generations:
+                # Start at a random generation, so that responses cached with
+                # an evicted generation aren't used again.
+                cache.add(generation_key, random.randint(0, 2 ** 31), None)
+                generations[generation_key] = cache.get(generation_key)
+
+        request = json.dumps(
+            [url, params, [generations[generation_key] for generation_key in generation_keys]],
+            sort_keys=True,
+            default=unicode,
+        )
+        return u'{}.{}'.format(self.KEY_PREFIX, hashlib.md5(request).hexdigest())
+
+    @staticmethod
+    def _scopes(data_or_params):
+        """
+        Return the (name, value) pairs of the course and the user of a
+        request, when given in its data or params.
+        """
+        data_or_params = data_or_params or {}
+        return [
+            (name, unicode(data_or_params[name]))
+            for name in ('course_id', 'user_id')
+            if data_or_params.get(name) is not None
+        ]
+
+    def _generation_key(self, scope):
+        """
+        Return the cache key of the generation of a scope, or of all the
+        responses if scope is None.
+        """
+        if scope is None:
+            return u'{}.generation'.format(self.KEY_PREFIX)
+        return u'{}.generation.{}.{}'.format(self.KEY_PREFIX, *scope)
+
+    @staticmethod
+    def _count(result):
+        """
+        Count a read with the given result.
+        """
+        dog_stats_api.increment(CACHE_METRIC_NAME, tags=[u'result:{}'.format(result)])
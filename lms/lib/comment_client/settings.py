@@ -6,3 +6,13 @@ else:
     SERVICE_HOST = 'http://localhost:4567'
 
 PREFIX = SERVICE_HOST + '/api/v1'
+
+# The number of connections to the comments service kept alive by each process.
+POOL_MAXSIZE = getattr(settings, "COMMENTS_SERVICE_POOL_MAXSIZE", 10)
+
+# Whether independent requests for a page are made concurrently.
+CONCURRENT_REQUESTS = getattr(settings, "COMMENTS_SERVICE_CONCURRENT_REQUESTS", True)
+
+# How long the responses to reads of thread lists and users are cached, in
+# seconds.  Caching is disabled if 0.
+CACHE_TIMEOUT = getattr(settings, "COMMENTS_SERVICE_CACHE_TIMEOUT", 0)
@@ -96,6 +96,8 @@ class User(models.Model):
             metric_action='user.active_threads',
             metric_tags=self._metric_tags,
             paged_results=True,
+            cacheable=True,
+            cache_user_id=self.id,
         )
         return response.get('collection', []), response.get('page', 1), response.get('num_pages', 1)
 
@@ -111,7 +113,9 @@ class User(models.Model):
             params,
             metric_action='user.subscribed_threads',
             metric_tags=self._metric_tags,
-            paged_results=True
+            paged_results=True,
+            cacheable=True,
+            cache_user_id=self.id,
         )
         return response.get('collection', []), response.get('page', 1), response.get('num_pages', 1)
 
@@ -130,6 +134,8 @@ class User(models.Model):
                 retrieve_params,
                 metric_action='model.retrieve',
                 metric_tags=self._metric_tags,
+                cacheable=True,
+                cache_user_id=self.id,
             )
         except CommentClientRequestError as e:
             if e.status_code == 404:
@@ -142,6 +148,8 @@ class User(models.Model):
                     retrieve_params,
                     metric_action='model.retrieve',
                     metric_tags=self._metric_tags,
+                    cacheable=True,
+                    cache_user_id=self.id,
                 )
             else:
                 raise
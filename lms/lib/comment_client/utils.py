@@ -1,15 +1,40 @@
 from contextlib import contextmanager
 import dogstats_wrapper as dog_stats_api
 import logging
+import sys
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 from time import time
 from uuid import uuid4
+from django.utils import translation
 from django.utils.translation import get_language
 
+from .cache import ReadCache
+from .settings import CACHE_TIMEOUT, CONCURRENT_REQUESTS, POOL_MAXSIZE
+
 log = logging.getLogger(__name__)
 
 
+def make_session():
+    """
+    Return a requests session which keeps up to POOL_MAXSIZE connections to
+    the comments service alive, so that requests don't each open a new one.
+    The session is shared by all threads.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=POOL_MAXSIZE)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+SESSION = make_session()
+
+READ_CACHE = ReadCache(CACHE_TIMEOUT)
+
+
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
 
@@ -51,8 +76,35 @@ def request_timer(request_id, method, url, tags=None):
 
 
 def perform_request(method, url, data_or_params=None, raw=False,
-                    metric_action=None, metric_tags=None, paged_results=False):
-
+                    metric_action=None, metric_tags=None, paged_results=False,
+                    cacheable=False, cache_user_id=None):
+    """
+    Make a request to the comments service and return its response.
+
+    Responses to cacheable reads are cached for CACHE_TIMEOUT seconds, and
+    writes invalidate the cached responses they may change.  Reads which mark
+    threads as read are writes for this purpose.  `cache_user_id` is the id of
+    the user whose data a cacheable read returns, if not in its params.
+    """
+    def _request():
+        """
+        Make the request.
+        """
+        return _perform_request(method, url, data_or_params, raw, metric_action, metric_tags, paged_results)
+
+    if cacheable and method == 'get':
+        return READ_CACHE.get(url, data_or_params, _request, user_id=cache_user_id)
+    try:
+        return _request()
+    finally:
+        if method != 'get' or (data_or_params or {}).get('mark_as_read'):
+            READ_CACHE.invalidate(data_or_params)
+
+
+def _perform_request(method, url, data_or_params, raw, metric_action, metric_tags, paged_results):
+    """
+    Make a request to the comments service and return its response.
+    """
     if metric_tags is None:
         metric_tags = []
 
@@ -76,7 +128,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = SESSION.request(
             method,
             url,
             data=data,
@@ -132,6 +184,52 @@ def perform_request(method, url, data_or_params=None, raw=False,
             return data
 
 
+def perform_concurrently(*calls):
+    """
+    Make independent requests to the comments service concurrently, e.g. the
+    requests for the threads and for the user of a page.
+
+    Each of `calls` is a function taking no arguments which makes requests
+    with `perform_request`, and must not rely on the state of the current
+    thread other than the active language.  Returns the list of the results
+    of the calls.  If any call raises an exception, the exception of the
+    first such call is raised once all the calls are done.
+    """
+    if not CONCURRENT_REQUESTS or len(calls) < 2:
+        return [call() for call in calls]
+
+    language = get_language()
+    results = [None] * len(calls)
+    errors = [None] * len(calls)
+
+    def run(index, call):
+        """
+        Run the call, recording its result or exception.
+        """
+        try:
+            with translation.override(language):
+                results[index] = call()
+        except Exception:  # pylint: disable=broad-except
+            errors[index] = sys.exc_info()
+
+    threads = [
+        threading.Thread(target=run, args=(index, call))
+        for index, call in enumerate(calls) if index > 0
+    ]
+    with dog_stats_api.timer('comment_client.concurrent_requests.time', tags=[u'calls:{}'.format(len(calls))]):
+        for thread in threads:
+            thread.start()
+        # The current thread makes the first call rather than wait idle.
+        run(0, calls[0])
+        for thread in threads:
+            thread.join()
+
+    for error in errors:
+        if error is not None:
+            raise error[0], error[1], error[2]
+    return results
+
+
 class CommentClientError(Exception):
     def __init__(self, msg):
         self.message = msg
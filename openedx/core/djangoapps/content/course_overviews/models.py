@@ -274,6 +274,29 @@ class CourseOverview(TimeStampedModel):
 
         return course_overview or cls.load_from_module_store(course_id)
 
+    @classmethod
+    def get_from_ids_if_exists(cls, course_ids):
+        """
+        Return a dict mapping the given course IDs to their up-to-date
+        CourseOverviews, loaded in a single query.
+
+        Unlike get_from_id, this doesn't create missing CourseOverviews nor
+        delete outdated ones, so the dict may be incomplete; callers should
+        fall back to get_from_id for the missing courses.  Like get_from_id,
+        it regenerates missing thumbnail images.
+        """
+        course_overviews = {
+            course_overview.id: course_overview
+            for course_overview in cls.objects.select_related('image_set').filter(
+                id__in=course_ids,
+                version__gte=cls.VERSION,
+            )
+        }
+        for course_overview in course_overviews.itervalues():
+            if not hasattr(course_overview, 'image_set'):
+                CourseOverviewImageSet.create_for_course(course_overview)
+        return course_overviews
+
     def clean_id(self, padding_char='='):
         """
         Returns a unique deterministic base32-encoded ID for the course.
@@ -32,7 +32,7 @@ from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, check_mongo_calls, check_mongo_calls_range
 
-from .models import CourseOverview, CourseOverviewImageConfig
+from .models import CourseOverview, CourseOverviewImageConfig, CourseOverviewImageSet
 
 
 @ddt.ddt
@@ -457,6 +457,20 @@ class CourseOverviewTestCase(ModuleStoreTestCase):
             set(select_course_ids),
         )
 
+    def test_get_from_ids_if_exists(self):
+        course_ids = [CourseFactory.create().id for __ in range(3)]
+        for course_id in course_ids[:2]:
+            CourseOverview.get_from_id(course_id)
+
+        # Outdated overviews aren't returned.
+        outdated_overview = CourseOverview.objects.get(id=course_ids[1])
+        outdated_overview.version = CourseOverview.VERSION - 1
+        outdated_overview.save()
+
+        with self.assertNumQueries(1):
+            course_overviews = CourseOverview.get_from_ids_if_exists(course_ids)
+        self.assertEqual(course_overviews.keys(), course_ids[:1])
+
     def test_get_all_courses(self):
         course_ids = [CourseFactory.create(emit_signals=True).id for __ in range(3)]
         self.assertEqual(
@@ -727,6 +741,24 @@ class CourseOverviewImageSetTestCase(ModuleStoreTestCase):
                 image = Image.open(StringIO(image_content.data))
                 self.assertEqual(image.size, expected_size)
 
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_get_from_ids_if_exists_creates_image_set(self, modulestore_type):
+        """
+        Test that get_from_ids_if_exists lazily creates missing image_sets,
+        like get_from_id.
+        """
+        with self.store.default_store(modulestore_type):
+            course = CourseFactory.create(default_store=modulestore_type)
+
+            # Create the CourseOverview without an image_set.
+            self.set_config(enabled=False)
+            self.assertFalse(hasattr(CourseOverview.get_from_id(course.id), 'image_set'))
+
+            self.set_config(enabled=True)
+            course_overview = CourseOverview.get_from_ids_if_exists([course.id])[course.id]
+            self.assertTrue(hasattr(course_overview, 'image_set'))
+            self.assertTrue(CourseOverviewImageSet.objects.filter(course_overview=course_overview).exists())
+
     @ddt.data(
         (800, 400),  # Larger than both, correct ratio
         (800, 600),  # Larger than both, incorrect ratio
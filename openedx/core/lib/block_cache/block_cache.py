@@ -7,7 +7,13 @@ from .exceptions import TransformerException
 from .transformer_registry import TransformerRegistry
 
 
-def get_blocks(cache, modulestore, usage_info, root_block_usage_key, transformers):
+# The xBlock field holding the time a block was last edited, which is
+# collected for all blocks to find the blocks changed since a block
+# structure was collected.
+EDITED_ON_FIELD = 'edited_on'
+
+
+def get_blocks(cache, modulestore, usage_info, root_block_usage_key, transformers, local_cache=None):
     """
     Top-level function in the Block Cache framework that manages
     the cache (populating it and updating it when needed), calls the
@@ -37,6 +43,10 @@ def get_blocks(cache, modulestore, usage_info, root_block_usage_key, transformer
             This list should be a subset of the list of registered
             transformers in the Transformer Registry.
 
+        local_cache (BlockStructureLocalCache) - An optional
+            process-local cache of block structures, used in front of
+            the given cache.
+
     Returns:
         BlockStructureBlockData - A transformed block structure,
             starting at root_block_usage_key, that has undergone the
@@ -53,24 +63,13 @@ def get_blocks(cache, modulestore, usage_info, root_block_usage_key, transformer
         )
 
     # Load the cached block structure.
-    root_block_structure = BlockStructureFactory.create_from_cache(root_block_usage_key, cache, transformers)
+    root_block_structure = BlockStructureFactory.create_from_cache(
+        root_block_usage_key, cache, transformers, local_cache
+    )
 
     # On cache miss, execute the collect phase and update the cache.
     if not root_block_structure:
-
-        # Create the block structure from the modulestore.
-        root_block_structure = BlockStructureFactory.create_from_modulestore(root_block_usage_key, modulestore)
-
-        # Collect data from each registered transformer.
-        for transformer in TransformerRegistry.get_registered_transformers():
-            root_block_structure._add_transformer(transformer)  # pylint: disable=protected-access
-            transformer.collect(root_block_structure)
-
-        # Collect all fields that were requested by the transformers.
-        root_block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
-
-        # Cache this information.
-        BlockStructureFactory.serialize_to_cache(root_block_structure, cache)
+        root_block_structure = update_block_cache(cache, modulestore, root_block_usage_key, local_cache)
 
     # Execute requested transforms on block structure.
     for transformer in transformers:
@@ -82,9 +81,62 @@ def get_blocks(cache, modulestore, usage_info, root_block_usage_key, transformer
     return root_block_structure
 
 
-def clear_block_cache(cache, root_block_usage_key):
+def update_block_cache(cache, modulestore, root_block_usage_key, local_cache=None):
+    """
+    Creates the block structure starting at root_block_usage_key from
+    the modulestore, executes the collect phase of all registered
+    transformers on it, and replaces any block structure cached for
+    the root block key with it.
+
+    If all registered transformers support a partial collect, the data
+    collected for blocks that are unchanged since the block structure
+    currently in the cache is reused, so only the changed blocks and
+    their descendants are recollected.
+
+    Arguments:
+        See the description in get_blocks.
+
+    Returns:
+        BlockStructureBlockData - The collected, untransformed block
+            structure.
+    """
+    registered_transformers = TransformerRegistry.get_registered_transformers()
+
+    # Create the block structure from the modulestore.
+    root_block_structure = BlockStructureFactory.create_from_modulestore(root_block_usage_key, modulestore)
+
+    # Collect the edit time of all blocks, to find the changed blocks
+    # when the block structure is next updated.
+    root_block_structure.request_xblock_fields(EDITED_ON_FIELD)
+
+    # Reuse the data of unchanged blocks from the cached block
+    # structure, if possible.
+    if all(transformer.SUPPORTS_PARTIAL_COLLECT for transformer in registered_transformers):
+        cached_block_structure = BlockStructureFactory.create_from_cache(
+            root_block_usage_key, cache, registered_transformers, local_cache
+        )
+        if cached_block_structure:
+            root_block_structure._reuse_unchanged_block_data(  # pylint: disable=protected-access
+                cached_block_structure, EDITED_ON_FIELD
+            )
+
+    # Collect data from each registered transformer.
+    for transformer in registered_transformers:
+        root_block_structure._add_transformer(transformer)  # pylint: disable=protected-access
+        transformer.collect(root_block_structure)
+
+    # Collect all fields that were requested by the transformers.
+    root_block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
+
+    # Cache this information.
+    BlockStructureFactory.serialize_to_cache(root_block_structure, cache, local_cache)
+
+    return root_block_structure
+
+
+def clear_block_cache(cache, root_block_usage_key, local_cache=None):
     """
     Removes the block structure associated with the given root block
     key.
     """
-    BlockStructureFactory.remove_from_cache(root_block_usage_key, cache)
+    BlockStructureFactory.remove_from_cache(root_block_usage_key, cache, local_cache)
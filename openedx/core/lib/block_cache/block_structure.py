@@ -3,12 +3,16 @@ Module with family of classes for block structures.
     BlockStructure - responsible for block existence and relations.
     BlockStructureBlockData - responsible for block & transformer data.
     BlockStructureModulestoreData - responsible for xBlock data.
+    BlockStructureBlockDataOverlay - responsible for per-request
+        changes to a shared BlockStructureBlockData.
 
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
     _BlockData - Data structure for a single block's data.
+    _CopyOnWriteMap - Data structure for a map that is copied on write.
 """
 from collections import defaultdict
+from itertools import chain
 from logging import getLogger
 
 from openedx.core.lib.graph_traversals import traverse_topologically, traverse_post_order
@@ -38,6 +42,15 @@ class _BlockRelations(object):
         # list [UsageKey]
         self.children = []
 
+    def copy(self):
+        """
+        Returns a copy of these relations.
+        """
+        relations = _BlockRelations()
+        relations.parents = list(self.parents)
+        relations.children = list(self.children)
+        return relations
+
 
 class BlockStructure(object):
     """
@@ -215,7 +228,16 @@ class BlockStructure(object):
             parent_key (UsageKey) - Usage key of the parent block.
             child_key (UsageKey) - Usage key of the child block.
         """
-        self._add_to_relations(self._block_relations, parent_key, child_key)
+        self._get_block_relations_for_update(child_key).parents.append(parent_key)
+        self._get_block_relations_for_update(parent_key).children.append(child_key)
+
+    def _get_block_relations_for_update(self, usage_key):
+        """
+        Returns the relations of the block identified by the given
+        usage_key, for them to be updated.  The block is added if it
+        isn't in this block structure.
+        """
+        return self._block_relations[usage_key]
 
     @staticmethod
     def _add_to_relations(block_relations, parent_key, child_key):
@@ -265,6 +287,16 @@ class _BlockData(object):
         # defaultdict {string: dict}
         self.transformer_data = defaultdict(dict)
 
+    def copy(self):
+        """
+        Returns a copy of this data, sharing only the field values.
+        """
+        block_data = _BlockData()
+        block_data.xblock_fields = dict(self.xblock_fields)
+        for transformer_name, data in self.transformer_data.iteritems():
+            block_data.transformer_data[transformer_name] = dict(data)
+        return block_data
+
 
 class BlockStructureBlockData(BlockStructure):
     """
@@ -372,7 +404,7 @@ class BlockStructureBlockData(BlockStructure):
                 given key for the given transformer's data for the
                 requested block.
         """
-        self._block_data_map[usage_key].transformer_data[transformer.name()][key] = value
+        self._get_block_data_for_update(usage_key).transformer_data[transformer.name()][key] = value
 
     def get_transformer_block_data(self, usage_key, transformer):
         """
@@ -409,8 +441,8 @@ class BlockStructureBlockData(BlockStructure):
             transformer (BlockStructureTransformer) - The transformer
                 whose data entry is to be deleted.
         """
-        transformer_block_data = self.get_transformer_block_data(usage_key, transformer)
-        transformer_block_data.pop(key, None)
+        if key in self.get_transformer_block_data(usage_key, transformer):
+            self._get_block_data_for_update(usage_key).transformer_data[transformer.name()].pop(key)
 
     def remove_block(self, usage_key, keep_descendants):
         """
@@ -432,16 +464,17 @@ class BlockStructureBlockData(BlockStructure):
                 removed block's children become children of the
                 removed block's parents.
         """
-        children = self._block_relations[usage_key].children
-        parents = self._block_relations[usage_key].parents
+        block_relations = self._get_block_relations_for_update(usage_key)
+        children = block_relations.children
+        parents = block_relations.parents
 
         # Remove block from its children.
         for child in children:
-            self._block_relations[child].parents.remove(usage_key)
+            self._get_block_relations_for_update(child).parents.remove(usage_key)
 
         # Remove block from its parents.
         for parent in parents:
-            self._block_relations[parent].children.remove(usage_key)
+            self._get_block_relations_for_update(parent).children.remove(usage_key)
 
         # Remove block.
         self._block_relations.pop(usage_key, None)
@@ -501,6 +534,13 @@ class BlockStructureBlockData(BlockStructure):
     #--- Internal methods ---#
     # To be used within the block_cache framework or by tests.
 
+    def _get_block_data_for_update(self, usage_key):
+        """
+        Returns the collected data of the block identified by the given
+        usage_key, for it to be updated.
+        """
+        return self._block_data_map[usage_key]
+
     def _get_transformer_data_version(self, transformer):
         """
         Returns the version number stored for the given transformer.
@@ -544,6 +584,11 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         # set(string)
         self._requested_xblock_fields = set()
 
+        # Set of usage keys of the blocks whose data is to be collected,
+        # or None if data is to be collected for all blocks.
+        # set(UsageKey) or NoneType
+        self._blocks_to_collect = None
+
     def request_xblock_fields(self, *field_names):
         """
         Records request for collecting data for the given xBlock fields.
@@ -570,6 +615,18 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         """
         return self._xblock_map[usage_key]
 
+    def is_collect_needed(self, usage_key):
+        """
+        Returns whether data is to be collected for the block with the
+        given usage key.  This is False for blocks whose previously
+        collected data is reused, in which case transformers supporting
+        a partial collect should not collect their block-specific data.
+
+        Arguments:
+            usage_key (UsageKey) - Usage key of the block.
+        """
+        return self._blocks_to_collect is None or usage_key in self._blocks_to_collect
+
     #--- Internal methods ---#
     # To be used within the block_cache framework or by tests.
 
@@ -588,15 +645,51 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         """
         self._xblock_map[usage_key] = xblock
 
+    def _reuse_unchanged_block_data(self, previous_block_structure, edited_on_field):
+        """
+        Copies the data of the blocks that are unchanged since the
+        given, previously collected, block structure and restricts the
+        collection of data to the other blocks.
+
+        A block is unchanged if it is in the previous block structure
+        with the same value for the given edited_on_field, which must
+        have been collected for it, and none of its parents changed.
+        Descendants of changed blocks are recollected since their data
+        may be inherited from their ancestors.
+
+        Arguments:
+            previous_block_structure (BlockStructureBlockData) - A
+                block structure previously collected for the same root
+                block, which is not modified.
+
+            edited_on_field (string) - The name of the xBlock field
+                holding the time the block was last edited.
+        """
+        blocks_to_collect = set()
+        for block_key in self.topological_traversal():
+            previous_edited_on = previous_block_structure.get_xblock_field(block_key, edited_on_field)
+            if (
+                    previous_edited_on is None or
+                    previous_edited_on != getattr(self.get_xblock(block_key), edited_on_field, None) or
+                    any(parent_key in blocks_to_collect for parent_key in self.get_parents(block_key))
+            ):
+                blocks_to_collect.add(block_key)
+            else:
+                self._block_data_map[block_key] = previous_block_structure._block_data_map[block_key].copy()
+        self._blocks_to_collect = blocks_to_collect
+
     def _collect_requested_xblock_fields(self):
         """
         Iterates through all instantiated xBlocks that were added and
-        collects all xBlock fields that were requested.
+        collects all xBlock fields that were requested, for the blocks
+        whose data is to be collected.
         """
         if not self._requested_xblock_fields:
             return
 
         for xblock_usage_key, xblock in self._xblock_map.iteritems():
+            if not self.is_collect_needed(xblock_usage_key):
+                continue
             for field_name in self._requested_xblock_fields:
                 self._set_xblock_field(xblock_usage_key, xblock, field_name)
 
@@ -620,3 +713,153 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         """
         if hasattr(xblock, field_name):
             self._block_data_map[usage_key].xblock_fields[field_name] = getattr(xblock, field_name)
+
+
+class BlockStructureBlockDataOverlay(BlockStructureBlockData):
+    """
+    Subclass of BlockStructureBlockData that is a copy-on-write overlay
+    of another BlockStructureBlockData, which it never modifies.  This
+    allows a single block structure to be shared by concurrent
+    requests, each transforming its own overlay.
+
+    The relations and data of a block are only copied into the
+    overlay when they are updated, so the cost of transforming an
+    overlay scales with the number of blocks removed or updated rather
+    than with the size of the block structure.
+
+    Note: The overlaid block structure must not be modified while it
+    has overlays, and all of its blocks must be reachable from its
+    root.
+    """
+    def __init__(self, base_block_structure):
+        super(BlockStructureBlockDataOverlay, self).__init__(base_block_structure.root_block_usage_key)
+        self._block_relations = _CopyOnWriteMap(base_block_structure._block_relations, _BlockRelations)
+        self._block_data_map = _CopyOnWriteMap(base_block_structure._block_data_map, _BlockData)
+
+        # Non-block-specific transformer data is small enough to copy.
+        for transformer_name, data in base_block_structure._transformer_data.iteritems():
+            self._transformer_data[transformer_name] = dict(data)
+
+    def _get_block_relations_for_update(self, usage_key):
+        return self._block_relations.get_for_update(usage_key)
+
+    def _get_block_data_for_update(self, usage_key):
+        return self._block_data_map.get_for_update(usage_key)
+
+    def _prune_unreachable(self):
+        """
+        Mutates this block structure by removing any unreachable blocks.
+
+        Since all blocks of the overlaid block structure are reachable,
+        only blocks whose relations were updated can have lost their
+        last parent.  Removing such a block can in turn leave its
+        children without parents, and so on.
+        """
+        block_keys_to_check = list(self._block_relations.updated_keys())
+        while block_keys_to_check:
+            block_key = block_keys_to_check.pop()
+            if (
+                    block_key != self.root_block_usage_key and
+                    self.has_block(block_key) and
+                    not self.get_parents(block_key)
+            ):
+                block_keys_to_check.extend(self.get_children(block_key))
+                self.remove_block(block_key, keep_descendants=False)
+
+
+class _CopyOnWriteMap(object):
+    """
+    Data structure for a map of usage keys to block entries (relations
+    or data) that overlays a base map, which it never modifies.  An
+    entry is copied from the base map the first time it is accessed for
+    update.
+    """
+    def __init__(self, base_map, entry_class):
+        # The overlaid map.
+        # {UsageKey: entry_class}
+        self._base_map = base_map
+
+        # The class of the map's entries, which must have a copy
+        # method.
+        self._entry_class = entry_class
+
+        # Map of usage keys to entries updated in this map.
+        # dict {UsageKey: entry_class}
+        self._updated_map = {}
+
+        # Set of usage keys in the base map that are removed from this
+        # map.
+        # set(UsageKey)
+        self._removed_keys = set()
+
+    def __contains__(self, usage_key):
+        return usage_key in self._updated_map or (
+            usage_key in self._base_map and usage_key not in self._removed_keys
+        )
+
+    def __getitem__(self, usage_key):
+        """
+        Returns the entry for the given usage key, which must not be
+        updated.
+        """
+        if usage_key in self._updated_map:
+            return self._updated_map[usage_key]
+        if usage_key in self._removed_keys or usage_key not in self._base_map:
+            raise KeyError(usage_key)
+        return self._base_map[usage_key]
+
+    def __iter__(self):
+        return self.iterkeys()
+
+    def __len__(self):
+        return sum(1 for _ in self.iterkeys())
+
+    def iterkeys(self):
+        """
+        Returns an iterator of the usage keys in this map.
+        """
+        return chain(
+            self._updated_map,
+            (
+                usage_key for usage_key in self._base_map
+                if usage_key not in self._updated_map and usage_key not in self._removed_keys
+            ),
+        )
+
+    def get(self, usage_key, default=None):
+        """
+        Returns the entry for the given usage key, which must not be
+        updated; returns default if not found.
+        """
+        try:
+            return self[usage_key]
+        except KeyError:
+            return default
+
+    def get_for_update(self, usage_key):
+        """
+        Returns the entry for the given usage key, for it to be
+        updated.  A new entry is added if not found.
+        """
+        if usage_key not in self._updated_map:
+            entry = self.get(usage_key)
+            self._updated_map[usage_key] = entry.copy() if entry is not None else self._entry_class()
+            self._removed_keys.discard(usage_key)
+        return self._updated_map[usage_key]
+
+    def pop(self, usage_key, default=None):
+        """
+        Removes the entry for the given usage key and returns it;
+        returns default if not found.
+        """
+        entry = self.get(usage_key, default)
+        self._updated_map.pop(usage_key, None)
+        if usage_key in self._base_map:
+            self._removed_keys.add(usage_key)
+        return entry
+
+    def updated_keys(self):
+        """
+        Returns the usage keys of the entries updated in this map.
+        """
+        return self._updated_map.keys()
@@ -2,16 +2,37 @@
 Module for factory class for BlockStructure objects.
 """
 # pylint: disable=protected-access
+from array import array
+from collections import defaultdict
+import cPickle as pickle
 from logging import getLogger
+from uuid import uuid4
+import zlib
 
-from openedx.core.lib.cache_utils import zpickle, zunpickle
-
-from .block_structure import BlockStructureBlockData, BlockStructureModulestoreData
+from .block_structure import (
+    BlockStructureBlockData,
+    BlockStructureBlockDataOverlay,
+    BlockStructureModulestoreData,
+    _BlockData,
+    _BlockRelations,
+)
 
 
 logger = getLogger(__name__)  # pylint: disable=C0103
 
 
+# Version of the compact format in which block structures are
+# serialized to the cache.  Cached data written in an older compact
+# version is treated as a cache miss.  Data written before the compact
+# format was introduced (a 3-tuple of the structure's internal maps)
+# is still readable.
+SERIALIZATION_VERSION = 2
+
+# Typecode of the arrays storing indices into the block key table.
+# Version 1 used 'l', which takes 8 bytes per index on 64-bit Linux.
+_INDEX_TYPECODE = 'i'
+
+
 class BlockStructureFactory(object):
     """
     Factory class for BlockStructure objects.
@@ -65,14 +86,16 @@ class BlockStructureFactory(object):
         return block_structure
 
     @classmethod
-    def serialize_to_cache(cls, block_structure, cache):
+    def serialize_to_cache(cls, block_structure, cache, local_cache=None):
         """
         Store a compressed and pickled serialization of the given
         block structure into the given cache.
 
         The key in the cache is 'root.key.<root_block_usage_key>'.
         The data stored in the cache includes the structure's
-        block relations, transformer data, and block data.
+        block relations, transformer data, and block data.  A new
+        version identifier for the data is stored alongside it at
+        'root.version.<root_block_usage_key>'.
 
         Arguments:
             block_structure (BlockStructure) - The block structure
@@ -81,25 +104,32 @@ class BlockStructureFactory(object):
             cache (django.core.cache.backends.base.BaseCache) - The
                 cache into which cacheable data of the block structure
                 is to be serialized.
+
+            local_cache (BlockStructureLocalCache) - An optional
+                process-local cache that is also updated with a
+                deserialized copy of the block structure.
         """
-        data_to_cache = (
-            block_structure._block_relations,
-            block_structure._transformer_data,
-            block_structure._block_data_map
-        )
-        zp_data_to_cache = zpickle(data_to_cache)
-        cache.set(
-            cls._encode_root_cache_key(block_structure.root_block_usage_key),
-            zp_data_to_cache
-        )
+        root_block_usage_key = block_structure.root_block_usage_key
+        data_to_cache = (SERIALIZATION_VERSION, _serialize_compact(block_structure))
+        p_data_to_cache = pickle.dumps(data_to_cache, pickle.HIGHEST_PROTOCOL)
+        zp_data_to_cache = zlib.compress(p_data_to_cache)
+        version = uuid4().hex
+        cache.set_many({
+            cls._encode_root_cache_key(root_block_usage_key): zp_data_to_cache,
+            cls._encode_root_version_cache_key(root_block_usage_key): version,
+        })
+        if local_cache is not None:
+            shared_block_structure = BlockStructureBlockData(root_block_usage_key)
+            _deserialize_compact(shared_block_structure, data_to_cache[1])
+            local_cache.set(root_block_usage_key, shared_block_structure, len(p_data_to_cache), version=version)
         logger.debug(
             "Wrote BlockStructure %s to cache, size: %s",
-            block_structure.root_block_usage_key,
+            root_block_usage_key,
             len(zp_data_to_cache),
         )
 
     @classmethod
-    def create_from_cache(cls, root_block_usage_key, cache, transformers):
+    def create_from_cache(cls, root_block_usage_key, cache, transformers, local_cache=None):
         """
         Deserializes and returns the block structure starting at
         root_block_usage_key from the given cache, if it's found in the cache.
@@ -120,14 +150,29 @@ class BlockStructureFactory(object):
                 transformers for which the block structure will be
                 transformed.
 
+            local_cache (BlockStructureLocalCache) - An optional
+                process-local cache that is checked before the given
+                cache, for the version of the block structure currently
+                stored in the given cache.
+
         Returns:
             BlockStructure - The deserialized block structure starting
-            at root_block_usage_key, if found in the cache.
+            at root_block_usage_key, if found in the cache.  When a
+            local_cache is given, this is a copy-on-write overlay of
+            the block structure shared through the local_cache.
 
             NoneType - If the root_block_usage_key is not found in the cache
             or if the cached data is outdated for one or more of the
             given transformers.
         """
+        # Check the local cache for the version currently in the cache.
+        version = None
+        if local_cache is not None:
+            version = cache.get(cls._encode_root_version_cache_key(root_block_usage_key))
+            shared_block_structure = local_cache.get(root_block_usage_key, version) if version else None
+            if shared_block_structure is not None:
+                block_structure = BlockStructureBlockDataOverlay(shared_block_structure)
+                return cls._verify_transformer_versions(block_structure, transformers)
 
         # Find root_block_usage_key in the cache.
         zp_data_from_cache = cache.get(cls._encode_root_cache_key(root_block_usage_key))
@@ -145,12 +190,68 @@ class BlockStructureFactory(object):
             )
 
         # Deserialize and construct the block structure.
-        block_relations, transformer_data, block_data_map = zunpickle(zp_data_from_cache)
+        p_data_from_cache = zlib.decompress(zp_data_from_cache)
+        data_from_cache = pickle.loads(p_data_from_cache)
         block_structure = BlockStructureBlockData(root_block_usage_key)
-        block_structure._block_relations = block_relations
-        block_structure._transformer_data = transformer_data
-        block_structure._block_data_map = block_data_map
+        if len(data_from_cache) == 3:
+            # Data cached in the original, non-compact format.
+            block_relations, transformer_data, block_data_map = data_from_cache
+            block_structure._block_relations = block_relations
+            block_structure._transformer_data = transformer_data
+            block_structure._block_data_map = block_data_map
+        else:
+            serialization_version, serialized_data = data_from_cache
+            if serialization_version != SERIALIZATION_VERSION:
+                logger.info(
+                    "Cached BlockStructure %r is in serialization version %s, expected %s.",
+                    root_block_usage_key,
+                    serialization_version,
+                    SERIALIZATION_VERSION,
+                )
+                return None
+            _deserialize_compact(block_structure, serialized_data)
+
+            # Share the block structure with the rest of this process.
+            if version:
+                local_cache.set(root_block_usage_key, block_structure, len(p_data_from_cache), version=version)
+                block_structure = BlockStructureBlockDataOverlay(block_structure)
+
+        return cls._verify_transformer_versions(block_structure, transformers)
+
+    @classmethod
+    def remove_from_cache(cls, root_block_usage_key, cache, local_cache=None):
+        """
+        Removes the block structure for the given root_block_usage_key
+        from the given cache.
+
+        Arguments:
+            root_block_usage_key (UsageKey) - The usage_key for the root
+                of the block structure that is to be removed from
+                the given cache.
+
+            cache (django.core.cache.backends.base.BaseCache) - The
+                cache from which the block structure is to be
+                removed.
 
+            local_cache (BlockStructureLocalCache) - An optional
+                process-local cache from which the block structure is
+                also removed.  Entries in other processes' local caches
+                are no longer used once the version stored in the given
+                cache is removed.
+        """
+        cache.delete(cls._encode_root_version_cache_key(root_block_usage_key))
+        cache.delete(cls._encode_root_cache_key(root_block_usage_key))
+        if local_cache is not None:
+            local_cache.delete(root_block_usage_key)
+        # TODO also remove all block data?
+
+    @classmethod
+    def _verify_transformer_versions(cls, block_structure, transformers):
+        """
+        Returns the given block structure if its cached data for all the
+        given transformers are for their latest versions; returns None
+        otherwise.
+        """
         # Verify that the cached data for all the given transformers are
         # for their latest versions.
         outdated_transformers = {}
@@ -171,27 +272,158 @@ class BlockStructureFactory(object):
         return block_structure
 
     @classmethod
-    def remove_from_cache(cls, root_block_usage_key, cache):
+    def _encode_root_cache_key(cls, root_block_usage_key):
         """
-        Removes the block structure for the given root_block_usage_key
-        from the given cache.
+        Returns the cache key to use for storing the block structure
+        for the given root_block_usage_key.
+        """
+        return "root.key." + unicode(root_block_usage_key)
 
-        Arguments:
-            root_block_usage_key (UsageKey) - The usage_key for the root
-                of the block structure that is to be removed from
-                the given cache.
+    @classmethod
+    def _encode_root_version_cache_key(cls, root_block_usage_key):
+        """
+        Returns the cache key to use for storing the version of the
+        block structure for the given root_block_usage_key.
+        """
+        return "root.version." + unicode(root_block_usage_key)
 
-            cache (django.core.cache.backends.base.BaseCache) - The
-                cache from which the block structure is to be
-                removed.
+
+def _serialize_compact(block_structure):
+    """
+    Returns a compact, picklable representation of the given block
+    structure's relations and collected data.
+
+    Rather than maps keyed by usage keys and holding an object per
+    block, the representation is made up of:
+        block_keys ([UsageKey]) - A table of the usage keys of all
+            blocks, which are referred to by their index in the table
+            everywhere else.
+
+        children, parents ((str, str)) - The parent/child adjacency
+            of the first num_related_blocks blocks, each as a pair of
+            serialized index arrays: the offsets of each block's
+            entries, followed by the concatenated entries.
+
+        xblock_fields ({field_name: (str, list)}) - Column per xBlock
+            field: a serialized array of the indices of the blocks
+            having the field, and the field values for those blocks.
+
+        transformer_block_data ({transformer name: {key: (str, list)}})
+            - Column per transformer data key, in the same form as
+            xblock_fields.
+
+        transformer_data ({transformer name: dict}) - The
+            transformers' non-block-specific data, as is.
+    """
+    block_relations = block_structure._block_relations
+    block_data_map = block_structure._block_data_map
+
+    block_keys = list(block_relations)
+    num_related_blocks = len(block_keys)
+    block_keys.extend(usage_key for usage_key in block_data_map if usage_key not in block_relations)
+    block_indices = {usage_key: index for index, usage_key in enumerate(block_keys)}
+
+    def adjacency(get_related_keys):
         """
-        cache.delete(cls._encode_root_cache_key(root_block_usage_key))
-        # TODO also remove all block data?
+        Returns the serialized offsets and entries arrays for the given
+        relation.
+        """
+        offsets = array(_INDEX_TYPECODE, [0])
+        entries = array(_INDEX_TYPECODE)
+        for usage_key in block_keys[:num_related_blocks]:
+            entries.extend(block_indices[related_key] for related_key in get_related_keys(block_relations[usage_key]))
+            offsets.append(len(entries))
+        return offsets.tostring(), entries.tostring()
+
+    xblock_fields = defaultdict(lambda: (array(_INDEX_TYPECODE), []))
+    transformer_block_data = defaultdict(lambda: defaultdict(lambda: (array(_INDEX_TYPECODE), [])))
+    for usage_key, block_data in block_data_map.iteritems():
+        index = block_indices[usage_key]
+        for field_name, value in block_data.xblock_fields.iteritems():
+            _append_to_column(xblock_fields[field_name], index, value)
+        for transformer_name, data in block_data.transformer_data.iteritems():
+            transformer_columns = transformer_block_data[transformer_name]
+            for key, value in data.iteritems():
+                _append_to_column(transformer_columns[key], index, value)
+
+    return {
+        'block_keys': block_keys,
+        'num_related_blocks': num_related_blocks,
+        'children': adjacency(lambda relations: relations.children),
+        'parents': adjacency(lambda relations: relations.parents),
+        'xblock_fields': _serialize_columns(xblock_fields),
+        'transformer_block_data': {
+            transformer_name: _serialize_columns(columns)
+            for transformer_name, columns in transformer_block_data.iteritems()
+        },
+        'transformer_data': dict(block_structure._transformer_data),
+    }
+
+
+def _deserialize_compact(block_structure, serialized_data):
+    """
+    Populates the given block structure from its compact
+    representation, as returned by _serialize_compact.
+    """
+    block_keys = serialized_data['block_keys']
 
-    @classmethod
-    def _encode_root_cache_key(cls, root_block_usage_key):
+    def adjacency(serialized_adjacency):
         """
-        Returns the cache key to use for storing the block structure
-        for the given root_block_usage_key.
+        Yields the list of related usage keys of each related block.
         """
-        return "root.key." + unicode(root_block_usage_key)
+        offsets, entries = (_deserialize_indices(serialized) for serialized in serialized_adjacency)
+        for start, end in zip(offsets, offsets[1:]):
+            yield [block_keys[index] for index in entries[start:end]]
+
+    block_relations = defaultdict(_BlockRelations)
+    related_block_keys = block_keys[:serialized_data['num_related_blocks']]
+    for usage_key, children, parents in zip(
+            related_block_keys,
+            adjacency(serialized_data['children']),
+            adjacency(serialized_data['parents']),
+    ):
+        relations = block_relations[usage_key]
+        relations.children = children
+        relations.parents = parents
+
+    block_data_map = defaultdict(_BlockData)
+    for field_name, (serialized_indices, values) in serialized_data['xblock_fields'].iteritems():
+        for index, value in zip(_deserialize_indices(serialized_indices), values):
+            block_data_map[block_keys[index]].xblock_fields[field_name] = value
+    for transformer_name, columns in serialized_data['transformer_block_data'].iteritems():
+        for key, (serialized_indices, values) in columns.iteritems():
+            for index, value in zip(_deserialize_indices(serialized_indices), values):
+                block_data_map[block_keys[index]].transformer_data[transformer_name][key] = value
+
+    block_structure._block_relations = block_relations
+    block_structure._block_data_map = block_data_map
+    block_structure._transformer_data = defaultdict(dict, {
+        transformer_name: dict(data) for transformer_name, data in serialized_data['transformer_data'].iteritems()
+    })
+
+
+def _append_to_column(column, index, value):
+    """
+    Appends the value of the block at the given index to the given
+    (indices, values) column.
+    """
+    indices, values = column
+    indices.append(index)
+    values.append(value)
+
+
+def _serialize_columns(columns):
+    """
+    Returns the given {name: (indices, values)} columns with their
+    index arrays serialized.
+    """
+    return {name: (indices.tostring(), values) for name, (indices, values) in columns.iteritems()}
+
+
+def _deserialize_indices(serialized_indices):
+    """
+    Returns the array of indices serialized in the given string.
+    """
+    indices = array(_INDEX_TYPECODE)
+    indices.fromstring(serialized_indices)
+    return indices
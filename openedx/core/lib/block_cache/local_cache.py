@@ -0,0 +1,21 @@
+"""
+Module for the process-local tier of the block structure cache.
+"""
+from calc.lru_cache import LRUCache
+
+
+class BlockStructureLocalCache(LRUCache):
+    """
+    A process-local, least-recently-used cache of deserialized block
+    structures, sitting in front of the shared cache.  Cached block
+    structures are shared by all requests in the process, which
+    transform copy-on-write overlays of them.
+
+    Entries are keyed by the root block's usage key and cached for the
+    version of the shared cache entry they were read from, so an entry
+    is only used while the shared cache still holds that version.
+
+    The cache is bounded by the total size of its entries, as
+    measured by the size of their uncompressed serialization, which is
+    an approximation of their memory usage.
+    """
@@ -6,10 +6,10 @@ from django.core.cache import get_cache
 from mock import patch
 from unittest import TestCase
 
-from ..block_cache import get_blocks
+from ..block_cache import get_blocks, update_block_cache
 from ..exceptions import TransformerException
 from .test_utils import (
-    MockModulestoreFactory, MockCache, MockTransformer, ChildrenMapTestMixin
+    MockModulestoreFactory, MockCache, MockTransformer, MockXBlock, ChildrenMapTestMixin
 )
 
 
@@ -70,6 +70,29 @@ class TestBlockCache(TestCase, ChildrenMapTestMixin):
             for block_key in block_structure.topological_traversal():
                 assert_collected_value(block_key)
 
+    class TestPartialCollectTransformer(TestTransformer1):
+        """
+        Test Transformer class supporting a partial collect, which
+        records the blocks for which it collected data.
+        """
+        SUPPORTS_PARTIAL_COLLECT = True
+        collected_block_keys = []
+
+        @classmethod
+        def collect(cls, block_structure):
+            """
+            Sets transformer block data for each block whose data is to
+            be collected.
+            """
+            for block_key in block_structure.topological_traversal(
+                    filter_func=block_structure.is_collect_needed,
+                    yield_descendants_of_unyielded=True,
+            ):
+                cls.collected_block_keys.append(block_key)
+                block_structure.set_transformer_block_field(
+                    block_key, cls, cls.block_key(), cls.block_val(block_key)
+                )
+
     def setUp(self):
         super(TestBlockCache, self).setUp()
         self.children_map = self.SIMPLE_CHILDREN_MAP
@@ -111,3 +134,79 @@ class TestBlockCache(TestCase, ChildrenMapTestMixin):
                 self.assertGreater(self.modulestore.get_items_call_count, 0)
             else:
                 self.assertEquals(self.modulestore.get_items_call_count, 0)
+
+    def test_update_block_cache(self, mock_available_transforms):
+        mock_available_transforms.return_value = {transformer.name(): transformer for transformer in self.transformers}
+        get_blocks(
+            self.mock_cache, self.modulestore, self.usage_info, root_block_usage_key=0, transformers=self.transformers
+        )
+
+        # update the cached block structure after block 4 is removed
+        self.modulestore.blocks[1].children.remove(4)
+        update_block_cache(self.mock_cache, self.modulestore, root_block_usage_key=0)
+
+        self.modulestore.get_items_call_count = 0
+        block_structure = get_blocks(
+            self.mock_cache, self.modulestore, self.usage_info, root_block_usage_key=0, transformers=self.transformers
+        )
+        self.assertEquals(self.modulestore.get_items_call_count, 0)
+        self.assertFalse(block_structure.has_block(4))
+        self.assertEquals(block_structure.get_children(1), [3])
+
+    def _update_after_edit(self, transformers, edited_block_key):
+        """
+        Caches the block structure collected for the given transformers,
+        edits the block with the given key and updates the cached block
+        structure.  Returns the updated block structure, verifying it.
+        """
+        self.transformers = transformers
+        for block_key, xblock in self.modulestore.blocks.iteritems():
+            xblock.field_map['edited_on'] = 'original.' + unicode(block_key)
+        get_blocks(
+            self.mock_cache, self.modulestore, self.usage_info, root_block_usage_key=0, transformers=self.transformers
+        )
+
+        self.TestPartialCollectTransformer.collected_block_keys = []
+        self.modulestore.blocks[edited_block_key].field_map['edited_on'] = 'edited'
+        update_block_cache(self.mock_cache, self.modulestore, root_block_usage_key=0)
+
+        block_structure = get_blocks(
+            self.mock_cache, self.modulestore, self.usage_info, root_block_usage_key=0, transformers=self.transformers
+        )
+        self.assert_block_structure(block_structure, self.children_map)
+        self.assertEquals(block_structure.get_xblock_field(edited_block_key, 'edited_on'), 'edited')
+        return block_structure
+
+    def test_partial_collect(self, mock_available_transforms):
+        transformers = [self.TestPartialCollectTransformer()]
+        mock_available_transforms.return_value = {transformer.name(): transformer for transformer in transformers}
+        self._update_after_edit(transformers, edited_block_key=1)
+
+        # only the edited block and its descendants are recollected
+        self.assertEquals(set(self.TestPartialCollectTransformer.collected_block_keys), {1, 3, 4})
+
+    def test_partial_collect_of_new_blocks(self, mock_available_transforms):
+        transformers = [self.TestPartialCollectTransformer()]
+        mock_available_transforms.return_value = {transformer.name(): transformer for transformer in transformers}
+        get_blocks(
+            self.mock_cache, self.modulestore, self.usage_info, root_block_usage_key=0, transformers=transformers
+        )
+
+        # add a block without an edit time under block 2
+        self.TestPartialCollectTransformer.collected_block_keys = []
+        self.modulestore.blocks[5] = MockXBlock(5, modulestore=self.modulestore)
+        self.modulestore.blocks[2].children.append(5)
+        update_block_cache(self.mock_cache, self.modulestore, root_block_usage_key=0)
+
+        # blocks without an edit time are always recollected
+        self.assertEquals(set(self.TestPartialCollectTransformer.collected_block_keys), {0, 1, 2, 3, 4, 5})
+        block_structure = get_blocks(
+            self.mock_cache, self.modulestore, self.usage_info, root_block_usage_key=0, transformers=transformers
+        )
+        self.assertEquals(block_structure.get_children(2), [5])
+
+    def test_full_collect_without_partial_support(self, mock_available_transforms):
+        transformers = [self.TestPartialCollectTransformer(), self.TestTransformer1()]
+        mock_available_transforms.return_value = {transformer.name(): transformer for transformer in transformers}
+        self._update_after_edit(transformers, edited_block_key=1)
+        self.assertEquals(set(self.TestPartialCollectTransformer.collected_block_keys), {0, 1, 2, 3, 4})
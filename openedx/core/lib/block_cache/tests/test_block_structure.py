@@ -10,7 +10,9 @@ from unittest import TestCase
 
 from openedx.core.lib.graph_traversals import traverse_post_order
 
-from ..block_structure import BlockStructure, BlockStructureModulestoreData, BlockStructureBlockData
+from ..block_structure import (
+    BlockStructure, BlockStructureModulestoreData, BlockStructureBlockData, BlockStructureBlockDataOverlay
+)
 from ..exceptions import TransformerException
 from .test_utils import MockXBlock, MockTransformer, ChildrenMapTestMixin
 
@@ -158,10 +160,11 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
                 ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
                 ChildrenMapTestMixin.DAG_CHILDREN_MAP,
             ],
+            [True, False],
         )
     )
     @ddt.unpack
-    def test_remove_block(self, keep_descendants, block_to_remove, children_map):
+    def test_remove_block(self, keep_descendants, block_to_remove, children_map, overlay):
         ### skip test if invalid
         if (block_to_remove >= len(children_map)) or (keep_descendants and block_to_remove == 0):
             return
@@ -169,6 +172,9 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         ### create structure
         block_structure = self.create_block_structure(BlockStructureBlockData, children_map)
         parents_map = self.get_parents_map(children_map)
+        if overlay:
+            base_block_structure = block_structure
+            block_structure = BlockStructureBlockDataOverlay(base_block_structure)
 
         ### verify blocks pre-exist
         self.assert_block_structure(block_structure, children_map)
@@ -212,6 +218,31 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
 
         self.assert_block_structure(block_structure, pruned_children_map, missing_blocks)
 
+        # verify the overlaid structure is unchanged
+        if overlay:
+            self.assert_block_structure(base_block_structure, children_map)
+
+    def test_overlay_block_data(self):
+        base_block_structure = self.create_block_structure(BlockStructureBlockData, self.SIMPLE_CHILDREN_MAP)
+        base_block_structure._add_transformer(MockTransformer)
+        for block_key in range(len(self.SIMPLE_CHILDREN_MAP)):
+            base_block_structure.set_transformer_block_field(block_key, MockTransformer, 'key', 'base')
+
+        block_structure = BlockStructureBlockDataOverlay(base_block_structure)
+        self.assertEquals(block_structure.get_transformer_block_field(1, MockTransformer, 'key'), 'base')
+        block_structure.set_transformer_block_field(1, MockTransformer, 'key', 'overlay')
+        block_structure.remove_transformer_block_field(2, MockTransformer, 'key')
+        block_structure.set_transformer_data(MockTransformer, 'key', 'overlay')
+
+        self.assertEquals(block_structure.get_transformer_block_field(1, MockTransformer, 'key'), 'overlay')
+        self.assertIsNone(block_structure.get_transformer_block_field(2, MockTransformer, 'key'))
+        self.assertEquals(block_structure.get_transformer_data(MockTransformer, 'key'), 'overlay')
+        for block_key in range(len(self.SIMPLE_CHILDREN_MAP)):
+            self.assertEquals(
+                base_block_structure.get_transformer_block_field(block_key, MockTransformer, 'key'), 'base'
+            )
+        self.assertIsNone(base_block_structure.get_transformer_data(MockTransformer, 'key'))
+
     def test_remove_block_if(self):
         block_structure = self.create_block_structure(BlockStructureBlockData, ChildrenMapTestMixin.LINEAR_CHILDREN_MAP)
         block_structure.remove_block_if(lambda block: block == 2)
@@ -5,7 +5,10 @@ Tests for block_structure_factory.py
 from mock import patch
 from unittest import TestCase
 
-from ..block_structure_factory import BlockStructureFactory
+from openedx.core.lib.cache_utils import zpickle
+
+from ..block_structure_factory import BlockStructureFactory, SERIALIZATION_VERSION
+from ..local_cache import BlockStructureLocalCache
 from .test_utils import (
     MockCache, MockModulestoreFactory, MockTransformer, ChildrenMapTestMixin
 )
@@ -94,6 +97,186 @@ class TestBlockStructureFactory(TestCase, ChildrenMapTestMixin):
         self.assert_block_structure(from_cache_block_structure, self.children_map)
         self.assertEquals(self.modulestore.get_items_call_count, 0)
 
+    def test_cache_block_data(self):
+        cache = MockCache()
+
+        # collect transformer and xBlock field data
+        self.add_transformers()
+        for block_key in range(len(self.children_map)):
+            self.block_structure._block_data_map[block_key].xblock_fields['display_name'] = 'Block {}'.format(block_key)
+            self.block_structure.set_transformer_block_field(block_key, MockTransformer, 'index', block_key)
+        self.block_structure._block_data_map[2].xblock_fields['graded'] = True
+
+        # serialize to cache and re-create from cache
+        BlockStructureFactory.serialize_to_cache(self.block_structure, cache)
+        from_cache_block_structure = BlockStructureFactory.create_from_cache(
+            root_block_usage_key=0,
+            cache=cache,
+            transformers=self.transformers,
+        )
+
+        for block_key in range(len(self.children_map)):
+            self.assertEquals(
+                from_cache_block_structure.get_parents(block_key),
+                self.block_structure.get_parents(block_key),
+            )
+            self.assertEquals(
+                from_cache_block_structure.get_xblock_field(block_key, 'display_name'),
+                'Block {}'.format(block_key),
+            )
+            self.assertEquals(
+                from_cache_block_structure.get_transformer_block_field(block_key, MockTransformer, 'index'),
+                block_key,
+            )
+        self.assertTrue(from_cache_block_structure.get_xblock_field(2, 'graded'))
+        self.assertIsNone(from_cache_block_structure.get_xblock_field(3, 'graded'))
+        self.assertEquals(
+            from_cache_block_structure.get_transformer_block_field(0, MockTransformer, 'test'),
+            'MockTransformer val',
+        )
+
+    def test_cache_is_compact(self):
+        # a larger structure, with collected data for each block
+        children_map = [
+            [child for child in range(10 * parent + 1, 10 * parent + 11) if child < 500]
+            for parent in range(500)
+        ]
+        self.block_structure = BlockStructureFactory.create_from_modulestore(
+            root_block_usage_key=0, modulestore=MockModulestoreFactory.create(children_map)
+        )
+        self.add_transformers()
+        for block_key in range(len(children_map)):
+            self.block_structure.set_transformer_block_field(block_key, MockTransformer, 'index', block_key)
+
+        cache = MockCache()
+        BlockStructureFactory.serialize_to_cache(self.block_structure, cache)
+        original_format_data = zpickle((
+            self.block_structure._block_relations,
+            self.block_structure._transformer_data,
+            self.block_structure._block_data_map,
+        ))
+        self.assertLess(
+            len(cache.get(BlockStructureFactory._encode_root_cache_key(0))),
+            len(original_format_data),
+        )
+
+    def test_original_format_in_cache(self):
+        cache = MockCache()
+        self.add_transformers()
+
+        # cache in the format used before the compact serialization
+        cache.set(
+            BlockStructureFactory._encode_root_cache_key(0),
+            zpickle((
+                self.block_structure._block_relations,
+                self.block_structure._transformer_data,
+                self.block_structure._block_data_map,
+            ))
+        )
+        from_cache_block_structure = BlockStructureFactory.create_from_cache(
+            root_block_usage_key=0,
+            cache=cache,
+            transformers=self.transformers,
+        )
+        self.assertIsNotNone(from_cache_block_structure)
+        self.assert_block_structure(from_cache_block_structure, self.children_map)
+
+    def test_outdated_serialization_version(self):
+        cache = MockCache()
+        self.add_transformers()
+        BlockStructureFactory.serialize_to_cache(self.block_structure, cache)
+
+        with patch(
+            'openedx.core.lib.block_cache.block_structure_factory.SERIALIZATION_VERSION',
+            SERIALIZATION_VERSION + 1,
+        ):
+            self.assertIsNone(
+                BlockStructureFactory.create_from_cache(
+                    root_block_usage_key=0,
+                    cache=cache,
+                    transformers=self.transformers,
+                )
+            )
+
+    def test_local_cache(self):
+        cache = MockCache()
+        local_cache = BlockStructureLocalCache(max_size=1024 * 1024)
+        self.add_transformers()
+
+        # serializing populates the local cache
+        BlockStructureFactory.serialize_to_cache(self.block_structure, cache, local_cache)
+
+        # the shared cache's copy of the data isn't read on a local hit
+        with patch.object(cache, 'get', wraps=cache.get) as mock_get:
+            from_cache_block_structure = BlockStructureFactory.create_from_cache(
+                root_block_usage_key=0,
+                cache=cache,
+                transformers=self.transformers,
+                local_cache=local_cache,
+            )
+        mock_get.assert_called_once_with(BlockStructureFactory._encode_root_version_cache_key(0))
+        self.assert_block_structure(from_cache_block_structure, self.children_map)
+        self.assertEquals(local_cache.stats()['hits'], 1)
+
+        # block structures created from the local cache are independent
+        from_cache_block_structure.remove_block(1, keep_descendants=False)
+        from_cache_block_structure.set_transformer_data(MockTransformer, 'test', 'changed')
+        from_cache_block_structure = BlockStructureFactory.create_from_cache(
+            root_block_usage_key=0,
+            cache=cache,
+            transformers=self.transformers,
+            local_cache=local_cache,
+        )
+        self.assert_block_structure(from_cache_block_structure, self.children_map)
+        self.assertIsNone(from_cache_block_structure.get_transformer_data(MockTransformer, 'test'))
+
+    def test_local_cache_populated_from_cache(self):
+        cache = MockCache()
+        local_cache = BlockStructureLocalCache(max_size=1024 * 1024)
+        self.add_transformers()
+        BlockStructureFactory.serialize_to_cache(self.block_structure, cache)
+
+        for _ in range(2):
+            self.assertIsNotNone(
+                BlockStructureFactory.create_from_cache(
+                    root_block_usage_key=0,
+                    cache=cache,
+                    transformers=self.transformers,
+                    local_cache=local_cache,
+                )
+            )
+        stats = local_cache.stats()
+        self.assertEquals((stats['hits'], stats['misses']), (1, 1))
+
+    def test_local_cache_outdated_version(self):
+        cache = MockCache()
+        local_cache = BlockStructureLocalCache(max_size=1024 * 1024)
+        self.add_transformers()
+        BlockStructureFactory.serialize_to_cache(self.block_structure, cache, local_cache)
+
+        # another process caches a new version, without this local cache
+        self.block_structure.remove_block(4, keep_descendants=False)
+        BlockStructureFactory.serialize_to_cache(self.block_structure, cache)
+
+        from_cache_block_structure = BlockStructureFactory.create_from_cache(
+            root_block_usage_key=0,
+            cache=cache,
+            transformers=self.transformers,
+            local_cache=local_cache,
+        )
+        self.assertFalse(from_cache_block_structure.has_block(4))
+
+        # another process removes the block structure from its cache
+        BlockStructureFactory.remove_from_cache(root_block_usage_key=0, cache=cache)
+        self.assertIsNone(
+            BlockStructureFactory.create_from_cache(
+                root_block_usage_key=0,
+                cache=cache,
+                transformers=self.transformers,
+                local_cache=local_cache,
+            )
+        )
+
     def test_remove_from_cache(self):
         cache = MockCache()
 
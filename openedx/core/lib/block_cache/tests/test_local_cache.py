@@ -0,0 +1,66 @@
+"""
+Tests for local_cache.py
+"""
+from unittest import TestCase
+
+from ..local_cache import BlockStructureLocalCache
+
+
+class TestBlockStructureLocalCache(TestCase):
+    """
+    Tests for BlockStructureLocalCache
+    """
+    def setUp(self):
+        super(TestBlockStructureLocalCache, self).setUp()
+        self.local_cache = BlockStructureLocalCache(max_size=10)
+
+    def assert_stats(self, **expected_stats):
+        """
+        Asserts the given values of the local cache's stats.
+        """
+        stats = self.local_cache.stats()
+        self.assertEquals({name: stats[name] for name in expected_stats}, expected_stats)
+
+    def test_get(self):
+        self.assertIsNone(self.local_cache.get(0, 'v1'))
+        self.local_cache.set(0, 'data', 4, version='v1')
+        self.assertEquals(self.local_cache.get(0, 'v1'), 'data')
+        self.assertIsNone(self.local_cache.get(0, 'v2'))
+        self.assert_stats(hits=1, misses=2, entries=1, size=4)
+
+    def test_set_replaces_version(self):
+        self.local_cache.set(0, 'data', 4, version='v1')
+        self.local_cache.set(0, 'new data', 5, version='v2')
+        self.assertIsNone(self.local_cache.get(0, 'v1'))
+        self.assertEquals(self.local_cache.get(0, 'v2'), 'new data')
+        self.assert_stats(entries=1, size=5)
+
+    def test_eviction(self):
+        self.local_cache.set(0, 'data 0', 4, version='v1')
+        self.local_cache.set(1, 'data 1', 4, version='v1')
+
+        # use block structure 0 so block structure 1 is evicted first
+        self.local_cache.get(0, 'v1')
+        self.local_cache.set(2, 'data 2', 4, version='v1')
+
+        self.assertEquals(self.local_cache.get(0, 'v1'), 'data 0')
+        self.assertIsNone(self.local_cache.get(1, 'v1'))
+        self.assertEquals(self.local_cache.get(2, 'v1'), 'data 2')
+        self.assert_stats(entries=2, size=8)
+
+    def test_too_large(self):
+        self.local_cache.set(0, 'data', 11, version='v1')
+        self.assertIsNone(self.local_cache.get(0, 'v1'))
+        self.assert_stats(entries=0, size=0)
+
+    def test_disabled(self):
+        self.local_cache = BlockStructureLocalCache(max_size=0)
+        self.local_cache.set(0, 'data', 4, version='v1')
+        self.assertIsNone(self.local_cache.get(0, 'v1'))
+
+    def test_delete(self):
+        self.local_cache.set(0, 'data', 4, version='v1')
+        self.local_cache.delete(0)
+        self.local_cache.delete(1)
+        self.assertIsNone(self.local_cache.get(0, 'v1'))
+        self.assert_stats(entries=0, size=0)
@@ -28,6 +28,19 @@ class BlockStructureTransformer(object):
     #
     VERSION = 0
 
+    # Whether the transformer's collect method supports a partial
+    # collect, in which data is only collected for some of the blocks.
+    #
+    # When a block structure is recollected, the block_cache framework
+    # reuses the data previously collected for the blocks that are
+    # unchanged since then, if all registered transformers support a
+    # partial collect.  Such transformers should then only collect
+    # block-specific data for the blocks for which the block_structure's
+    # is_collect_needed method returns True.  Non-block-specific data is
+    # always collected.
+    #
+    SUPPORTS_PARTIAL_COLLECT = False
+
     @classmethod
     def name(cls):
         """
@@ -71,6 +84,11 @@ class BlockStructureTransformer(object):
             topological_traversal
             post_order_traversal
 
+        If the transformer supports a partial collect, block-specific
+        data is only to be stored for the blocks for which the following
+        method returns True:
+            is_collect_needed
+
         Arguments:
             block_structure (BlockStructureModulestoreData) - A mutable
                 block structure that is to be modified with collected